@@ -0,0 +1,327 @@
+import base64
+import json
+from sqlalchemy.orm import joinedload, selectinload
+from extensions import db
+from models import User, Product, ProductImage, Order, OrderItem, WithdrawalRequest, SupportTicket, Coupon, Advertisement
+from seller_history import parse_date
+
+# List queries for the admin panel. Each ListSpec names the columns a list may
+# be sorted by, the query parameters it may be filtered by, and the relations
+# its serializer reads (loaded up front, so a page costs a fixed number of
+# queries). Pages are keyset paginated on (sort column, id): the cursor holds
+# the last row's values, so deep pages cost the same as the first and rows
+# inserted while paging don't shift the window. NULLs sort last either way.
+# A spec can instead select plain columns and `project` the page: the page is
+# then a CTE and the projection joins and aggregates over just those rows.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class ListSpec:
+    def __init__(self, model, sorts, default_sort, filters=None, base=None, options=None, serialize=None,
+                 select=None, project=None):
+        self.model = model
+        self.sorts = sorts                      # name -> column
+        self.default_sort = default_sort        # 'name' ascending, '-name' descending
+        self.filters = filters or {}            # query param -> fn(value) -> clause
+        self.base = base or ()                  # clauses every row must match
+        self.options = options or (lambda: ())  # loader options, built lazily so backrefs exist
+        self.serialize = serialize or (lambda row: row.to_dict())
+        self.select = select                    # fn() -> select of columns, incl. id and the sort columns
+        self.project = project                  # fn(page cte) -> select over the page
+
+
+# Filter builders. Each returns fn(value) -> clause and raises ValueError on bad input.
+
+def equals(column, convert=str):
+    def build(value):
+        try:
+            return column == convert(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value: {value}")
+    return build
+
+
+def flag(column):
+    def build(value):
+        value = value.lower()
+        if value in ('1', 'true', 'yes'):
+            return column.is_(True)
+        if value in ('0', 'false', 'no'):
+            return db.or_(column.is_(False), column.is_(None))
+        raise ValueError(f"Invalid flag: {value}")
+    return build
+
+
+def search(*columns):
+    def build(value):
+        return db.or_(*[c.ilike(f"%{value}%") for c in columns])
+    return build
+
+
+def since(column):
+    return lambda value: column >= parse_date(value)
+
+
+def until(column):
+    return lambda value: column < parse_date(value, end=True)
+
+
+def parse_sort(spec, value):
+    """Returns (name, descending) for a whitelisted sort key."""
+    value = value or spec.default_sort
+    name = value.lstrip('-')
+    if name not in spec.sorts:
+        raise ValueError(f"Cannot sort by {name}; use one of {', '.join(sorted(spec.sorts))}")
+    return name, value.startswith('-')
+
+
+def encode_cursor(sort, row_value, row_id):
+    if hasattr(row_value, 'isoformat'):
+        row_value = row_value.isoformat()
+    raw = json.dumps([sort, row_value, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(spec, sort, cursor):
+    try:
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if cursor_sort != sort:
+            raise ValueError
+        if value is not None and isinstance(spec.sorts[sort.lstrip('-')].type, db.DateTime):
+            value = parse_date(value)
+        return value, int(row_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _after(column, id_column, descending, value, row_id):
+    """Rows after (value, row_id) in the order (column IS NULL, column, id)."""
+    past_id = id_column < row_id if descending else id_column > row_id
+    if value is None:
+        return db.and_(column.is_(None), past_id)
+    past_value = column < value if descending else column > value
+    return db.or_(past_value, db.and_(column == value, past_id), column.is_(None))
+
+
+def _ordering(column, id_column, descending):
+    if descending:
+        return column.is_(None), column.desc(), id_column.desc()
+    return column.is_(None), column.asc(), id_column.asc()
+
+
+def build_query(spec, args):
+    """The filtered, sorted select for `args`; raises ValueError on bad params."""
+    query = spec.select() if spec.select else db.select(spec.model).options(*spec.options())
+    query = query.where(*spec.base)
+    for param, build in spec.filters.items():
+        value = (args.get(param) or '').strip()
+        if value:
+            query = query.where(build(value))
+    return query
+
+
+def fetch_page(spec, args):
+    """Returns (rows, next_cursor) for the request args; raises ValueError on bad params."""
+    limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    name, descending = parse_sort(spec, args.get('sort'))
+    sort = f"-{name}" if descending else name
+    column, id_column = spec.sorts[name], spec.model.id
+
+    query = build_query(spec, args)
+    if args.get('cursor'):
+        value, row_id = decode_cursor(spec, sort, args['cursor'])
+        query = query.where(_after(column, id_column, descending, value, row_id))
+    query = query.order_by(*_ordering(column, id_column, descending)).limit(limit + 1)
+    if spec.project:
+        page = query.cte('page')
+        outer = spec.project(page).order_by(*_ordering(page.c[column.key], page.c.id, descending))
+        rows = db.session.execute(outer).all()
+    else:
+        rows = db.session.execute(query).unique().scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    return rows[:limit], next_cursor
+
+
+def page(spec, args):
+    """The JSON body for one page: {"items": [...], "next_cursor": ...}."""
+    rows, next_cursor = fetch_page(spec, args)
+    return {"items": [spec.serialize(r) for r in rows], "next_cursor": next_cursor}
+
+
+# Admin lists
+
+def _product_dict(p):
+    data = p.to_dict()
+    data['seller_name'] = p.seller.name if p.seller else "Unknown"
+    return data
+
+
+def _order_columns():
+    return db.select(Order.id, Order.total_amount, Order.status, Order.created_at,
+                     User.name.label('customer_name')).join(User, User.id == Order.user_id)
+
+
+def _with_seller_names(page):
+    """The page's orders with their distinct seller names joined into one string."""
+    sellers = db.select(OrderItem.order_id, User.name) \
+        .join(page, page.c.id == OrderItem.order_id) \
+        .join(User, User.id == OrderItem.seller_id) \
+        .distinct().subquery()
+    return db.select(page, db.func.aggregate_strings(sellers.c.name, ', ').label('seller_names')) \
+        .outerjoin(sellers, sellers.c.order_id == page.c.id) \
+        .group_by(*page.c)
+
+
+def _order_dict(row):
+    return {
+        "id": row.id,
+        "customer_name": row.customer_name,
+        "user_name": row.customer_name,
+        "seller_names": row.seller_names or "",
+        "total": row.total_amount,
+        "status": row.status,
+        "created_at": row.created_at.isoformat()
+    }
+
+
+def _order_sku(value):
+    # A prefix match on upper(sku) can use ix_product_sku_upper, where ilike '%..%' has to scan every product.
+    # PostgreSQL builds that index with text_pattern_ops, which serves LIKE 'prefix%' but not a
+    # range under a non-C collation; SQLite's expression index serves the range.
+    sku, value = db.func.upper(Product.sku), value.upper()
+    if db.session.get_bind().dialect.name == 'postgresql':
+        escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        match = sku.like(escaped + '%', escape='\\')
+    else:
+        match = db.and_(sku >= value, sku < value + '\uffff')
+    products = db.select(Product.id).where(match)
+    return Order.id.in_(db.select(OrderItem.order_id).where(OrderItem.product_id.in_(products)))
+
+
+def _withdrawal_dict(r):
+    return {
+        "id": r.id,
+        "seller_id": r.seller_id,
+        "amount": r.amount,
+        "seller_name": r.seller.name,
+        "status": r.status,
+        "requested_at": r.requested_at.isoformat(),
+        "payments": [{"id": p.id, "amount": p.amount, "method": p.method, "paid_at": p.paid_at.isoformat() if p.paid_at else None} for p in r.payments]
+    }
+
+
+def _user_spec(base=()):
+    return ListSpec(
+        User,
+        sorts={'id': User.id, 'name': User.name, 'email': User.email, 'role': User.role, 'created_at': User.created_at},
+        default_sort='-id',
+        filters={
+            'role': equals(User.role),
+            'is_active': flag(User.is_active),
+            'is_approved': flag(User.is_approved),
+            'q': search(User.name, User.email, User.phone),
+        },
+        base=base,
+        options=lambda: (selectinload(User.addresses),)
+    )
+
+
+def _product_spec(base=()):
+    return ListSpec(
+        Product,
+        sorts={'id': Product.id, 'name': Product.name, 'price': Product.price, 'status': Product.status,
+               'created_at': Product.created_at},
+        default_sort='-id',
+        filters={
+            'status': equals(Product.status),
+            'seller_id': equals(Product.seller_id, int),
+            'category_id': equals(Product.category_id, int),
+            'q': search(Product.name, Product.sku, Product.brand),
+        },
+        base=base,
+        options=lambda: (joinedload(Product.seller), joinedload(Product.inventory),
+                         selectinload(Product.product_images).joinedload(ProductImage.file)),
+        serialize=_product_dict
+    )
+
+
+USERS = _user_spec()
+SELLERS = _user_spec(base=(User.role == 'seller',))
+PRODUCTS = _product_spec()
+PENDING_PRODUCTS = _product_spec(base=(Product.status == 'pending',))
+
+ORDERS = ListSpec(
+    Order,
+    sorts={'id': Order.id, 'created_at': Order.created_at, 'total': Order.total_amount, 'status': Order.status},
+    default_sort='-created_at',
+    filters={
+        'status': equals(Order.status),
+        'payment_status': equals(Order.payment_status),
+        'user_id': equals(Order.user_id, int),
+        'start_date': since(Order.created_at),
+        'end_date': until(Order.created_at),
+        # Subqueries rather than joins, so an order with several matching items is listed once
+        'sku': _order_sku,
+        'category_id': lambda v: Order.items.any(OrderItem.product.has(equals(Product.category_id, int)(v))),
+        'seller_id': lambda v: Order.items.any(equals(OrderItem.seller_id, int)(v)),
+    },
+    select=_order_columns,
+    project=_with_seller_names,
+    serialize=_order_dict
+)
+
+WITHDRAWALS = ListSpec(
+    WithdrawalRequest,
+    sorts={'id': WithdrawalRequest.id, 'requested_at': WithdrawalRequest.requested_at,
+           'amount': WithdrawalRequest.amount, 'status': WithdrawalRequest.status},
+    default_sort='-requested_at',
+    filters={
+        'status': equals(WithdrawalRequest.status),
+        'seller_id': equals(WithdrawalRequest.seller_id, int),
+    },
+    options=lambda: (joinedload(WithdrawalRequest.seller), selectinload(WithdrawalRequest.payments)),
+    serialize=_withdrawal_dict
+)
+
+SUPPORT_TICKETS = ListSpec(
+    SupportTicket,
+    sorts={'id': SupportTicket.id, 'created_at': SupportTicket.created_at, 'status': SupportTicket.status},
+    default_sort='-created_at',
+    filters={
+        'status': equals(SupportTicket.status),
+        'user_id': equals(SupportTicket.user_id, int),
+        'q': search(SupportTicket.subject, SupportTicket.email),
+    },
+    options=lambda: (joinedload(SupportTicket.user),)
+)
+
+COUPONS = ListSpec(
+    Coupon,
+    sorts={'id': Coupon.id, 'code': Coupon.code, 'created_at': Coupon.created_at, 'expiry_date': Coupon.expiry_date,
+           'used_count': Coupon.used_count, 'discount_percent': Coupon.discount_percent},
+    default_sort='-id',
+    filters={
+        'type': equals(Coupon.type),
+        'is_active': flag(Coupon.is_active),
+        'seller_id': equals(Coupon.seller_id, int),
+        'q': search(Coupon.code),
+    }
+)
+
+ADS = ListSpec(
+    Advertisement,
+    sorts={'id': Advertisement.id, 'priority': Advertisement.priority, 'start_date': Advertisement.start_date,
+           'views': Advertisement.views, 'clicks': Advertisement.clicks},
+    default_sort='-priority',
+    filters={
+        'position': equals(Advertisement.position),
+        'is_active': flag(Advertisement.is_active),
+        'q': search(Advertisement.title),
+    },
+    options=lambda: (joinedload(Advertisement.product),)
+)
@@ -1,5 +1,3 @@
-from google import genai
-from google.genai.errors import ClientError
 import json
 import logging
 import os
@@ -9,8 +7,14 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize the client globally or pass it.
+# google.genai takes a few hundred ms to import, so it is only loaded on first use.
 _genai_client = None
 
+def genai_client_error():
+    """Returns google.genai's ClientError class (imports the SDK on first call)."""
+    from google.genai.errors import ClientError
+    return ClientError
+
 def configure_genai_client():
     """
     Configures and returns the Gemini API client.
@@ -22,6 +26,7 @@ def configure_genai_client():
             logger.warning("GEMINI_API_KEY not found in environment variables. AI features will not work.")
             return None
         try:
+            from google import genai
             _genai_client = genai.Client(api_key=api_key)
         except Exception as e:
             logger.error(f"Error initializing Gemini client: {e}")
@@ -51,7 +56,7 @@ def generate_product_suggestions(keyword_or_description):
                 model="gemini-2.5-flash", 
                 contents=prompt_content
             )
-        except ClientError as e:
+        except genai_client_error() as e:
             if e.code == 429:
                 logger.warning("Gemini 2.5 Flash rate limited. Retrying with gemini-2.5-flash-lite.")
                 response = client.models.generate_content(
@@ -71,7 +76,7 @@ def generate_product_suggestions(keyword_or_description):
         text_response = text_response.strip()
             
         return json.loads(text_response)
-    except ClientError as e:
+    except genai_client_error() as e:
         logger.error(f"ClientError generating product suggestions: {e}")
         if e.code == 429:
              return {"error": "AI service busy (Rate Limit). Please try again later."}
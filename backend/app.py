@@ -1,6 +1,6 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from extensions import db, jwt, socketio, resolve_tenant
+from extensions import db, jwt, socketio, cache, resolve_tenant
 from routes.auth import auth_bp
 from routes.user import user_bp
 from routes.seller import seller_bp
@@ -21,7 +21,7 @@ load_dotenv()
 from logging.handlers import RotatingFileHandler
 import logging
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__, instance_relative_config=True)
     
     # Config
@@ -29,7 +29,7 @@ def create_app():
     os.makedirs(app.instance_path, exist_ok=True)
     
     # Configure Logging
-    if not app.debug:
+    if not app.debug and not (config or {}).get('TESTING'):
         log_path = os.path.join(app.instance_path, 'app.log')
         file_handler = RotatingFileHandler(log_path, maxBytes=1024 * 1024, backupCount=10)
         file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
@@ -53,13 +53,27 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JWT_SECRET_KEY'] = os.getenv("JWT_SECRET_KEY", "dev-secret")
     app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')
+    # Where the admin log viewer reads app.log and its rotations
+    app.config['LOG_DIR'] = app.instance_path
+    # 'x-accel' (nginx) or 'x-sendfile' lets the front proxy send file bodies
+    app.config['FILE_OFFLOAD'] = os.getenv('FILE_OFFLOAD', '')
+    app.config['X_ACCEL_PREFIX'] = os.getenv('X_ACCEL_PREFIX', '/_protected')
+
+    # Overrides (e.g. tests pointing at an in-memory database)
+    if config:
+        app.config.update(config)
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    app.config.setdefault('FILE_OFFLOAD_ROOTS', {
+        'uploads': app.config['UPLOAD_FOLDER'],
+        'images': os.path.abspath(os.path.join(app.instance_path, '..', 'images'))
+    })
 
     # Init Extensions
     db.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
     socketio.init_app(app, cors_allowed_origins="*")
-    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, allow_headers=["Content-Type", "Authorization", "X-Tenant-Domain"])
+    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, allow_headers=["Content-Type", "Authorization", "X-Tenant-Domain", "X-Guest-Cart"])
 
     @app.before_request
     def handle_options():
@@ -87,10 +101,27 @@ def create_app():
 
     return app
 
-app = create_app()
+# Importing this module must not build an app (tests and workers call
+# create_app() themselves); `from app import app` still works and builds the
+# default app on first access.
+_app = None
+
+def get_app():
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+def __getattr__(name):
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
     from security_check import validate_system
     if not validate_system():
         exit(1)
+    app = create_app()
+    from payment_events import start_webhook_worker
+    start_webhook_worker(app)
     socketio.run(app, debug=True, port=5000,host='0.0.0.0')
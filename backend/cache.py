@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    In-process stand-in for the subset of the Redis API we use
+    (get / set with expiry / delete / incr). Values are stored as given.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._alive(key, time.monotonic())
+            return entry[0] if entry else None
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            entry = self._alive(key, time.monotonic())
+            value = int(entry[0]) + amount if entry else amount
+            self._data[key] = (value, entry[1] if entry else None)
+            return value
+
+
+class Cache:
+    """
+    JSON cache backed by Redis when REDIS_URL is configured (and the redis
+    package is installed), otherwise by a per-process LocalCache.
+    Backend errors are logged and treated as cache misses.
+    """
+
+    def __init__(self):
+        self.client = LocalCache()
+
+    def init_app(self, app):
+        url = app.config.get('REDIS_URL') or os.getenv('REDIS_URL')
+        self.client = LocalCache()
+        if url:
+            try:
+                import redis
+                self.client = redis.Redis.from_url(url)
+            except ImportError:
+                app.logger.warning("REDIS_URL set but redis package missing. Using local cache.")
+        app.extensions['cache'] = self
+
+    def get_json(self, key):
+        try:
+            raw = self.client.get(key)
+        except Exception as e:
+            logger.error(f"Cache get failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set_json(self, key, value, ttl=None):
+        try:
+            self.client.set(key, json.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.error(f"Cache set failed for {key}: {e}")
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception as e:
+            logger.error(f"Cache delete failed: {e}")
+
+    def incr(self, key):
+        try:
+            return int(self.client.incr(key))
+        except Exception as e:
+            logger.error(f"Cache incr failed for {key}: {e}")
+            return None
@@ -0,0 +1,177 @@
+from extensions import db
+from models import Cart, CartItem, Product, Inventory, ProductImage, Coupon
+from datetime import datetime
+
+
+def _first_image_id():
+    """Correlated subquery returning the lowest-positioned image of a product."""
+    return (
+        db.session.query(ProductImage.file_id)
+        .filter(ProductImage.product_id == Product.id)
+        .order_by(ProductImage.position, ProductImage.id)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+
+
+def _line_columns():
+    return (
+        Product.name,
+        Product.price,
+        Product.mrp,
+        Product.status,
+        Product.seller_id,
+        Inventory.stock_qty,
+        _first_image_id().label('image_id'),
+    )
+
+
+def _line(row, item_id, product_id, quantity):
+    image_url = f"/api/files/{row.image_id}/download" if row.image_id else None
+    return {
+        "id": item_id,
+        "product_id": product_id,
+        "product_name": row.name,
+        "price": row.price,
+        "mrp": row.mrp,
+        "quantity": quantity,
+        "stock_qty": row.stock_qty or 0,
+        "status": row.status,
+        "image": image_url,
+        "image_url": image_url,
+        "seller_id": row.seller_id
+    }
+
+
+def load_cart(user_id):
+    """
+    Fetches the user's cart, its lines (with price, stock, first image and seller)
+    and the applied coupon in a single joined query.
+    Returns (cart_id, coupon_code, coupon, lines) or None if the user has no cart.
+    """
+    rows = db.session.query(
+        Cart.id.label('cart_id'),
+        Cart.coupon_code,
+        Coupon,
+        CartItem.id.label('item_id'),
+        CartItem.product_id,
+        CartItem.quantity,
+        *_line_columns()
+    ).select_from(Cart) \
+        .outerjoin(Coupon, db.and_(Coupon.code == Cart.coupon_code, Coupon.is_active == True)) \
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id) \
+        .outerjoin(Product, Product.id == CartItem.product_id) \
+        .outerjoin(Inventory, Inventory.product_id == Product.id) \
+        .filter(Cart.user_id == user_id) \
+        .order_by(CartItem.id) \
+        .all()
+
+    if not rows:
+        return None
+
+    first = rows[0]
+    lines = [_line(r, r.item_id, r.product_id, r.quantity) for r in rows if r.item_id is not None]
+    return first.cart_id, first.coupon_code, first.Coupon, lines
+
+
+def load_product_lines(quantities):
+    """
+    Builds cart lines for a {product_id: quantity} mapping (e.g. a guest cart)
+    with one query. Unknown products are skipped; line ids are the product ids.
+    """
+    if not quantities:
+        return []
+    rows = db.session.query(Product.id.label('product_id'), *_line_columns()) \
+        .outerjoin(Inventory, Inventory.product_id == Product.id) \
+        .filter(Product.id.in_(list(quantities))) \
+        .all()
+    by_id = {r.product_id: r for r in rows}
+    return [_line(by_id[pid], pid, pid, qty) for pid, qty in quantities.items() if pid in by_id]
+
+
+def coupon_discount(coupon, lines, total, now=None):
+    """
+    Returns the discount a coupon gives on the priced lines, or None if the
+    coupon cannot be applied (expired, exhausted or below minimum order value).
+    """
+    now = now or datetime.utcnow()
+    if not coupon:
+        return None
+    if coupon.expiry_date and coupon.expiry_date < now:
+        return None
+    if coupon.usage_limit and coupon.usage_limit > 0 and (coupon.used_count or 0) >= coupon.usage_limit:
+        return None
+    if coupon.min_order_value and coupon.min_order_value > 0 and total < coupon.min_order_value:
+        return None
+
+    discount = 0
+    if coupon.type == 'admin':
+        discount = (total * coupon.discount_percent) / 100
+    elif coupon.type == 'seller' and coupon.seller_id:
+        seller_total = sum(l['price'] * l['quantity'] for l in lines if l['seller_id'] == coupon.seller_id)
+        discount = (seller_total * coupon.discount_percent) / 100
+
+    if coupon.max_discount_amount and discount > coupon.max_discount_amount:
+        discount = coupon.max_discount_amount
+    return discount
+
+
+def price_lines(lines, coupon=None, coupon_code=None):
+    """
+    Computes line subtotals, cart total, coupon discount and final total in one pass.
+    `coupon_rejected` is set when a coupon code is attached but no longer applies.
+    """
+    total = 0
+    for line in lines:
+        line['subtotal'] = line['price'] * line['quantity']
+        total += line['subtotal']
+
+    discount = 0
+    coupon_data = None
+    coupon_id = None
+    rejected = False
+    if coupon_code:
+        applied = coupon_discount(coupon, lines, total)
+        if applied is None:
+            rejected = True
+        else:
+            discount = applied
+            coupon_id = coupon.id
+            coupon_data = {
+                "code": coupon.code,
+                "discount_percent": coupon.discount_percent,
+                "type": coupon.type
+            }
+
+    return {
+        "items": lines,
+        "total": total,
+        "discount": discount,
+        "coupon": coupon_data,
+        "coupon_id": coupon_id,
+        "coupon_rejected": rejected,
+        "final_total": max(0, total - discount)
+    }
+
+
+def price_cart(user_id):
+    """
+    Prices the user's cart. Shared by the cart view and checkout so both agree.
+    Returns None if the user has no cart.
+    """
+    loaded = load_cart(user_id)
+    if loaded is None:
+        return None
+    cart_id, coupon_code, coupon, lines = loaded
+    pricing = price_lines(lines, coupon, coupon_code)
+    pricing['cart_id'] = cart_id
+    return pricing
+
+
+def clear_rejected_coupon(pricing):
+    """Detaches a coupon that no longer applies from the cart."""
+    if pricing and pricing.get('coupon_rejected'):
+        Cart.query.filter_by(id=pricing['cart_id']).update({Cart.coupon_code: None})
+        db.session.commit()
+        pricing['coupon_rejected'] = False
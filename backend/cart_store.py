@@ -0,0 +1,111 @@
+from extensions import db, cache
+from models import Cart, CartItem
+from utils import get_or_create_cart
+from cart_service import price_cart, clear_rejected_coupon
+
+# Cached cart views are the primary read path. Every write goes to the
+# Cart/CartItem tables first and then refreshes the cached view (write-through).
+# Checkout always re-prices from the database, so the TTL only bounds how long
+# a cached view can lag behind coupon expiry or stock changes from other orders.
+CART_CACHE_TTL = 300
+
+EMPTY_CART = {"items": [], "total": 0, "discount": 0, "coupon": None, "final_total": 0}
+
+
+def _key(user_id):
+    return f"cart:v1:{user_id}"
+
+
+def _view(pricing):
+    if not pricing:
+        return dict(EMPTY_CART)
+    return {
+        "cart_id": pricing['cart_id'],
+        "items": pricing['items'],
+        "total": pricing['total'],
+        "discount": pricing['discount'],
+        "coupon": pricing['coupon'],
+        "final_total": pricing['final_total']
+    }
+
+
+def _cache_view(user_id, pricing):
+    view = _view(pricing)
+    cache.set_json(_key(user_id), view, ttl=CART_CACHE_TTL)
+    return view
+
+
+def refresh_cart(user_id):
+    """Re-prices the cart after a write, detaches a coupon that no longer applies, and caches the view."""
+    pricing = price_cart(user_id)
+    clear_rejected_coupon(pricing)
+    return _cache_view(user_id, pricing)
+
+
+def get_cart_view(user_id):
+    """
+    Returns the priced cart, from the cache when possible. Never writes a cart
+    row: a coupon that no longer applies is left out of the view (no discount)
+    and detached by the next cart write.
+    """
+    view = cache.get_json(_key(user_id))
+    if view is None:
+        view = _cache_view(user_id, price_cart(user_id))
+    return view
+
+
+def invalidate_cart(user_id):
+    cache.delete(_key(user_id))
+
+
+def carts_containing(product_ids):
+    """User ids whose carts hold any of the given products."""
+    if not product_ids:
+        return []
+    rows = db.session.query(Cart.user_id).join(CartItem, CartItem.cart_id == Cart.id) \
+        .filter(CartItem.product_id.in_(list(product_ids))).distinct().all()
+    return [r.user_id for r in rows]
+
+
+def invalidate_carts(user_ids):
+    cache.delete(*[_key(uid) for uid in user_ids])
+
+
+def invalidate_products(product_ids):
+    """Drops cached carts that show any of the given products (price, status or stock changed)."""
+    invalidate_carts(carts_containing(product_ids))
+
+
+def add_item(user_id, product_id, quantity):
+    cart = get_or_create_cart(user_id)
+    updated = CartItem.query.filter_by(cart_id=cart.id, product_id=product_id) \
+        .update({CartItem.quantity: CartItem.quantity + quantity}, synchronize_session=False)
+    if not updated:
+        db.session.add(CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity))
+    db.session.commit()
+    return refresh_cart(user_id)
+
+
+def update_item(user_id, item_id, quantity):
+    """Sets a line's quantity (removing it when <= 0). Returns None if the line is not in the user's cart."""
+    item = CartItem.query.join(Cart, Cart.id == CartItem.cart_id) \
+        .filter(CartItem.id == item_id, Cart.user_id == user_id).first()
+    if not item:
+        return None
+    if quantity is not None:
+        if quantity <= 0:
+            db.session.delete(item)
+        else:
+            item.quantity = quantity
+    db.session.commit()
+    return refresh_cart(user_id)
+
+
+def remove_item(user_id, item_id):
+    return update_item(user_id, item_id, 0)
+
+
+def set_coupon(user_id, code):
+    Cart.query.filter_by(user_id=user_id).update({Cart.coupon_code: code}, synchronize_session=False)
+    db.session.commit()
+    return refresh_cart(user_id)
@@ -0,0 +1,141 @@
+import math
+from extensions import db
+from models import Product, Inventory
+from cart_store import invalidate_products
+from utils import emit_update
+
+# Bulk stock/price/status edits for ERP syncs. Rows are matched to the
+# seller's products by product_id or sku, validated up front, and applied per
+# chunk with executemany UPDATEs (one statement per distinct column set), so a
+# batch of thousands of rows costs a handful of round trips. Cart caches are
+# invalidated and a single socket event is emitted once for the whole batch.
+BULK_EDIT_MAX_ROWS = 5000
+BULK_EDIT_CHUNK_SIZE = 500
+SELLER_STATUSES = ('inactive', 'pending')  # delist, or resubmit for review
+
+
+def _parse(row):
+    """Returns (match, changes, error). match is ('id', int) or ('sku', str)."""
+    if not isinstance(row, dict):
+        return None, None, "Row must be an object"
+    if row.get('product_id') not in (None, ''):
+        try:
+            match = ('id', int(row['product_id']))
+        except (TypeError, ValueError):
+            return None, None, "Invalid product_id"
+    elif row.get('sku'):
+        match = ('sku', str(row['sku']).strip())
+    else:
+        return None, None, "product_id or sku is required"
+
+    changes = {}
+    try:
+        if row.get('stock_qty') is not None:
+            changes['stock_qty'] = int(row['stock_qty'])
+        if row.get('price') is not None:
+            changes['price'] = float(row['price'])
+        if row.get('mrp') is not None:
+            changes['mrp'] = float(row['mrp'])
+    except (TypeError, ValueError, OverflowError):
+        return match, None, "stock_qty, price and mrp must be numbers"
+    if not all(math.isfinite(changes[k]) for k in ('price', 'mrp') if k in changes):
+        return match, None, "stock_qty, price and mrp must be numbers"
+    if changes.get('stock_qty', 0) < 0 or changes.get('price', 1) <= 0 or changes.get('mrp', 0) < 0:
+        return match, None, "price must be positive; stock_qty and mrp cannot be negative"
+    if row.get('status') is not None:
+        if row['status'] not in SELLER_STATUSES:
+            return match, None, f"status must be one of {', '.join(SELLER_STATUSES)}"
+        changes['status'] = row['status']
+    if not changes:
+        return match, None, "Nothing to update"
+    return match, changes, None
+
+
+def _resolve(seller_id, matches):
+    """Maps each ('id', x) / ('sku', x) match to a product id owned by the seller."""
+    ids = [v for k, v in matches if k == 'id']
+    skus = [v for k, v in matches if k == 'sku']
+    conditions = []
+    if ids:
+        conditions.append(Product.id.in_(ids))
+    if skus:
+        conditions.append(Product.sku.in_(skus))
+    resolved = {}
+    for pid, sku in db.session.query(Product.id, Product.sku) \
+            .filter(Product.seller_id == seller_id, db.or_(*conditions)).order_by(Product.id.desc()):
+        resolved[('id', pid)] = pid
+        if sku:
+            resolved[('sku', sku)] = pid
+    return resolved
+
+
+def _apply_chunk(seller_id, chunk):
+    """chunk is [(index, match, changes)]. Returns {index: product_id} for rows that were applied."""
+    resolved = _resolve(seller_id, [m for _, m, _ in chunk])
+    applied, product_rows, stock = {}, {}, {}
+    for index, match, changes in chunk:
+        pid = resolved.get(match)
+        if not pid:
+            continue
+        applied[index] = pid
+        fields = {k: v for k, v in changes.items() if k != 'stock_qty'}
+        if fields:
+            product_rows.setdefault(pid, {"id": pid}).update(fields)
+        if 'stock_qty' in changes:
+            stock[pid] = changes['stock_qty']
+
+    # executemany per distinct column set
+    by_columns = {}
+    for row in product_rows.values():
+        by_columns.setdefault(tuple(sorted(row)), []).append(row)
+    for rows in by_columns.values():
+        db.session.execute(db.update(Product), rows)
+
+    if stock:
+        existing = {pid for (pid,) in db.session.query(Inventory.product_id).filter(Inventory.product_id.in_(list(stock)))}
+        updates = [{"pid": pid, "qty": qty} for pid, qty in stock.items() if pid in existing]
+        if updates:
+            inventory = Inventory.__table__
+            db.session.execute(
+                db.update(inventory).where(inventory.c.product_id == db.bindparam('pid')).values(stock_qty=db.bindparam('qty')),
+                updates
+            )
+        inserts = [{"product_id": pid, "stock_qty": qty} for pid, qty in stock.items() if pid not in existing]
+        if inserts:
+            db.session.execute(db.insert(Inventory), inserts)
+    db.session.commit()
+    return applied
+
+
+def bulk_edit(seller_id, rows, chunk_size=BULK_EDIT_CHUNK_SIZE):
+    """
+    Applies rows of {product_id | sku, stock_qty?, price?, mrp?, status?}.
+    Returns per-row results in input order plus totals. Later rows for the same
+    product win. Each chunk commits on its own.
+    """
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        match, changes, error = _parse(row)
+        if error:
+            results[index] = {"index": index, "status": "error", "error": error}
+        else:
+            valid.append((index, match, changes))
+
+    changed = set()
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        applied = _apply_chunk(seller_id, chunk)
+        for index, match, _ in chunk:
+            pid = applied.get(index)
+            if pid:
+                results[index] = {"index": index, "product_id": pid, "status": "updated"}
+                changed.add(pid)
+            else:
+                results[index] = {"index": index, "status": "error", "error": f"Product not found: {match[1]}"}
+
+    if changed:
+        invalidate_products(list(changed))
+        emit_update('product', 'bulk_updated', {"seller_id": seller_id, "product_ids": sorted(changed)})
+    updated = sum(1 for r in results if r['status'] == 'updated')
+    return {"results": results, "updated": updated, "errors": len(rows) - updated}
@@ -0,0 +1,167 @@
+import os
+from datetime import datetime, timedelta
+from uuid import uuid4
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import File, UploadSession
+import file_store
+
+# Resumable uploads. A client opens a session with the file name and size,
+# then PUTs the bytes in chunks, each tagged with the offset it starts at. A
+# chunk is appended to the session's temp file and only then does `received`
+# advance, with a conditional UPDATE, so a dropped connection or a duplicate
+# request never corrupts the file: the client asks for the session, and
+# resumes from its offset. Completing checks the SHA-256 and hands the temp
+# file to file_store, which makes the usual File record.
+MAX_UPLOAD_SIZE = 2 * 1024 * 1024 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+SESSION_TTL = timedelta(hours=24)
+COMPLETE_TIMEOUT = timedelta(minutes=10)  # a 'completing' claim older than this is presumed dead
+READ_SIZE = 64 * 1024
+
+
+class OffsetMismatch(Exception):
+    """The chunk does not start where the upload currently ends."""
+
+    def __init__(self, offset):
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+def partial_dir(upload_folder):
+    path = os.path.join(upload_folder, 'partial')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def expire_sessions(upload_folder, now=None):
+    """Drops unfinished sessions idle for longer than SESSION_TTL. Returns how many were removed."""
+    cutoff = (now or datetime.utcnow()) - SESSION_TTL
+    stale = UploadSession.query.filter(UploadSession.status != 'completed', UploadSession.updated_at < cutoff).all()
+    for s in stale:
+        db.session.delete(s)
+    db.session.commit()
+    file_store.remove_files([s.temp_path for s in stale])
+    return len(stale)
+
+
+def create_session(owner_id, filename, size, upload_folder):
+    filename = secure_filename(filename or '')
+    if not filename:
+        raise ValueError("filename is required")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError("size must be a number of bytes")
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise ValueError(f"size must be between 1 and {MAX_UPLOAD_SIZE} bytes")
+    expire_sessions(upload_folder)
+
+    session_id = uuid4().hex
+    temp_path = os.path.join(partial_dir(upload_folder), session_id)
+    open(temp_path, 'wb').close()
+    session = UploadSession(id=session_id, owner_id=owner_id, filename=filename, total_size=size, temp_path=temp_path)
+    db.session.add(session)
+    db.session.commit()
+    return session
+
+
+def append_chunk(session, offset, stream):
+    """
+    Writes one chunk at `offset` and advances the session. Raises OffsetMismatch
+    if the offset is not where the upload ends (the client should resume from
+    the returned offset) and ValueError if the chunk is too large.
+    """
+    if session.status != 'uploading':
+        raise ValueError("Upload already completed")
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+    limit = min(MAX_CHUNK_SIZE, session.total_size - offset)
+
+    written = 0
+    with open(session.temp_path, 'r+b') as out:
+        out.seek(offset)
+        while True:
+            data = stream.read(READ_SIZE)
+            if not data:
+                break
+            written += len(data)
+            if written > limit:
+                raise ValueError(f"Chunk exceeds {limit} bytes")
+            out.write(data)
+    if not written:
+        raise ValueError("Empty chunk")
+
+    # Only one of two concurrent writers for the same offset moves the session forward
+    updated = db.session.execute(
+        db.update(UploadSession)
+        .where(UploadSession.id == session.id, UploadSession.received == offset)
+        .values(received=offset + written, updated_at=datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    db.session.refresh(session)
+    if not updated:
+        raise OffsetMismatch(session.received)
+    return session
+
+
+def _restart(session):
+    """Sends the client back to offset 0 with an empty temp file."""
+    open(session.temp_path, 'wb').close()
+    session.received = 0
+    session.status = 'uploading'
+    db.session.commit()
+
+
+def complete(session, sha256, upload_folder):
+    """
+    Verifies size and checksum and turns the temp file into a File. Returns the
+    File. A checksum mismatch resets the session to offset 0 so it can be re-sent.
+    A failed attempt, or one abandoned for COMPLETE_TIMEOUT, can be retried.
+    """
+    if session.status == 'completed':
+        return db.session.get(File, session.file_id)
+    if session.received != session.total_size:
+        raise OffsetMismatch(session.received)
+    if not sha256:
+        raise ValueError("sha256 is required")
+
+    # Claim the session so a retried request does not finalize it twice
+    now = datetime.utcnow()
+    claimable = db.or_(
+        UploadSession.status.in_(('uploading', 'failed')),
+        db.and_(UploadSession.status == 'completing', UploadSession.updated_at < now - COMPLETE_TIMEOUT)
+    )
+    claimed = db.session.execute(
+        db.update(UploadSession).where(UploadSession.id == session.id, claimable)
+        .values(status='completing', updated_at=now)
+    ).rowcount
+    db.session.commit()
+    db.session.refresh(session)
+    if not claimed:
+        if session.status == 'completed':
+            return db.session.get(File, session.file_id)
+        raise ValueError("Upload is already being completed")
+    if not os.path.exists(session.temp_path):
+        # An earlier attempt moved or removed it before failing
+        _restart(session)
+        raise ValueError("Upload data was lost; upload the file again")
+
+    with open(session.temp_path, 'r+b') as f:
+        f.truncate(session.total_size)
+    actual = file_store.hash_file(session.temp_path)
+    if actual != sha256.lower():
+        _restart(session)
+        raise ValueError("Checksum mismatch; upload the file again")
+
+    try:
+        frec, _ = file_store.store_path(session.temp_path, session.owner_id, upload_folder, session.filename, sha256=actual)
+    except Exception:
+        db.session.rollback()
+        session.status = 'failed'
+        db.session.commit()
+        raise
+    session.status = 'completed'
+    session.file_id = frec.id
+    db.session.commit()
+    return frec
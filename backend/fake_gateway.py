@@ -0,0 +1,196 @@
+"""
+In-process stand-ins for the Razorpay and Stripe clients, used by the load-test
+harness and the test suite so checkout and payment flows run offline.
+"""
+import hashlib
+import hmac
+import itertools
+import json
+import threading
+import time
+import uuid
+
+FAKE_RAZORPAY_SECRET = 'fake_rzp_secret'
+FAKE_RAZORPAY_WEBHOOK_SECRET = 'fake_rzp_webhook_secret'
+
+
+def sign_payment(order_id, payment_id, secret=FAKE_RAZORPAY_SECRET):
+    """Signature Razorpay's checkout returns for a successful payment."""
+    return hmac.new(secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def razorpay_event(event, order_id, payment_id, amount, refund_id=None, error_description=None):
+    """Webhook body in Razorpay's shape; amount is in rupees."""
+    payment = {"id": payment_id, "entity": "payment", "order_id": order_id, "amount": int(round(amount * 100)),
+               "currency": "INR", "status": event.split('.')[-1]}
+    if error_description:
+        payment["error_description"] = error_description
+    payload = {"payment": {"entity": payment}}
+    if refund_id:
+        payload["refund"] = {"entity": {"id": refund_id, "entity": "refund", "payment_id": payment_id,
+                                        "amount": int(round(amount * 100))}}
+    return {"entity": "event", "event": event, "contains": list(payload), "payload": payload,
+            "created_at": int(time.time())}
+
+
+def razorpay_webhook(event, secret=FAKE_RAZORPAY_WEBHOOK_SECRET, event_id=None):
+    """Returns (body, headers) as Razorpay would POST them to the webhook URL."""
+    body = json.dumps(event).encode()
+    return body, {
+        "Content-Type": "application/json",
+        "X-Razorpay-Signature": hmac.new(secret.encode(), body, hashlib.sha256).hexdigest(),
+        "X-Razorpay-Event-Id": event_id or f"evt_fake_{uuid.uuid4().hex[:14]}",
+    }
+
+
+class _FakeRazorpayOrders:
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def create(self, data):
+        self._gateway._delay()
+        order_id = f"order_fake_{next(self._gateway._ids)}"
+        order = {"id": order_id, "amount": data.get("amount"), "currency": data.get("currency", "INR"),
+                 "receipt": data.get("receipt"), "status": "created"}
+        with self._gateway._lock:
+            self._gateway.orders[order_id] = order
+        return order
+
+
+class _FakeRazorpayPayments:
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def all(self, params=None):
+        """Newest first, filtered by from/to (unix seconds) and paged by count/skip like the real API."""
+        params = params or {}
+        self._gateway._delay()
+        self._gateway.list_calls += 1
+        lo, hi = params.get('from', 0), params.get('to', float('inf'))
+        with self._gateway._lock:
+            items = [p for p in self._gateway.payments if lo <= p['created_at'] <= hi]
+        items.sort(key=lambda p: p['created_at'], reverse=True)
+        skip, count = int(params.get('skip', 0)), min(int(params.get('count', 10)), 100)
+        page = items[skip:skip + count]
+        return {"entity": "collection", "count": len(page), "items": page}
+
+
+class _FakeRazorpayUtility:
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def verify_payment_signature(self, params):
+        expected = sign_payment(params.get("razorpay_order_id"), params.get("razorpay_payment_id"), self._gateway.secret)
+        if not hmac.compare_digest(expected, params.get("razorpay_signature") or ''):
+            raise ValueError("Razorpay Signature Verification Failed")
+        return True
+
+
+class FakeRazorpayClient:
+    """Implements the parts of razorpay.Client used by checkout (order.create, utility)."""
+
+    def __init__(self, secret=FAKE_RAZORPAY_SECRET, latency_ms=0):
+        self.secret = secret
+        self.latency_ms = latency_ms
+        self.orders = {}
+        self.payments = []
+        self.list_calls = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.order = _FakeRazorpayOrders(self)
+        self.payment = _FakeRazorpayPayments(self)
+        self.utility = _FakeRazorpayUtility(self)
+
+    def add_payment(self, order_id, amount, status='captured', error_description=None, created_at=None):
+        """Records a payment attempt against an order (amount in rupees) for payment.all to return."""
+        payment = {"id": f"pay_fake_{next(self._ids)}", "entity": "payment", "order_id": order_id,
+                   "amount": int(round(amount * 100)), "currency": "INR", "status": status,
+                   "error_description": error_description, "created_at": int(created_at or time.time())}
+        with self._lock:
+            self.payments.append(payment)
+        return payment
+
+    def _delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+
+class _FakeStripeSession:
+    def __init__(self, id, url, amount_total=None, created=None):
+        self.id = id
+        self.url = url
+        self.amount_total = amount_total
+        self.created = int(created or time.time())
+        self.status = 'open'
+        self.payment_status = 'unpaid'
+        self.payment_intent = None
+
+
+class _FakeStripeList:
+    def __init__(self, data, has_more):
+        self.data = data
+        self.has_more = has_more
+
+
+class _FakeStripeSessions:
+    def __init__(self, stripe):
+        self._stripe = stripe
+
+    def create(self, **kwargs):
+        self._stripe._delay()
+        session_id = f"cs_fake_{next(self._stripe._ids)}"
+        amount = sum(li["price_data"]["unit_amount"] * li.get("quantity", 1) for li in kwargs.get("line_items", []))
+        session = _FakeStripeSession(session_id, f"https://checkout.stripe.test/{session_id}", amount)
+        self._stripe.sessions[session_id] = session
+        return session
+
+    def list(self, created=None, limit=10, starting_after=None, **kwargs):
+        """Newest first with created[gte]/[lte] filters and starting_after cursors, like stripe's list API."""
+        self._stripe._delay()
+        self._stripe.list_calls += 1
+        created = created or {}
+        sessions = [s for s in self._stripe.sessions.values()
+                    if created.get('gte', 0) <= s.created <= created.get('lte', float('inf'))]
+        sessions.sort(key=lambda s: (s.created, s.id), reverse=True)
+        if starting_after:
+            ids = [s.id for s in sessions]
+            sessions = sessions[ids.index(starting_after) + 1:] if starting_after in ids else []
+        return _FakeStripeList(sessions[:limit], len(sessions) > limit)
+
+
+class _FakeStripeCheckout:
+    def __init__(self, stripe):
+        self.Session = _FakeStripeSessions(stripe)
+
+
+class FakeStripe:
+    """Module-shaped stand-in for the `stripe` package (api_key, checkout.Session.create)."""
+
+    def __init__(self, api_key='sk_test_fake', latency_ms=0):
+        self.api_key = api_key
+        self.latency_ms = latency_ms
+        self.sessions = {}
+        self.list_calls = 0
+        self._ids = itertools.count(1)
+        self.checkout = _FakeStripeCheckout(self)
+
+    def complete_session(self, session_id, paid=True):
+        """Marks a checkout session paid (complete) or expired, as the hosted page would."""
+        session = self.sessions[session_id]
+        session.status = 'complete' if paid else 'expired'
+        session.payment_status = 'paid' if paid else 'unpaid'
+        session.payment_intent = f"pi_fake_{next(self._ids)}" if paid else None
+        return session
+
+    def _delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+
+def install_fake_gateways(latency_ms=0):
+    """Points payment_gateway at fake clients. Returns (razorpay_client, stripe)."""
+    import payment_gateway
+    rp = FakeRazorpayClient(latency_ms=latency_ms)
+    st = FakeStripe(latency_ms=latency_ms)
+    payment_gateway.registry.install(razorpay=rp, stripe=st)
+    return rp, st
@@ -0,0 +1,66 @@
+import mimetypes
+import os
+from flask import current_app, request, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+# File responses. Content-addressed files (blobs and their variants) get their
+# hash as a strong ETag and a year-long immutable Cache-Control; other files
+# get Werkzeug's ETag and a short max-age. Range requests are answered by
+# send_file. With FILE_OFFLOAD set to 'x-accel' (nginx) or 'x-sendfile'
+# (Apache/lighttpd) Python only checks the request and sets headers; the
+# front proxy sends the bytes and handles Range itself.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DEFAULT_MAX_AGE = 3600
+REVALIDATE_MAX_AGE = 60
+
+
+def _offload(path, location, mimetype, etag, download_name):
+    mode = current_app.config.get('FILE_OFFLOAD')
+    response = current_app.response_class(mimetype=mimetype or 'application/octet-stream')
+    if mode == 'x-accel':
+        root = current_app.config['FILE_OFFLOAD_ROOTS'][location]
+        prefix = current_app.config.get('X_ACCEL_PREFIX', '/_protected').rstrip('/')
+        rel = os.path.relpath(path, root).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{location}/{rel}"
+    else:
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    if download_name:
+        response.headers['Content-Disposition'] = f'inline; filename="{download_name}"'
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+def serve(path, location='uploads', etag=None, immutable=False, max_age=None, mimetype=None, download_name=None):
+    """
+    Sends one file. `etag` is a content hash to use as a strong validator;
+    `immutable` marks the URL as never changing content. `location` names the
+    FILE_OFFLOAD_ROOTS entry the path lives under (used for X-Accel-Redirect).
+    """
+    if not os.path.isfile(path):
+        raise NotFound()
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(download_name or path)[0]
+
+    if max_age is None:
+        max_age = IMMUTABLE_MAX_AGE if immutable else DEFAULT_MAX_AGE
+    if current_app.config.get('FILE_OFFLOAD') in ('x-accel', 'x-sendfile'):
+        response = _offload(path, location, mimetype, etag, download_name)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.make_conditional(request)
+    else:
+        response = send_file(path, mimetype=mimetype, download_name=download_name, conditional=True,
+                             etag=etag or True, max_age=max_age)
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def serve_from(root, filename, location, **kwargs):
+    """serve() for a name relative to `root`, rejecting paths that escape it."""
+    path = safe_join(root, filename)
+    if path is None:
+        raise NotFound()
+    return serve(path, location=location, **kwargs)
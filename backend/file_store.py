@@ -0,0 +1,238 @@
+import hashlib
+import io
+import os
+from uuid import uuid4
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import File, FileBlob
+
+# Content-addressed upload storage. Uploads are streamed to a temp file while
+# their SHA-256 is computed, then moved to blobs/<ab>/<cd>/<sha256><ext> unless
+# that blob already exists, in which case the temp copy is dropped. FileBlob
+# keeps one row per blob with a reference count; File rows keep their own
+# name and point at the shared blob, so identical uploads cost no extra disk.
+BLOB_DIR = 'blobs'
+CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(sha256, ext=''):
+    """Path of a blob relative to UPLOAD_FOLDER."""
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], f"{sha256}{ext.lower()}")
+
+
+def sha_from_name(name):
+    """The hash of a blob path (as stored in Category.image), or None for legacy names."""
+    if not name or not name.startswith(BLOB_DIR + os.sep) and not name.startswith(BLOB_DIR + '/'):
+        return None
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def _place(tmp_path, sha256, upload_folder, filename):
+    """Moves a finished temp file into the blob store unless the content is already there. Returns (name, created)."""
+    existing = db.session.get(FileBlob, sha256)
+    name = existing.path if existing else blob_name(sha256, os.path.splitext(filename)[1])
+    path = os.path.join(upload_folder, name)
+    if os.path.exists(path):
+        return name, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return name, True
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_blob(stream, upload_folder, filename=''):
+    """
+    Streams `stream` into the blob store. Returns (sha256, relative path, size, created);
+    created is False when identical content was already on disk.
+    """
+    tmp_dir = os.path.join(upload_folder, BLOB_DIR, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        name, created = _place(tmp_path, sha256, upload_folder, filename)
+        return sha256, name, size, created
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def acquire(sha256, name, size, count=1):
+    """Adds `count` references to a blob, creating its row on first use. Part of the caller's transaction."""
+    blob = db.session.query(FileBlob).filter_by(sha256=sha256).with_for_update().first()
+    if blob is None:
+        try:
+            with db.session.begin_nested():
+                blob = FileBlob(sha256=sha256, path=name, size=size, ref_count=count)
+                db.session.add(blob)
+            return blob
+        except IntegrityError:
+            # Another upload created it first
+            blob = db.session.query(FileBlob).filter_by(sha256=sha256).with_for_update().one()
+    blob.ref_count += count
+    return blob
+
+
+def release(sha256s, upload_folder):
+    """
+    Drops one reference per hash. Blobs that reach zero are deleted from the
+    table; their paths are returned so the caller can remove them after commit.
+    """
+    freed = []
+    for sha256 in sha256s:
+        blob = db.session.query(FileBlob).filter_by(sha256=sha256).with_for_update().first() if sha256 else None
+        if not blob:
+            continue
+        blob.ref_count -= 1
+        if blob.ref_count <= 0:
+            freed.append(os.path.join(upload_folder, blob.path))
+            db.session.delete(blob)
+    return freed
+
+
+def discard(paths):
+    """Removes blob files that ended up with no FileBlob row, e.g. after a rollback."""
+    for path in paths:
+        sha256 = os.path.splitext(os.path.basename(path))[0]
+        if db.session.get(FileBlob, sha256) is None and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def save_blob(upload, upload_folder):
+    """
+    Stores an uploaded FileStorage (or bytes) and takes a reference to it.
+    Returns (blob, created path or None) — the path is set only if new bytes hit disk.
+    """
+    filename = secure_filename(getattr(upload, 'filename', '') or '')
+    stream = io.BytesIO(upload) if isinstance(upload, bytes) else getattr(upload, 'stream', upload)
+    sha256, name, size, created = write_blob(stream, upload_folder, filename)
+    blob = acquire(sha256, name, size)
+    return blob, os.path.join(upload_folder, name) if created else None
+
+
+def _add_file(blob, owner_id, upload_folder, filename, status):
+    frec = File(
+        owner_id=owner_id,
+        filename=filename,
+        stored_filename=f"{uuid4().hex}_{filename}",
+        filepath=os.path.join(upload_folder, blob.path),
+        size=blob.size,
+        sha256=blob.sha256,
+        status=status
+    )
+    db.session.add(frec)
+    db.session.flush()
+    return frec
+
+
+def store_file(upload, owner_id, upload_folder, filename=None, status='active'):
+    """Stores an upload and adds a File row for it (flushed, not committed). Returns (File, created path or None)."""
+    filename = secure_filename(filename or upload.filename)
+    blob, created = save_blob(upload, upload_folder)
+    return _add_file(blob, owner_id, upload_folder, filename, status), created
+
+
+def store_path(path, owner_id, upload_folder, filename, sha256=None, status='active'):
+    """
+    Like store_file for a file already on disk (e.g. an assembled chunked upload).
+    The file is moved into the blob store, or removed if the content is already stored.
+    """
+    sha256 = sha256 or hash_file(path)
+    size = os.path.getsize(path)
+    filename = secure_filename(filename)
+    try:
+        name, created = _place(path, sha256, upload_folder, filename)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    blob = acquire(sha256, name, size)
+    return _add_file(blob, owner_id, upload_folder, filename, status), os.path.join(upload_folder, name) if created else None
+
+
+def owned_files(file_ids, owner_id):
+    """
+    Files from earlier uploads (e.g. finished chunked uploads) that belong to
+    owner_id, in the order given. Accepts a list or a comma-separated string;
+    ids that are unknown or owned by someone else are skipped.
+    """
+    if isinstance(file_ids, str):
+        file_ids = file_ids.split(',')
+    ids = []
+    for value in file_ids or []:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    if not ids:
+        return []
+    found = {f.id: f for f in File.query.filter(File.id.in_(ids), File.owner_id == int(owner_id))}
+    return [found[i] for i in dict.fromkeys(ids) if i in found]
+
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def migrate_existing(upload_folder, batch_size=200):
+    """
+    Moves pre-dedup File rows into the blob store, one batch per transaction.
+    Duplicate copies are removed once their row points at the shared blob.
+    Returns (files moved, bytes freed).
+    """
+    moved = freed = last_id = 0
+    while True:
+        batch = File.query.filter(File.sha256.is_(None), File.id > last_id).order_by(File.id).limit(batch_size).all()
+        if not batch:
+            return moved, freed
+        stale = []
+        for f in batch:
+            last_id = f.id
+            if not os.path.exists(f.filepath):
+                continue  # Missing on disk; left for the orphan sweep
+            with open(f.filepath, 'rb') as stream:
+                sha256, name, size, created = write_blob(stream, upload_folder, f.filename)
+            acquire(sha256, name, size)
+            db.session.flush()
+            path = os.path.join(upload_folder, name)
+            if os.path.abspath(f.filepath) != os.path.abspath(path):
+                stale.append(f.filepath)
+                if not created:
+                    freed += size
+            f.filepath, f.sha256 = path, sha256
+            moved += 1
+        db.session.commit()
+        remove_files(stale)
+
+
+if __name__ == '__main__':
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        moved, freed = migrate_existing(app.config['UPLOAD_FOLDER'])
+        print(f"Moved {moved} files into the blob store, freed {freed} bytes")
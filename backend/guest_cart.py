@@ -0,0 +1,126 @@
+from flask import current_app, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from extensions import db
+from models import Cart, CartItem, Product, Coupon
+from cart_service import load_product_lines, price_lines
+import cart_store
+
+# Guest carts live entirely client-side in a signed token (cookie, header or
+# request body), so browsing never writes to the database. The token holds
+# only product ids, quantities and an optional coupon code; prices are always
+# looked up fresh.
+GUEST_CART_COOKIE = 'guest_cart'
+GUEST_CART_HEADER = 'X-Guest-Cart'
+GUEST_CART_MAX_AGE = 30 * 24 * 3600
+GUEST_CART_MAX_LINES = 50
+GUEST_CART_MAX_QTY = 99
+
+
+def _serializer():
+    secret = current_app.config.get('SECRET_KEY') or current_app.config['JWT_SECRET_KEY']
+    return URLSafeTimedSerializer(secret, salt='guest-cart')
+
+
+def empty_guest_cart():
+    return {"items": {}, "coupon": None}
+
+
+def load_guest_cart(token):
+    """Decodes a guest cart token. Tampered, expired or malformed tokens yield an empty cart."""
+    if not token:
+        return empty_guest_cart()
+    try:
+        data = _serializer().loads(token, max_age=GUEST_CART_MAX_AGE)
+        items = {}
+        for pid, qty in data.get('i', [])[:GUEST_CART_MAX_LINES]:
+            pid, qty = int(pid), int(qty)
+            if qty > 0:
+                items[pid] = min(qty, GUEST_CART_MAX_QTY)
+        return {"items": items, "coupon": data.get('c')}
+    except (BadSignature, ValueError, TypeError, AttributeError):
+        return empty_guest_cart()
+
+
+def dump_guest_cart(cart):
+    payload = {"i": [[pid, qty] for pid, qty in cart['items'].items() if qty > 0]}
+    if cart.get('coupon'):
+        payload['c'] = cart['coupon']
+    return _serializer().dumps(payload)
+
+
+def request_guest_token():
+    """Guest cart token from the JSON body, the X-Guest-Cart header or the cookie."""
+    data = request.get_json(silent=True) or {}
+    return data.get('guest_cart') or request.headers.get(GUEST_CART_HEADER) or request.cookies.get(GUEST_CART_COOKIE)
+
+
+def set_quantity(cart, product_id, quantity):
+    if quantity <= 0:
+        cart['items'].pop(product_id, None)
+    elif product_id in cart['items'] or len(cart['items']) < GUEST_CART_MAX_LINES:
+        cart['items'][product_id] = min(quantity, GUEST_CART_MAX_QTY)
+    return cart
+
+
+def price_guest_cart(cart):
+    lines = load_product_lines(cart['items'])
+    coupon = None
+    if cart.get('coupon'):
+        coupon = Coupon.query.filter_by(code=cart['coupon'], is_active=True).first()
+    pricing = price_lines(lines, coupon, cart.get('coupon'))
+    if pricing['coupon_rejected']:
+        cart['coupon'] = None
+    return {
+        "items": pricing['items'],
+        "total": pricing['total'],
+        "discount": pricing['discount'],
+        "coupon": pricing['coupon'],
+        "final_total": pricing['final_total']
+    }
+
+
+def set_guest_cookie(response, token):
+    response.set_cookie(GUEST_CART_COOKIE, token, max_age=GUEST_CART_MAX_AGE, httponly=True, samesite='Lax')
+    return response
+
+
+def merge_guest_cart(user_id, token):
+    """
+    Merges a guest cart into the user's Cart in one transaction: one query for the
+    products, one for the existing lines, then bulk updates/inserts.
+    Returns the number of merged lines.
+    """
+    guest = load_guest_cart(token)
+    if not guest['items']:
+        return 0
+
+    approved = {
+        r.id for r in db.session.query(Product.id)
+        .filter(Product.id.in_(list(guest['items'])), Product.status == 'approved').all()
+    }
+    wanted = {pid: qty for pid, qty in guest['items'].items() if pid in approved}
+    if not wanted:
+        return 0
+
+    cart = Cart.query.filter_by(user_id=user_id).first()
+    if not cart:
+        cart = Cart(user_id=user_id)
+        db.session.add(cart)
+        db.session.flush()
+    existing = {
+        ci.product_id: ci for ci in
+        CartItem.query.filter(CartItem.cart_id == cart.id, CartItem.product_id.in_(list(wanted))).all()
+    }
+    new_rows = []
+    for pid, qty in wanted.items():
+        if pid in existing:
+            existing[pid].quantity = (existing[pid].quantity or 0) + qty
+        else:
+            new_rows.append({"cart_id": cart.id, "product_id": pid, "quantity": qty})
+    if new_rows:
+        db.session.execute(db.insert(CartItem), new_rows)
+    if guest.get('coupon') and not cart.coupon_code:
+        cart.coupon_code = guest['coupon']
+    db.session.commit()
+    cart_store.refresh_cart(user_id)
+    return len(wanted)
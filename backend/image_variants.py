@@ -0,0 +1,144 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from extensions import db
+from models import File, FileVariant
+
+# Resized copies of uploaded images, following IMAGE_GUIDELINES.md. After an
+# upload commits, queue_variants() hands the file ids to a small thread pool
+# that renders every size in WebP and JPEG with metadata stripped and records
+# them as FileVariant rows. Until a variant exists the original is served.
+IMAGE_SIZES = {'thumb': 200, 'main': 800, 'zoom': 1600}
+IMAGE_FORMATS = {
+    'webp': ('WEBP', '.webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+VARIANT_WORKERS = 2
+MAX_SOURCE_PIXELS = 50_000_000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def is_image(filename):
+    return bool(filename) and filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def variants_dir(upload_folder):
+    path = os.path.join(upload_folder, 'variants')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _flatten(img):
+    """RGB on white for JPEG; WebP keeps alpha."""
+    from PIL import Image
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        rgba = img.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return img.convert('RGB')
+
+
+def render(source_path, target_dir, stem):
+    """Writes every size/format of one image. Returns a list of variant dicts."""
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+    rendered = []
+    with Image.open(source_path) as img:
+        img.seek(0)
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        base = {'webp': img.convert('RGBA' if has_alpha else 'RGB'), 'jpeg': _flatten(img)}
+        for size, edge in IMAGE_SIZES.items():
+            for fmt, (pil_format, ext, _, options) in IMAGE_FORMATS.items():
+                copy = base[fmt].copy()
+                copy.thumbnail((edge, edge), Image.LANCZOS)  # never upscales
+                name = f"{stem}_{size}{ext}"
+                path = os.path.join(target_dir, name)
+                # No exif/icc arguments, so metadata from the original is dropped
+                copy.save(path, pil_format, **options)
+                rendered.append({
+                    "size": size, "format": fmt, "stored_filename": name, "filepath": path,
+                    "width": copy.width, "height": copy.height, "bytes": os.path.getsize(path)
+                })
+    return rendered
+
+
+def _shared_variants(f):
+    """Variant rows already rendered for another File with the same content, if all are on disk."""
+    columns = ('size', 'format', 'stored_filename', 'filepath', 'width', 'height', 'bytes')
+    rows = FileVariant.query.join(File, File.id == FileVariant.file_id) \
+        .filter(File.sha256 == f.sha256, File.id != f.id).order_by(FileVariant.file_id).all()
+    found = {}
+    for v in rows:
+        found.setdefault((v.size, v.format), {c: getattr(v, c) for c in columns})
+    if len(found) < len(IMAGE_SIZES) * len(IMAGE_FORMATS) or not all(os.path.exists(v['filepath']) for v in found.values()):
+        return None
+    return list(found.values())
+
+
+def generate_variants(file_id, upload_folder):
+    """(Re)builds the variants of one File. Returns the number written (0 for non-images)."""
+    f = db.session.get(File, file_id)
+    if not f or not is_image(f.filename) or not os.path.exists(f.filepath):
+        return 0
+    # Deduplicated uploads share one blob, so they can share its variants too
+    rendered = _shared_variants(f) if f.sha256 else None
+    if not rendered:
+        stem = f.sha256 or os.path.splitext(f.stored_filename)[0]
+        rendered = render(f.filepath, variants_dir(upload_folder), stem)
+    FileVariant.query.filter_by(file_id=file_id).delete(synchronize_session=False)
+    if rendered:
+        db.session.execute(db.insert(FileVariant), [dict(v, file_id=file_id) for v in rendered])
+    db.session.commit()
+    return len(rendered)
+
+
+def _run(app, file_ids):
+    with app.app_context():
+        try:
+            for file_id in file_ids:
+                try:
+                    generate_variants(file_id, app.config['UPLOAD_FOLDER'])
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Image variants for file {file_id} failed: {e}")
+        finally:
+            db.session.remove()
+
+
+def queue_variants(file_ids):
+    """Renders variants in the background after the upload commits. Tests call generate_variants directly."""
+    from flask import current_app
+    app = current_app._get_current_object()
+    file_ids = [i for i in file_ids if i]
+    if not file_ids or app.testing:
+        return
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=VARIANT_WORKERS, thread_name_prefix='image-variants')
+    for file_id in file_ids:
+        _pool.submit(_run, app, [file_id])
+
+
+def pick_variant(variants, size, accept):
+    """The variant for `size`, WebP when the client accepts it, else JPEG."""
+    by_format = {v.format: v for v in variants if v.size == size}
+    if 'webp' in by_format and 'image/webp' in (accept or ''):
+        return by_format['webp']
+    return by_format.get('jpeg') or by_format.get('webp')
+
+
+if __name__ == '__main__':
+    # Backfill variants for images uploaded before the pipeline existed.
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        done = {r[0] for r in db.session.query(FileVariant.file_id).distinct()}
+        todo = [f.id for f in File.query.with_entities(File.id, File.filename) if is_image(f.filename) and f.id not in done]
+        written = sum(generate_variants(file_id, app.config['UPLOAD_FOLDER']) for file_id in todo)
+        print(f"Wrote {written} variants for {len(todo)} files")
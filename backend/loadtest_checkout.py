@@ -0,0 +1,328 @@
+"""
+Concurrent checkout load test.
+
+Seeds users, products and carts into a scratch database, serves the app from a
+threaded WSGI server with fake Razorpay/Stripe clients, and drives concurrent
+POST /api/orders (+ /api/payments/razorpay/verify) flows against it. Reports
+throughput, latency percentiles, lock waits, deadlocks and oversold units, and
+exits non-zero when a gate is exceeded so it can guard checkout changes.
+
+    python loadtest_checkout.py --users 200 --concurrency 16
+    python loadtest_checkout.py --db-url postgresql://localhost/jbit_loadtest --reset
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import requests
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+# Statements that take row/table write locks. Their duration is our lock-wait proxy:
+# on Postgres it includes time blocked on SELECT ... FOR UPDATE, on SQLite the
+# busy-wait for the database write lock.
+LOCKING_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+class DbStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lock_waits = []
+        self.deadlocks = 0
+        self.lock_timeouts = 0
+
+    def instrument(self, engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('loadtest_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['loadtest_started'].pop()
+            head = statement.lstrip()[:6].upper()
+            if head.startswith(LOCKING_PREFIXES) or 'FOR UPDATE' in statement.upper():
+                with self.lock:
+                    self.lock_waits.append(time.perf_counter() - started)
+
+        @event.listens_for(engine, 'handle_error')
+        def on_error(context):
+            if context.connection is not None:
+                stack = context.connection.info.get('loadtest_started')
+                if stack:
+                    stack.pop()
+            msg = str(context.original_exception).lower()
+            with self.lock:
+                if 'deadlock' in msg:
+                    self.deadlocks += 1
+                elif 'locked' in msg or 'lock timeout' in msg or 'could not obtain lock' in msg:
+                    self.lock_timeouts += 1
+
+
+def seed(db, models, opts):
+    """Bulk-inserts a seller, products with limited stock, and users with full carts."""
+    rng = random.Random(opts.seed)
+    User, Category, Product, Inventory, Cart, CartItem = models
+
+    seller = User(name='Load Seller', email='seller@loadtest.local', role='seller', is_approved=True, is_active=True)
+    seller.set_password('loadtest')
+    cat = Category(name='Load Test', slug='load-test', is_approved=True)
+    db.session.add_all([seller, cat])
+    db.session.flush()
+
+    product_ids = []
+    for idx in range(opts.products):
+        p = Product(seller_id=seller.id, category_id=cat.id, name=f'Load Product {idx}', price=100 + idx, mrp=200, status='approved')
+        db.session.add(p)
+        db.session.flush()
+        product_ids.append(p.id)
+    db.session.execute(db.insert(Inventory), [{"product_id": pid, "stock_qty": opts.stock} for pid in product_ids])
+
+    password_hash = seller.password_hash
+    db.session.execute(db.insert(User), [
+        {"name": f"Buyer {i}", "email": f"buyer{i}@loadtest.local", "password_hash": password_hash, "role": 'user', "is_active": True}
+        for i in range(opts.users)
+    ])
+    user_ids = [r.id for r in db.session.query(User.id).filter(User.role == 'user').order_by(User.id)]
+    db.session.execute(db.insert(Cart), [{"user_id": uid} for uid in user_ids])
+    carts = {r.user_id: r.id for r in db.session.query(Cart.id, Cart.user_id)}
+
+    lines = []
+    for uid in user_ids:
+        for pid in rng.sample(product_ids, min(opts.lines_per_cart, len(product_ids))):
+            lines.append({"cart_id": carts[uid], "product_id": pid, "quantity": rng.randint(1, 2)})
+    db.session.execute(db.insert(CartItem), lines)
+    db.session.commit()
+    return user_ids, {pid: opts.stock for pid in product_ids}
+
+
+def check_oversell(db, models, initial_stock):
+    """Compares stock movements with order lines that still hold stock."""
+    Order, OrderItem, Inventory = models
+    sold = dict(
+        db.session.query(OrderItem.product_id, db.func.sum(OrderItem.quantity))
+        .join(Order, Order.id == OrderItem.order_id)
+        .filter(Order.status.notin_(['cancelled', 'payment_failed']))
+        .group_by(OrderItem.product_id).all()
+    )
+    stock = dict(db.session.query(Inventory.product_id, Inventory.stock_qty).all())
+    oversold_units = 0
+    inconsistent = 0
+    negative = 0
+    for pid, initial in initial_stock.items():
+        units = int(sold.get(pid) or 0)
+        oversold_units += max(0, units - initial)
+        if stock.get(pid, 0) < 0:
+            negative += 1
+        if stock.get(pid, 0) != initial - units:
+            inconsistent += 1
+    return {"oversold_units": oversold_units, "negative_stock_products": negative, "inconsistent_products": inconsistent}
+
+
+def pg_deadlocks(db):
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    return db.session.execute(db.text("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")).scalar()
+
+
+def run_load_test(opts):
+    from app import create_app
+    from extensions import db
+    from models import User, Category, Product, Inventory, Cart, CartItem, Order, OrderItem
+    from fake_gateway import install_fake_gateways, sign_payment
+    from flask_jwt_extended import create_access_token
+
+    tmpdir = None
+    db_url = opts.db_url
+    if not db_url:
+        tmpdir = tempfile.mkdtemp(prefix='jbit-loadtest-')
+        db_url = f"sqlite:///{os.path.join(tmpdir, 'loadtest.db')}"
+
+    # No external services: email/push helpers skip sending when unconfigured
+    os.environ.update({"EMAIL_HOST": "", "NOTIFICATION_ENDPOINT": ""})
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': db_url})
+    if not opts.verbose:
+        app.logger.setLevel(logging.CRITICAL)
+        for name in ('werkzeug', 'services'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+    install_fake_gateways(latency_ms=opts.gateway_latency_ms)
+    stats = DbStats()
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if _has_tables(db) and User.query.first() and not opts.reset:
+            raise SystemExit("Target database already has data; pass --reset to drop and reseed it.")
+        db.drop_all()
+        db.create_all()
+        user_ids, initial_stock = seed(db, (User, Category, Product, Inventory, Cart, CartItem), opts)
+        tokens = {uid: create_access_token(identity=str(uid), additional_claims={"role": "user"}) for uid in user_ids}
+        deadlocks_before = pg_deadlocks(db)
+        stats.instrument(db.engine)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    order_latencies, verify_latencies = [], []
+    outcomes = {"ok": 0, "out_of_stock": 0, "errors": 0, "verified": 0, "verify_failed": 0}
+    errors = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def checkout(uid):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        headers = {'Authorization': f'Bearer {tokens[uid]}'}
+        started = time.perf_counter()
+        res = local.session.post(f"{base_url}/api/orders", json={"payment_method": opts.gateway}, headers=headers)
+        elapsed = time.perf_counter() - started
+        body = res.json() if res.headers.get('Content-Type', '').startswith('application/json') else {}
+        with lock:
+            order_latencies.append(elapsed)
+            if res.status_code == 200:
+                outcomes["ok"] += 1
+            elif 'Insufficient stock' in res.text:
+                outcomes["out_of_stock"] += 1
+                return
+            else:
+                outcomes["errors"] += 1
+                errors.append(f"{res.status_code} {res.text[:200]}")
+                return
+
+        if opts.gateway in ('razorpay', 'upi'):
+            rp_order = body.get("razorpay_order_id")
+            payment_id = f"pay_fake_{uid}"
+            started = time.perf_counter()
+            res = local.session.post(f"{base_url}/api/payments/razorpay/verify", json={
+                "razorpay_order_id": rp_order,
+                "razorpay_payment_id": payment_id,
+                "razorpay_signature": sign_payment(rp_order, payment_id),
+            })
+            elapsed = time.perf_counter() - started
+            with lock:
+                verify_latencies.append(elapsed)
+                outcomes["verified" if res.status_code == 200 else "verify_failed"] += 1
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=opts.concurrency) as pool:
+            list(pool.map(checkout, user_ids))
+    finally:
+        wall = time.perf_counter() - started
+        server.shutdown()
+        server_thread.join()
+
+    with app.app_context():
+        oversell = check_oversell(db, (Order, OrderItem, Inventory), initial_stock)
+        deadlocks_after = pg_deadlocks(db)
+        db.session.remove()
+        db.engine.dispose()
+    if tmpdir:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    deadlocks = stats.deadlocks
+    if deadlocks_before is not None and deadlocks_after is not None:
+        deadlocks = max(deadlocks, deadlocks_after - deadlocks_before)
+
+    attempted = len(user_ids)
+    return {
+        "database": dialect,
+        "gateway": opts.gateway,
+        "users": attempted,
+        "concurrency": opts.concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(attempted / wall, 2) if wall else 0.0,
+        "outcomes": outcomes,
+        "error_rate": round(outcomes["errors"] / attempted, 4) if attempted else 0.0,
+        "sample_errors": errors[:5],
+        "order_latency": summarize(order_latencies),
+        "verify_latency": summarize(verify_latencies),
+        "lock_wait": summarize(stats.lock_waits),
+        "deadlocks": deadlocks,
+        "lock_timeouts": stats.lock_timeouts,
+        **oversell,
+    }
+
+
+def _has_tables(db):
+    return db.inspect(db.engine).has_table('user')
+
+
+def gate(report, opts):
+    """Returns the list of failed gates (empty when the run passes)."""
+    failures = []
+    if report["oversold_units"] or report["negative_stock_products"] or report["inconsistent_products"]:
+        failures.append("stock oversold or inconsistent")
+    if report["deadlocks"] > opts.max_deadlocks:
+        failures.append(f"deadlocks {report['deadlocks']} > {opts.max_deadlocks}")
+    if report["error_rate"] > opts.max_error_rate:
+        failures.append(f"error rate {report['error_rate']} > {opts.max_error_rate}")
+    if opts.p95_budget_ms and report["order_latency"]["p95_ms"] > opts.p95_budget_ms:
+        failures.append(f"order p95 {report['order_latency']['p95_ms']}ms > {opts.p95_budget_ms}ms")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent checkout load test")
+    parser.add_argument('--db-url', help="Scratch database URL (default: temporary SQLite file)")
+    parser.add_argument('--reset', action='store_true', help="Drop and reseed a database that already has data")
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--stock', type=int, default=10, help="Initial stock per product (keep low to force contention)")
+    parser.add_argument('--lines-per-cart', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--gateway', default='razorpay', choices=['razorpay', 'upi', 'stripe', 'cod'])
+    parser.add_argument('--gateway-latency-ms', type=int, default=0, help="Simulated gateway round-trip time")
+    parser.add_argument('--p95-budget-ms', type=float, default=0, help="Fail if order p95 exceeds this (0 = off)")
+    parser.add_argument('--max-error-rate', type=float, default=0.0)
+    parser.add_argument('--max-deadlocks', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opts = parse_args(argv)
+    report = run_load_test(opts)
+    failures = gate(report, opts)
+    report["gate_failures"] = failures
+    print(json.dumps(report, indent=2))
+    if opts.json:
+        with open(opts.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import os
+import re
+from datetime import datetime
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from extensions import socketio
+
+# Reading app.log and its rotations (app.log.1 is the newest rotation) for the
+# admin log viewer, without loading whole files:
+#   - tail() reads backwards from the end of each file in BLOCK_SIZE blocks,
+#     newest file first, and stops as soon as it has `limit` matching records
+#     or has passed the `since` filter.
+#   - iter_export() streams every matching record oldest first, line by line.
+#   - Socket.IO clients that emit 'logs:follow' get new records as 'log_lines'
+#     events. One background task polls the file for all of them and notices
+#     when the handler rotates it.
+# A record is a header line ("<time> <LEVEL>: ...") plus the lines that follow
+# it up to the next header, e.g. a traceback.
+LOG_NAME = 'app.log'
+BLOCK_SIZE = 64 * 1024
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+FOLLOW_INTERVAL = 1.0
+FOLLOW_MAX_BYTES = 256 * 1024
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S,%f'
+
+HEADER = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) (DEBUG|INFO|WARNING|ERROR|CRITICAL): ')
+
+
+def log_dir():
+    return current_app.config.get('LOG_DIR', current_app.instance_path)
+
+
+def log_files(directory):
+    """app.log and its rotations, newest first."""
+    rotated = []
+    prefix = LOG_NAME + '.'
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            rotated.append((int(name[len(prefix):]), name))
+    names = ([LOG_NAME] if os.path.exists(os.path.join(directory, LOG_NAME)) else []) + [n for _, n in sorted(rotated)]
+    return [os.path.join(directory, n) for n in names]
+
+
+def parse_filters(args):
+    """level (minimum), since/until (ISO datetimes) and q (text, case-insensitive). Raises ValueError."""
+    filters = {"level": 0, "since": None, "until": None, "text": None}
+    level = (args.get('level') or '').upper()
+    if level:
+        if level not in LEVELS:
+            raise ValueError(f"Invalid level: {level}")
+        filters["level"] = LEVELS.index(level)
+    for key in ('since', 'until'):
+        if args.get(key):
+            try:
+                filters[key] = datetime.fromisoformat(args[key])
+            except ValueError:
+                raise ValueError(f"Invalid {key}: {args[key]}")
+    if args.get('q'):
+        filters["text"] = args['q'].lower()
+    return filters
+
+
+def _header(line):
+    m = HEADER.match(line)
+    if not m:
+        return None, None
+    return datetime.strptime(m.group(1), TIME_FORMAT), m.group(2)
+
+
+def _record(lines):
+    time, level = _header(lines[0])
+    return {"time": time, "level": level, "text": "\n".join(lines)}
+
+
+def matches(filters, record):
+    if filters["level"] and (record["level"] is None or LEVELS.index(record["level"]) < filters["level"]):
+        return False
+    if filters["since"] or filters["until"]:
+        if record["time"] is None:
+            return False
+        if filters["since"] and record["time"] < filters["since"]:
+            return False
+        if filters["until"] and record["time"] > filters["until"]:
+            return False
+    return not filters["text"] or filters["text"] in record["text"].lower()
+
+
+def to_dict(record):
+    return {
+        "time": record["time"].isoformat() if record["time"] else None,
+        "level": record["level"],
+        "text": record["text"]
+    }
+
+
+def reverse_lines(path, block_size=BLOCK_SIZE):
+    """Lines of a file from last to first, reading backwards a block at a time."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        partial = b''
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + partial).split(b'\n')
+            # The first piece may be the end of a line that starts in an earlier block
+            partial = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode('utf-8', 'replace').rstrip('\r')
+        yield partial.decode('utf-8', 'replace').rstrip('\r')
+
+
+def reverse_records(path, block_size=BLOCK_SIZE):
+    """Records of one file, newest first."""
+    pending = []
+    for line in reverse_lines(path, block_size):
+        if not line and not pending:
+            continue
+        pending.append(line)
+        if HEADER.match(line):
+            yield _record(pending[::-1])
+            pending = []
+    if pending:
+        # Lines before the first header, cut off from their record by rotation
+        yield _record(pending[::-1])
+
+
+def _group(lines):
+    """Records from lines in file order; lines before the first header form their own record."""
+    pending = []
+    for line in lines:
+        if HEADER.match(line) and pending:
+            yield _record(pending)
+            pending = []
+        if line or pending:
+            pending.append(line)
+    if pending:
+        yield _record(pending)
+
+
+def forward_records(path):
+    """Records of one file, oldest first."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from _group(line.rstrip('\r\n') for line in f)
+
+
+def tail(directory, filters, limit=DEFAULT_LIMIT, block_size=BLOCK_SIZE):
+    """The newest `limit` matching records across the rotated set, oldest first."""
+    found = []
+    for path in log_files(directory):
+        for record in reverse_records(path, block_size):
+            if filters["since"] and record["time"] and record["time"] < filters["since"]:
+                # Everything further back is older still
+                return found[::-1]
+            if matches(filters, record):
+                found.append(record)
+                if len(found) >= limit:
+                    return found[::-1]
+    return found[::-1]
+
+
+def iter_export(directory, filters):
+    """Yields matching records as text, oldest first, across the rotated set."""
+    for path in reversed(log_files(directory)):
+        for record in forward_records(path):
+            if filters["until"] and record["time"] and record["time"] > filters["until"]:
+                return
+            if matches(filters, record):
+                yield record["text"] + "\n"
+
+
+class LogFollower:
+    """Returns the complete lines appended to a log file since the last poll."""
+
+    def __init__(self, path):
+        self.path = path
+        self.inode, self.offset = None, 0
+        self.partial = b''
+        if os.path.exists(path):
+            st = os.stat(path)
+            self.inode, self.offset = st.st_ino, st.st_size
+
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # Rotated (renamed away) or truncated: start on the new file
+            self.inode, self.offset, self.partial = st.st_ino, 0, b''
+        if st.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(FOLLOW_MAX_BYTES)
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        return [line.decode('utf-8', 'replace').rstrip('\r') for line in lines]
+
+
+_followers = {}  # Socket.IO sid -> filters
+_follow_task = None
+
+
+def publish(follower):
+    """Sends each follower the new records that match its filters."""
+    records = list(_group(follower.poll()))
+    if not records:
+        return 0
+    for sid, filters in list(_followers.items()):
+        entries = [to_dict(r) for r in records if matches(filters, r)]
+        if entries:
+            socketio.emit('log_lines', {"entries": entries}, to=sid)
+    return len(records)
+
+
+def _follow_loop(app):
+    global _follow_task
+    with app.app_context():
+        follower = LogFollower(os.path.join(log_dir(), LOG_NAME))
+    try:
+        while _followers:
+            socketio.sleep(FOLLOW_INTERVAL)
+            publish(follower)
+    finally:
+        _follow_task = None
+
+
+def _ensure_follow_task(app):
+    """Starts the shared polling task. Tests drive publish() directly."""
+    global _follow_task
+    if _follow_task is None and not app.testing:
+        _follow_task = socketio.start_background_task(_follow_loop, app)
+
+
+@socketio.on('logs:follow')
+def on_follow(data=None):
+    data = data or {}
+    try:
+        claims = decode_token(data.get('token') or '')
+    except Exception:
+        return {"error": "Invalid token"}
+    if claims.get('role') != 'admin':
+        return {"error": "Forbidden"}
+    try:
+        filters = parse_filters(data)
+    except ValueError as e:
+        return {"error": str(e)}
+    _followers[request.sid] = filters
+    _ensure_follow_task(current_app._get_current_object())
+    return {"following": True}
+
+
+@socketio.on('logs:unfollow')
+def on_unfollow(data=None):
+    _followers.pop(request.sid, None)
+    return {"following": False}
+
+
+@socketio.on('disconnect')
+def on_disconnect(*args):
+    _followers.pop(request.sid, None)
@@ -0,0 +1,35 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add DailyOrderStats rollup table for the admin dashboard
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_order_stats (
+            day DATE PRIMARY KEY,
+            orders INTEGER NOT NULL DEFAULT 0,
+            revenue FLOAT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        print("Created 'daily_order_stats' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed. Run `python admin_stats.py` to fill it from existing orders.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,47 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add FileBlob table for content-addressed storage
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS file_blob (
+            sha256 VARCHAR(64) PRIMARY KEY,
+            path VARCHAR(255) NOT NULL,
+            size INTEGER DEFAULT 0,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        print("Created 'file_blob' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    # Add content hash to File table
+    try:
+        cursor.execute("ALTER TABLE file ADD COLUMN sha256 VARCHAR(64) REFERENCES file_blob(sha256)")
+        print("Added column 'sha256' to 'file' table.")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" in str(e):
+            print("Column 'sha256' already exists in 'file' table.")
+        else:
+            print(f"Error adding column 'sha256': {e}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_file_sha256 ON file (sha256)")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed. Run `python file_store.py` to move existing uploads into the blob store.")
+
+if __name__ == "__main__":
+    migrate()
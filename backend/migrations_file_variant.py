@@ -0,0 +1,43 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add FileVariant table for resized image copies
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS file_variant (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_id INTEGER NOT NULL REFERENCES file(id),
+            size VARCHAR(20) NOT NULL,
+            format VARCHAR(10) NOT NULL,
+            stored_filename VARCHAR(255) NOT NULL,
+            filepath VARCHAR(1024) NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            bytes INTEGER DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_file_variant UNIQUE (file_id, size, format)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_file_variant_file_id ON file_variant (file_id)")
+        print("Created 'file_variant' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed. Run `python image_variants.py` to render variants for existing images.")
+
+if __name__ == "__main__":
+    migrate()
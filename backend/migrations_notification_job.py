@@ -0,0 +1,49 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add NotificationJob table for background mass notifications
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notification_job (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER REFERENCES user(id),
+            target VARCHAR(20) NOT NULL,
+            user_id INTEGER REFERENCES user(id),
+            subject VARCHAR(200) NOT NULL,
+            message TEXT NOT NULL,
+            status VARCHAR(20) DEFAULT 'queued',
+            total INTEGER DEFAULT 0,
+            last_user_id INTEGER DEFAULT 0,
+            saved_count INTEGER DEFAULT 0,
+            emails_sent INTEGER DEFAULT 0,
+            emails_failed INTEGER DEFAULT 0,
+            pushes_sent INTEGER DEFAULT 0,
+            pushes_failed INTEGER DEFAULT 0,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME
+        )
+        """)
+        print("Created 'notification_job' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,35 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Indexes behind the admin order list's SKU search (case-insensitive, so on upper(sku)).
+    # SQLite only; PostgreSQL needs upper(sku) text_pattern_ops, see the README.
+    try:
+        cursor.execute("DROP INDEX IF EXISTS ix_product_sku")
+    except sqlite3.OperationalError as e:
+        print(f"Error dropping index ix_product_sku: {e}")
+    for name, table, column in (('ix_product_sku_upper', 'product', 'upper(sku)'),
+                                ('ix_order_item_product_id', 'order_item', 'product_id')):
+        try:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+            print(f"Created index '{name}'.")
+        except sqlite3.OperationalError as e:
+            print(f"Error creating index {name}: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
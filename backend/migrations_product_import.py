@@ -0,0 +1,48 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add ProductImportJob table for bulk catalog imports
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS product_import_job (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seller_id INTEGER NOT NULL REFERENCES user(id),
+            filename VARCHAR(255) NOT NULL,
+            source_path VARCHAR(1024) NOT NULL,
+            error_path VARCHAR(1024),
+            status VARCHAR(20) DEFAULT 'queued',
+            total_rows INTEGER DEFAULT 0,
+            created_count INTEGER DEFAULT 0,
+            updated_count INTEGER DEFAULT 0,
+            error_count INTEGER DEFAULT 0,
+            images_saved INTEGER DEFAULT 0,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_product_import_job_seller_id ON product_import_job (seller_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_product_seller_sku ON product (seller_id, sku)")
+        print("Created 'product_import_job' table and product SKU index.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,42 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add SellerDailySales rollup table
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seller_daily_sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seller_id INTEGER NOT NULL REFERENCES user(id),
+            product_id INTEGER NOT NULL REFERENCES product(id),
+            day DATE NOT NULL,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue FLOAT NOT NULL DEFAULT 0,
+            cancelled_units INTEGER NOT NULL DEFAULT 0,
+            cancelled_revenue FLOAT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_seller_daily_sales UNIQUE (seller_id, product_id, day)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_seller_daily_sales_seller_day ON seller_daily_sales (seller_id, day)")
+        print("Created 'seller_daily_sales' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed. Run `python seller_analytics.py` to fill it from existing orders.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,30 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Seller transaction history and the order queue filter by seller and join lines to orders
+    try:
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_order_item_seller_id ON order_item (seller_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_withdrawal_request_seller_id ON withdrawal_request (seller_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_order_item_order_id ON order_item (order_id)")
+        print("Created seller indexes on 'order_item' and 'withdrawal_request'.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating indexes: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
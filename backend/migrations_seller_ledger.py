@@ -0,0 +1,55 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add seller ledger and materialized balance tables
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seller_ledger_entry (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seller_id INTEGER NOT NULL REFERENCES user(id),
+            entry_type VARCHAR(30) NOT NULL,
+            amount FLOAT NOT NULL,
+            balance_after FLOAT NOT NULL,
+            reference VARCHAR(100) NOT NULL,
+            order_id INTEGER REFERENCES "order"(id),
+            order_item_id INTEGER REFERENCES order_item(id),
+            withdrawal_id INTEGER REFERENCES withdrawal_request(id),
+            description VARCHAR(255),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_seller_ledger_reference UNIQUE (seller_id, reference)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_seller_ledger_entry_seller_id ON seller_ledger_entry (seller_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_seller_ledger_entry_order_id ON seller_ledger_entry (order_id)")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seller_balance (
+            seller_id INTEGER PRIMARY KEY REFERENCES user(id),
+            balance FLOAT NOT NULL DEFAULT 0,
+            total_sales FLOAT NOT NULL DEFAULT 0,
+            total_refunded FLOAT NOT NULL DEFAULT 0,
+            total_withdrawn FLOAT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        print("Created 'seller_ledger_entry' and 'seller_balance' tables.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating tables: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed. Run `python seller_ledger.py` to backfill balances.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,42 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add UploadSession table for resumable uploads
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_session (
+            id VARCHAR(32) PRIMARY KEY,
+            owner_id INTEGER NOT NULL REFERENCES user(id),
+            filename VARCHAR(255) NOT NULL,
+            total_size BIGINT NOT NULL,
+            received BIGINT NOT NULL DEFAULT 0,
+            temp_path VARCHAR(1024) NOT NULL,
+            status VARCHAR(20) DEFAULT 'uploading',
+            file_id INTEGER REFERENCES file(id),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_upload_session_owner_id ON upload_session (owner_id)")
+        print("Created 'upload_session' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
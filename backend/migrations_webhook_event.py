@@ -0,0 +1,45 @@
+import sqlite3
+import os
+
+# Path to the database - absolute path to be safe
+base_dir = os.path.abspath(os.path.dirname(__file__))
+db_path = os.path.join(base_dir, 'instance', 'ecommerce.db')
+
+def migrate():
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}. Skipping migration.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Add WebhookEvent inbox table
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_event (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            gateway VARCHAR(20) NOT NULL,
+            event_id VARCHAR(120) NOT NULL,
+            event_type VARCHAR(64),
+            payload TEXT NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            claim_token VARCHAR(36),
+            claimed_at DATETIME,
+            received_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            processed_at DATETIME,
+            CONSTRAINT uq_webhook_event_gateway_event UNIQUE (gateway, event_id)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_webhook_event_status ON webhook_event (status)")
+        print("Created 'webhook_event' table.")
+    except sqlite3.OperationalError as e:
+        print(f"Error creating table: {e}")
+
+    conn.commit()
+    conn.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate()
@@ -100,6 +100,8 @@ class CategoryPermission(db.Model):
 
 
 class Product(db.Model):
+    __table_args__ = (db.Index('ix_product_seller_sku', 'seller_id', 'sku'),)
+
     id = db.Column(db.Integer, primary_key=True)
     seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
@@ -149,16 +151,25 @@ class Product(db.Model):
             imgs = []
             for pi in sorted(getattr(self, 'product_images', []) or [], key=lambda x: (x.position or 0)):
                 if pi.file:
+                    download_url = f"{request.url_root.rstrip('/')}/api/files/{pi.file.id}/download"
                     imgs.append({
                         "id": pi.file.id,
                         "filename": pi.file.filename,
-                        "download_url": f"{request.url_root.rstrip('/')}/api/files/{pi.file.id}/download"
+                        "download_url": download_url,
+                        # Falls back to the original until the variant has been rendered
+                        "variants": {size: f"{download_url}?size={size}" for size in ('thumb', 'main', 'zoom')}
                     })
             return imgs
         except Exception:
             return []
 
 
+# Backs the admin order list's case-insensitive SKU prefix search. On PostgreSQL
+# text_pattern_ops lets LIKE 'prefix%' use it whatever the database collation.
+db.Index('ix_product_sku_upper', db.func.upper(Product.sku).label('sku_upper'),
+         postgresql_ops={'sku_upper': 'text_pattern_ops'})
+
+
 class Coupon(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(50), unique=True, nullable=False)
@@ -175,6 +186,20 @@ class Coupon(db.Model):
 
     seller = db.relationship('User')
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "code": self.code,
+            "type": self.type,
+            "discount_percent": self.discount_percent,
+            "max_discount_amount": self.max_discount_amount,
+            "min_order_value": self.min_order_value,
+            "expiry_date": self.expiry_date.isoformat() if self.expiry_date else None,
+            "usage_limit": self.usage_limit,
+            "used_count": self.used_count,
+            "is_active": self.is_active
+        }
+
 class Inventory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), unique=True)
@@ -266,9 +291,9 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
-    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     subtotal = db.Column(db.Float, nullable=False)
@@ -303,7 +328,7 @@ class Review(db.Model):
 
 class WithdrawalRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='requested')
     requested_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -456,6 +481,7 @@ class File(db.Model):
     filepath = db.Column(db.String(1024), nullable=False)
     status = db.Column(db.String(32), default='pending')
     size = db.Column(db.Integer, default=0)
+    sha256 = db.Column(db.String(64), db.ForeignKey('file_blob.sha256'), index=True) # Content hash; null for pre-dedup uploads
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -468,6 +494,7 @@ class File(db.Model):
             'stored_filename': self.stored_filename,
             'status': self.status,
             'size': self.size,
+            'sha256': self.sha256,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
@@ -478,6 +505,30 @@ class File(db.Model):
                 data['owner'] = {'id': owner.id, 'email': owner.email}
         return data
 
+class FileBlob(db.Model):
+    """One stored copy of some content; File rows and category images reference it by hash."""
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(255), nullable=False) # Relative to UPLOAD_FOLDER
+    size = db.Column(db.Integer, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class FileVariant(db.Model):
+    __table_args__ = (db.UniqueConstraint('file_id', 'size', 'format', name='uq_file_variant'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('file.id'), nullable=False, index=True)
+    size = db.Column(db.String(20), nullable=False) # thumb, main, zoom
+    format = db.Column(db.String(10), nullable=False) # webp, jpeg
+    stored_filename = db.Column(db.String(255), nullable=False)
+    filepath = db.Column(db.String(1024), nullable=False)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    bytes = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    file = db.relationship('File', backref='variants')
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -496,4 +547,166 @@ class Notification(db.Model):
             "message": self.message,
             "is_read": self.is_read,
             "created_at": self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class WebhookEvent(db.Model):
+    __table_args__ = (db.UniqueConstraint('gateway', 'event_id', name='uq_webhook_event_gateway_event'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    gateway = db.Column(db.String(20), nullable=False)
+    event_id = db.Column(db.String(120), nullable=False)
+    event_type = db.Column(db.String(64))
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', index=True) # pending, processing, processed, ignored, failed
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    claim_token = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+
+
+class SellerLedgerEntry(db.Model):
+    __table_args__ = (db.UniqueConstraint('seller_id', 'reference', name='uq_seller_ledger_reference'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    entry_type = db.Column(db.String(30), nullable=False) # sale, refund, withdrawal, withdrawal_reversal
+    amount = db.Column(db.Float, nullable=False) # credit > 0, debit < 0
+    balance_after = db.Column(db.Float, nullable=False)
+    reference = db.Column(db.String(100), nullable=False) # e.g. order_item:12, withdrawal:3
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), index=True)
+    order_item_id = db.Column(db.Integer, db.ForeignKey('order_item.id'))
+    withdrawal_id = db.Column(db.Integer, db.ForeignKey('withdrawal_request.id'))
+    description = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SellerBalance(db.Model):
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    balance = db.Column(db.Float, default=0.0, nullable=False)
+    total_sales = db.Column(db.Float, default=0.0, nullable=False)
+    total_refunded = db.Column(db.Float, default=0.0, nullable=False)
+    total_withdrawn = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SellerDailySales(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('seller_id', 'product_id', 'day', name='uq_seller_daily_sales'),
+        db.Index('ix_seller_daily_sales_seller_day', 'seller_id', 'day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+    cancelled_units = db.Column(db.Integer, default=0, nullable=False)
+    cancelled_revenue = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DailyOrderStats(db.Model):
+    """Orders placed and their total per day, for the admin dashboard."""
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ProductImportJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    source_path = db.Column(db.String(1024), nullable=False)
+    error_path = db.Column(db.String(1024))
+    status = db.Column(db.String(20), default='queued') # queued, running, completed, failed
+    total_rows = db.Column(db.Integer, default=0)
+    created_count = db.Column(db.Integer, default=0)
+    updated_count = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    images_saved = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "total_rows": self.total_rows,
+            "created": self.created_count,
+            "updated": self.updated_count,
+            "errors": self.error_count,
+            "images_saved": self.images_saved,
+            "error": self.error,
+            "has_error_file": bool(self.error_path and self.error_count),
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class NotificationJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    target = db.Column(db.String(20), nullable=False) # all_users, all_sellers, specific
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id')) # When target is specific
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='queued') # queued, running, completed, failed
+    total = db.Column(db.Integer, default=0)
+    last_user_id = db.Column(db.Integer, default=0) # Recipients up to here are done; a rerun resumes after it
+    saved_count = db.Column(db.Integer, default=0)
+    emails_sent = db.Column(db.Integer, default=0)
+    emails_failed = db.Column(db.Integer, default=0)
+    pushes_sent = db.Column(db.Integer, default=0)
+    pushes_failed = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "target": self.target,
+            "subject": self.subject,
+            "status": self.status,
+            "total": self.total,
+            "saved": self.saved_count,
+            "emails_sent": self.emails_sent,
+            "emails_failed": self.emails_failed,
+            "pushes_sent": self.pushes_sent,
+            "pushes_failed": self.pushes_failed,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class UploadSession(db.Model):
+    id = db.Column(db.String(32), primary_key=True) # Opaque token handed to the client
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    temp_path = db.Column(db.String(1024), nullable=False)
+    status = db.Column(db.String(20), default='uploading') # uploading, completing, completed, failed
+    file_id = db.Column(db.Integer, db.ForeignKey('file.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "size": self.total_size,
+            "offset": self.received,
+            "status": self.status,
+            "file_id": self.file_id,
+            "url": f"/api/files/{self.file_id}/download" if self.file_id else None
+        }
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from extensions import db, socketio
+from models import User, Notification, NotificationJob
+from outbound import SMTP_POOL_SIZE
+from services import send_email, send_push_batch
+from utils import emit_update
+
+# Mass notifications run as a background job instead of inside the request.
+# Recipients are read in id order, CHUNK_SIZE at a time (id and email only).
+# For each chunk the Notification rows go in with one executemany insert, the
+# emails are sent by SMTP_POOL_SIZE threads sharing the pooled, logged-in SMTP
+# connections, and push goes out PUSH_BATCH_SIZE users per call. The chunk's
+# rows and the job's progress (including the last recipient id) are committed
+# together, so a run interrupted by a restart resumes after the last finished
+# chunk; recipients of the unfinished chunk may get that email twice.
+CHUNK_SIZE = 500
+PUSH_BATCH_SIZE = 100
+TARGETS = ('all_users', 'all_sellers', 'specific')
+
+
+def recipients_query(job):
+    query = db.select(User.id, User.email)
+    if job.target == 'specific':
+        return query.where(User.id == job.user_id)
+    if job.target == 'all_sellers':
+        return query.where(User.role == 'seller')
+    return query.where(User.is_active.is_(True))
+
+
+def create_job(admin_id, target, subject, message, user_id=None):
+    job = NotificationJob(admin_id=admin_id, target=target, user_id=user_id, subject=subject, message=message)
+    job.total = db.session.scalar(db.select(db.func.count()).select_from(recipients_query(job).subquery()))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _deliver(job, chunk, pool):
+    """Saves, emails and pushes one chunk of (id, email) rows; updates the job's counters."""
+    subject, message = job.subject, job.message
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Notification), [
+        {"user_id": r.id, "subject": subject, "message": message, "is_read": False, "created_at": now}
+        for r in chunk
+    ])
+
+    body = f"<p>{message}</p>"
+    emails = pool.map(lambda email: send_email(email, subject, body), [r.email for r in chunk])
+    pushes = pool.map(lambda ids: send_push_batch(ids, subject, message), _batches([r.id for r in chunk], PUSH_BATCH_SIZE))
+    emails_sent = sum(1 for ok in emails if ok)
+    pushes_sent = sum(pushes)
+
+    job.saved_count += len(chunk)
+    job.emails_sent += emails_sent
+    job.emails_failed += len(chunk) - emails_sent
+    job.pushes_sent += pushes_sent
+    job.pushes_failed += len(chunk) - pushes_sent
+    job.last_user_id = chunk[-1].id
+
+
+def run_fanout(job_id, chunk_size=CHUNK_SIZE):
+    """Sends a queued (or interrupted) job to its remaining recipients."""
+    job = db.session.get(NotificationJob, job_id)
+    if job is None or job.status == 'completed':
+        return job
+    job.status = 'running'
+    job.started_at = job.started_at or datetime.utcnow()
+    db.session.commit()
+
+    try:
+        with ThreadPoolExecutor(max_workers=SMTP_POOL_SIZE, thread_name_prefix='notify') as pool:
+            while True:
+                chunk = db.session.execute(
+                    recipients_query(job).where(User.id > job.last_user_id).order_by(User.id).limit(chunk_size)
+                ).all()
+                if not chunk:
+                    break
+                _deliver(job, chunk, pool)
+                db.session.commit()
+                emit_update('notification_job', 'progress', job.to_dict())
+        job.status = 'completed'
+        current_app.logger.info(f"Notification job {job_id} sent to {job.saved_count} recipients "
+                                f"({job.emails_failed} emails and {job.pushes_failed} pushes not delivered)")
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Notification job {job_id} failed: {e}")
+        job = db.session.get(NotificationJob, job_id)
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    emit_update('notification_job', 'finished', job.to_dict())
+    return job
+
+
+def start_fanout(app, job_id):
+    """Runs the job in a background task. Tests call run_fanout directly."""
+    if app.testing:
+        return
+    socketio.start_background_task(_run_in_context, app, job_id)
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_fanout(job_id)
+        finally:
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    # Resume jobs by hand, e.g. after a restart interrupted the worker.
+    import sys
+    from app import create_app
+    with create_app().app_context():
+        ids = [int(a) for a in sys.argv[1:]] or [
+            j.id for j in NotificationJob.query.filter(NotificationJob.status.in_(('queued', 'running')))]
+        for job_id in ids:
+            print(run_fanout(job_id).to_dict())
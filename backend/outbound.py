@@ -0,0 +1,382 @@
+"""
+Shared clients for outbound calls (push provider, payment gateways, SMTP).
+
+Each dependency gets one keep-alive connection pool per process, a timeout
+budget, retries with full-jitter backoff and a circuit breaker, so a slow or
+failing provider fails fast instead of holding request threads.
+"""
+import logging
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# connect: connect timeout; timeout: total budget per call (including retries)
+DEPENDENCIES = {
+    'push': {'connect': 1.0, 'timeout': 3.0, 'retries': 2},
+    'razorpay': {'connect': 2.0, 'timeout': 10.0, 'retries': 2},
+    'stripe': {'connect': 2.0, 'timeout': 15.0, 'retries': 2},
+    'smtp': {'connect': 3.0, 'timeout': 10.0, 'retries': 1},
+    'product_images': {'connect': 3.0, 'timeout': 15.0, 'retries': 1},
+}
+POOL_MAX_CONNECTIONS = 20
+POOL_MAX_KEEPALIVE = 10
+BACKOFF_BASE = 0.1
+BACKOFF_CAP = 2.0
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 30
+SMTP_POOL_SIZE = 4
+SMTP_IDLE_SECONDS = 60
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+def budget(name):
+    """Timeout/retry settings for a dependency, overridable with OUTBOUND_<NAME>_TIMEOUT etc."""
+    cfg = dict(DEPENDENCIES.get(name, DEPENDENCIES['push']))
+    for key in ('connect', 'timeout'):
+        env = os.getenv(f"OUTBOUND_{name.upper()}_{key.upper()}")
+        if env:
+            cfg[key] = float(env)
+    env = os.getenv(f"OUTBOUND_{name.upper()}_RETRIES")
+    if env:
+        cfg['retries'] = int(env)
+    return cfg
+
+
+def backoff(attempt):
+    """Full-jitter exponential backoff in seconds."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Opens after BREAKER_FAILURES consecutive failures; after BREAKER_RESET_SECONDS
+    one trial call is let through (half-open) and its outcome closes or re-opens it.
+    Also keeps call/latency counters for health reporting.
+    """
+
+    def __init__(self, name, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.last_error = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    raise CircuitOpenError(f"{self.name} circuit open")
+                self.state = 'half_open'
+                self._trial = False
+            if self.state == 'half_open':
+                if self._trial:
+                    raise CircuitOpenError(f"{self.name} circuit half-open, trial in flight")
+                self._trial = True
+
+    def record(self, ok, elapsed_ms=0.0, error=None):
+        with self._lock:
+            self.calls += 1
+            self.total_ms += elapsed_ms
+            if ok:
+                self.failures = 0
+                self.state = 'closed'
+                return
+            self.errors += 1
+            self.failures += 1
+            self.last_error = error
+            if self.state == 'half_open' or self.failures >= self.max_failures:
+                if self.state != 'open':
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures: {error}")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+                "last_error": self.last_error
+            }
+
+
+_lock = threading.RLock()
+_breakers = {}
+_http_clients = {}
+_smtp_pools = {}
+_razorpay_session = None
+_stripe_client = None
+
+
+def breaker(name):
+    with _lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def stats():
+    """Breaker state and latency counters for every dependency used so far."""
+    with _lock:
+        names = list(_breakers)
+    return {name: breaker(name).stats() for name in names}
+
+
+class HttpClient:
+    """Pooled httpx client for one dependency. Non-idempotent calls are only retried if the connection failed."""
+
+    def __init__(self, name, transport=None):
+        self.name = name
+        self.cfg = budget(name)
+        self.breaker = breaker(name)
+        self._client = httpx.Client(
+            timeout=httpx.Timeout(self.cfg['timeout'], connect=self.cfg['connect']),
+            limits=httpx.Limits(max_connections=POOL_MAX_CONNECTIONS, max_keepalive_connections=POOL_MAX_KEEPALIVE),
+            transport=transport
+        )
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        deadline = time.monotonic() + self.cfg['timeout']
+        attempt = 0
+        self.breaker.before_call()
+        while True:
+            remaining = deadline - time.monotonic()
+            start = time.monotonic()
+            error, response, retryable = None, None, False
+            try:
+                response = self._client.request(
+                    method, url, timeout=httpx.Timeout(remaining, connect=min(self.cfg['connect'], remaining)), **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                error, retryable = e, True
+            except httpx.TransportError as e:
+                error, retryable = e, idempotent
+            except Exception as e:
+                self.breaker.record(False, (time.monotonic() - start) * 1000, repr(e))
+                raise
+            elapsed_ms = (time.monotonic() - start) * 1000
+
+            if response is not None:
+                failed = response.status_code >= 500
+                self.breaker.record(not failed, elapsed_ms, f"HTTP {response.status_code}" if failed else None)
+                if not (failed or response.status_code == 429) or not idempotent:
+                    return response
+                retryable = True
+            else:
+                self.breaker.record(False, elapsed_ms, repr(error))
+
+            delay = backoff(attempt)
+            # Once the circuit is not closed (e.g. this failure opened it), report the failure itself
+            if not retryable or attempt >= self.cfg['retries'] or time.monotonic() + delay >= deadline \
+                    or self.breaker.state != 'closed':
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self._client.close()
+
+
+def http_client(name):
+    with _lock:
+        if name not in _http_clients:
+            _http_clients[name] = HttpClient(name)
+        return _http_clients[name]
+
+
+def razorpay_session():
+    """
+    requests.Session for razorpay.Client: pooled adapter, default timeouts, urllib3
+    retries with jitter for idempotent calls only, and the razorpay breaker.
+    """
+    global _razorpay_session
+    with _lock:
+        if _razorpay_session is None:
+            _razorpay_session = _budgeted_session('razorpay')
+        return _razorpay_session
+
+
+def _budgeted_session(name):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    cfg = budget(name)
+    circuit = breaker(name)
+
+    class BudgetedSession(requests.Session):
+        def request(self, method, url, **kwargs):
+            kwargs.setdefault('timeout', (cfg['connect'], cfg['timeout']))
+            circuit.before_call()
+            start = time.monotonic()
+            try:
+                response = super().request(method, url, **kwargs)
+            except requests.RequestException as e:
+                circuit.record(False, (time.monotonic() - start) * 1000, repr(e))
+                raise
+            failed = response.status_code >= 500
+            circuit.record(not failed, (time.monotonic() - start) * 1000, f"HTTP {response.status_code}" if failed else None)
+            return response
+
+    retry = Retry(total=cfg['retries'], read=0, status_forcelist=(429, 502, 503, 504), allowed_methods=IDEMPOTENT_METHODS,
+                  backoff_factor=BACKOFF_BASE, backoff_jitter=BACKOFF_BASE, backoff_max=BACKOFF_CAP, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=POOL_MAX_KEEPALIVE, pool_maxsize=POOL_MAX_CONNECTIONS, max_retries=retry)
+    session = BudgetedSession()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def stripe_http_client():
+    """Pooled httpx-backed HTTP client for the stripe SDK, gated by the stripe breaker."""
+    global _stripe_client
+    with _lock:
+        if _stripe_client is None:
+            _stripe_client = _breaker_stripe_client()
+        return _stripe_client
+
+
+def _breaker_stripe_client():
+    import stripe
+
+    cfg = budget('stripe')
+    circuit = breaker('stripe')
+
+    class BreakerHTTPXClient(stripe.HTTPXClient):
+        def request(self, method, url, headers, post_data=None):
+            circuit.before_call()
+            start = time.monotonic()
+            try:
+                content, status, response_headers = super().request(method, url, headers, post_data)
+            except Exception as e:
+                circuit.record(False, (time.monotonic() - start) * 1000, repr(e))
+                raise
+            circuit.record(status < 500, (time.monotonic() - start) * 1000, f"HTTP {status}" if status >= 500 else None)
+            return content, status, response_headers
+
+    return BreakerHTTPXClient(timeout=httpx.Timeout(cfg['timeout'], connect=cfg['connect']), allow_sync_methods=True)
+
+
+class SmtpPool:
+    """
+    Keeps up to SMTP_POOL_SIZE logged-in SMTP connections open. Connections idle for
+    longer than SMTP_IDLE_SECONDS are dropped; a send on a connection the server has
+    closed reconnects once.
+    """
+
+    def __init__(self, host, port, user, password, size=SMTP_POOL_SIZE, idle_seconds=SMTP_IDLE_SECONDS):
+        self.host, self.port, self.user, self.password = host, int(port), user, password
+        self.idle_seconds = idle_seconds
+        self.cfg = budget('smtp')
+        self.breaker = breaker('smtp')
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        # The connect budget covers the TCP connect; the session gets the full timeout
+        server = smtplib.SMTP(timeout=self.cfg['connect'])
+        server.connect(self.host, self.port)
+        server.timeout = self.cfg['timeout']
+        server.sock.settimeout(self.cfg['timeout'])
+        server.starttls()
+        server.login(self.user, self.password)
+        return server
+
+    def _take(self):
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.idle_seconds:
+                return server
+            _quit(server)
+
+    def _give_back(self, server):
+        try:
+            self._idle.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            _quit(server)
+
+    def send(self, from_addr, to_addrs, message):
+        self.breaker.before_call()
+        start = time.monotonic()
+        server = None
+        try:
+            server = self._take()
+            try:
+                server.sendmail(from_addr, to_addrs, message)
+            except smtplib.SMTPServerDisconnected:
+                _quit(server)
+                server = self._connect()
+                server.sendmail(from_addr, to_addrs, message)
+        except Exception as e:
+            if server is not None:
+                _quit(server)
+            self.breaker.record(False, (time.monotonic() - start) * 1000, repr(e))
+            raise
+        self.breaker.record(True, (time.monotonic() - start) * 1000)
+        self._give_back(server)
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quit(server)
+
+
+def _quit(server):
+    try:
+        server.quit()
+    except Exception:
+        pass
+
+
+def smtp_pool(host, port, user, password):
+    """Shared pool per SMTP account; changing the credentials starts a new pool."""
+    key = (host, int(port), user, password)
+    with _lock:
+        if key not in _smtp_pools:
+            _smtp_pools[key] = SmtpPool(host, port, user, password)
+        return _smtp_pools[key]
+
+
+def close_all():
+    with _lock:
+        clients, pools = list(_http_clients.values()), list(_smtp_pools.values())
+        _http_clients.clear()
+        _smtp_pools.clear()
+    for c in clients:
+        c.close()
+    for p in pools:
+        p.close()
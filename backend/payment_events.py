@@ -0,0 +1,313 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from extensions import db, socketio
+from models import Order, PaymentTransaction, WebhookEvent
+from utils import get_setting, increase_stock, send_notification
+from seller_ledger import credit_order, debit_refund
+from seller_analytics import record_cancellations
+
+# Gateway webhooks are written to the WebhookEvent inbox and acknowledged
+# straight away; a background worker claims pending events in batches and
+# applies them to Order/PaymentTransaction. The unique (gateway, event_id)
+# constraint drops redelivered events, and every handler checks current state
+# before writing, so replaying an event that was already applied is a no-op.
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_MAX_ATTEMPTS = 5
+WEBHOOK_CLAIM_TIMEOUT = timedelta(minutes=5)
+WEBHOOK_POLL_SECONDS = 30
+
+_worker_lock = threading.Lock()
+_worker_started = False
+_wake = False
+
+
+def razorpay_webhook_secret():
+    return get_setting('razorpay_webhook_secret') or os.getenv('RAZORPAY_WEBHOOK_SECRET')
+
+
+def verify_razorpay_signature(body, signature, secret):
+    """X-Razorpay-Signature is the hex HMAC-SHA256 of the raw body with the webhook secret."""
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def record_event(gateway, event_id, event_type, body):
+    """Stores a raw webhook event. Returns False if it was already received."""
+    db.session.add(WebhookEvent(
+        gateway=gateway,
+        event_id=event_id,
+        event_type=event_type,
+        payload=body.decode('utf-8') if isinstance(body, bytes) else body
+    ))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def _claimable():
+    stale = datetime.utcnow() - WEBHOOK_CLAIM_TIMEOUT
+    return db.or_(
+        WebhookEvent.status == 'pending',
+        db.and_(WebhookEvent.status == 'processing', WebhookEvent.claimed_at < stale)
+    )
+
+
+def claim_events(batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Marks up to batch_size pending events as processing under a fresh claim token,
+    so concurrent workers never pick up the same event. Events left in processing
+    by a crashed worker become claimable again after WEBHOOK_CLAIM_TIMEOUT.
+    """
+    ids = [r.id for r in db.session.query(WebhookEvent.id).filter(_claimable())
+           .order_by(WebhookEvent.id).limit(batch_size).all()]
+    if not ids:
+        return []
+    token = str(uuid.uuid4())
+    WebhookEvent.query.filter(WebhookEvent.id.in_(ids), _claimable()).update({
+        WebhookEvent.status: 'processing',
+        WebhookEvent.claim_token: token,
+        WebhookEvent.claimed_at: datetime.utcnow(),
+        WebhookEvent.attempts: db.func.coalesce(WebhookEvent.attempts, 0) + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    return WebhookEvent.query.filter_by(claim_token=token).order_by(WebhookEvent.id).all()
+
+
+def _entity(data, name):
+    return ((data.get('payload') or {}).get(name) or {}).get('entity') or {}
+
+
+def _amount(paise, default):
+    return paise / 100.0 if paise is not None else default
+
+
+class _Batch:
+    """Orders and known transaction ids for a batch of events, loaded with two queries."""
+
+    def __init__(self, parsed):
+        gateway_order_ids, txn_ids = set(), set()
+        for data in parsed.values():
+            payment, refund = _entity(data, 'payment'), _entity(data, 'refund')
+            if payment.get('order_id'):
+                gateway_order_ids.add(payment['order_id'])
+            for ref in (payment.get('id'), refund.get('id'), refund.get('payment_id')):
+                if ref:
+                    txn_ids.add(ref)
+
+        self.txn_order = {}
+        if txn_ids:
+            rows = db.session.query(PaymentTransaction.transaction_id, PaymentTransaction.order_id) \
+                .filter(PaymentTransaction.transaction_id.in_(list(txn_ids))).all()
+            self.txn_order = {r.transaction_id: r.order_id for r in rows}
+
+        self.by_reference, self.by_id = {}, {}
+        order_ids = set(self.txn_order.values())
+        if gateway_order_ids or order_ids:
+            orders = Order.query.filter(db.or_(
+                Order.payment_reference.in_(list(gateway_order_ids)),
+                Order.id.in_(list(order_ids))
+            )).all()
+            for o in orders:
+                self.by_id[o.id] = o
+                if o.payment_reference:
+                    self.by_reference[o.payment_reference] = o
+        self.notifications = []
+
+    def order_for(self, payment, refund):
+        order = self.by_reference.get(payment.get('order_id'))
+        if not order:
+            order = self.by_id.get(self.txn_order.get(refund.get('payment_id')))
+        return order
+
+    def add_txn(self, **kwargs):
+        txn = PaymentTransaction(payment_gateway='razorpay', **kwargs)
+        db.session.add(txn)
+        self.txn_order[txn.transaction_id] = txn.order_id
+
+    def notify(self, order, subject, message):
+        self.notifications.append((order.user.email, subject, message, order.user.phone, order.user_id))
+
+
+def _payment_captured(batch, order, payment, refund):
+    if payment.get('id') and payment['id'] not in batch.txn_order:
+        batch.add_txn(order_id=order.id, amount=_amount(payment.get('amount'), order.total_amount),
+                      payment_status='success', transaction_id=payment['id'])
+    if order.payment_status == 'paid':
+        return
+    order.payment_status = 'paid'
+    # A capture after failure/cancellation keeps its status: stock was already
+    # released, so the order is left for manual refund or review.
+    if order.status not in ('payment_failed', 'cancelled'):
+        order.status = 'paid'
+        credit_order(order)
+    batch.notify(order, "Payment Success", f"Order #{order.id} paid.")
+
+
+def _payment_failed(batch, order, payment, refund):
+    if order.payment_status == 'paid' or order.status in ('payment_failed', 'cancelled'):
+        return
+    reason = payment.get('error_description') or 'Payment failed'
+    order.status = 'payment_failed'
+    order.payment_status = 'failed'
+    record_cancellations([order.id])
+    for item in order.items:
+        increase_stock(item.product_id, item.quantity)
+    if payment.get('id') and payment['id'] not in batch.txn_order:
+        batch.add_txn(order_id=order.id, amount=_amount(payment.get('amount'), order.total_amount),
+                      payment_status='failure', transaction_id=payment['id'], failure_reason=reason)
+    batch.notify(order, f"Payment Failed for Order #{order.id}",
+                 f"Your payment for order #{order.id} of {order.total_amount} failed. Reason: {reason}. Stock has been released.")
+
+
+def _refund_processed(batch, order, payment, refund):
+    if not refund.get('id') or refund['id'] in batch.txn_order:
+        return
+    amount = _amount(refund.get('amount'), order.total_amount)
+    batch.add_txn(order_id=order.id, amount=amount, payment_status='refunded', transaction_id=refund['id'])
+    order.payment_status = 'refunded' if amount >= (order.total_amount or 0) else 'partially_refunded'
+    debit_refund(order, amount, refund['id'])
+    batch.notify(order, f"Refund Processed for Order #{order.id}", f"A refund of {amount} for order #{order.id} has been processed.")
+
+
+RAZORPAY_HANDLERS = {
+    'payment.captured': _payment_captured,
+    'order.paid': _payment_captured,
+    'payment.failed': _payment_failed,
+    'refund.processed': _refund_processed,
+}
+
+
+def _apply(events):
+    """Applies a list of claimed events in the current transaction."""
+    parsed = {}
+    for ev in events:
+        try:
+            parsed[ev.id] = json.loads(ev.payload)
+        except ValueError:
+            parsed[ev.id] = None
+    batch = _Batch({k: v for k, v in parsed.items() if v})
+    now = datetime.utcnow()
+    for ev in events:
+        data = parsed[ev.id]
+        handler = RAZORPAY_HANDLERS.get(ev.event_type) if ev.gateway == 'razorpay' else None
+        ev.processed_at = now
+        ev.claim_token = None
+        if data is None:
+            ev.status, ev.error = 'failed', 'Malformed payload'
+            continue
+        if not handler:
+            ev.status = 'ignored'
+            continue
+        payment, refund = _entity(data, 'payment'), _entity(data, 'refund')
+        order = batch.order_for(payment, refund)
+        if not order:
+            ev.status, ev.error = 'ignored', 'Order not found'
+            continue
+        handler(batch, order, payment, refund)
+        ev.status, ev.error = 'processed', None
+    return batch
+
+
+def _fail(event_id, error):
+    ev = db.session.get(WebhookEvent, event_id)
+    ev.error = error
+    ev.claim_token = None
+    ev.status = 'failed' if (ev.attempts or 0) >= WEBHOOK_MAX_ATTEMPTS else 'pending'
+    db.session.commit()
+
+
+def _send(notifications):
+    for email, subject, message, phone, user_id in notifications:
+        send_notification(email, subject, message, sms_to=phone, user_id=user_id)
+
+
+def process_pending_events(batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Claims and applies one batch of events in a single transaction. If the batch
+    fails, each event is retried on its own so one bad event cannot hold back the
+    rest. Returns the number of events claimed.
+    """
+    events = claim_events(batch_size)
+    if not events:
+        return 0
+    ids = [ev.id for ev in events]
+    try:
+        batch = _apply(events)
+        db.session.commit()
+        _send(batch.notifications)
+        return len(ids)
+    except Exception:
+        db.session.rollback()
+
+    for event_id in ids:
+        try:
+            batch = _apply([db.session.get(WebhookEvent, event_id)])
+            db.session.commit()
+            _send(batch.notifications)
+        except Exception as e:
+            db.session.rollback()
+            _fail(event_id, str(e))
+    return len(ids)
+
+
+def drain_events(batch_size=WEBHOOK_BATCH_SIZE):
+    total = 0
+    while True:
+        n = process_pending_events(batch_size)
+        total += n
+        if n < batch_size:
+            return total
+
+
+def wake_webhook_worker():
+    global _wake
+    _wake = True
+
+
+def start_webhook_worker(app):
+    """Starts the inbox worker once per process. Tests call process_pending_events directly."""
+    global _worker_started
+    if app.testing:
+        return
+    with _worker_lock:
+        if _worker_started:
+            return
+        _worker_started = True
+    socketio.start_background_task(_worker_loop, app)
+
+
+def _worker_loop(app):
+    global _wake
+    last_run = 0
+    while True:
+        if _wake or time.time() - last_run >= WEBHOOK_POLL_SECONDS:
+            _wake = False
+            last_run = time.time()
+            with app.app_context():
+                try:
+                    drain_events()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Webhook worker failed: {e}")
+                finally:
+                    db.session.remove()
+        socketio.sleep(0.2)
+
+
+if __name__ == '__main__':
+    # Drain the inbox once, e.g. from cron or after an outage.
+    from app import create_app
+    with create_app().app_context():
+        print(f"Processed {drain_events()} webhook events")
@@ -1,42 +1,154 @@
-import razorpay
-import stripe
 import os
-from utils import get_setting
+import sys
+import threading
+import time
+from datetime import datetime
+from uuid import uuid4
+from flask import current_app
+from models import Setting
+from utils import get_setting, set_setting
+from outbound import razorpay_session, stripe_http_client, budget, stats as outbound_stats
 
-razorpay_client = None
-stripe_api_key = None
+# Gateway clients are built once per worker and cached, including the
+# "not configured" case, so request paths never query settings on their own.
+# Saving gateway settings writes a new version token; each worker compares it
+# at most every VERSION_CHECK_SECONDS and rebuilds its clients when it changed.
+GATEWAY_VERSION_KEY = 'payment_gateways_version'
+VERSION_CHECK_SECONDS = 10
+GATEWAYS = ('razorpay', 'stripe')
 
-def init_payment_clients():
-    global razorpay_client, stripe_api_key
-    
-    # Load from Env
-    rp_id = os.getenv("RAZORPAY_KEY_ID")
-    rp_secret = os.getenv("RAZORPAY_KEY_SECRET")
-    stripe_key = os.getenv("STRIPE_SECRET_KEY")
+_SETTING_KEYS = {
+    'razorpay_key_id': 'RAZORPAY_KEY_ID',
+    'razorpay_key_secret': 'RAZORPAY_KEY_SECRET',
+    'stripe_secret_key': 'STRIPE_SECRET_KEY',
+}
 
-    # Override from DB Settings if available
+
+def _load_config():
+    """Gateway credentials from env, overridden by DB settings, in one query."""
+    config = {key: os.getenv(env) for key, env in _SETTING_KEYS.items()}
+    try:
+        for s in Setting.query.filter(Setting.key.in_(list(_SETTING_KEYS))).all():
+            config[s.key] = s.value
+    except Exception:
+        pass
+    return config
+
+
+def _build_razorpay(config):
+    if not (config['razorpay_key_id'] and config['razorpay_key_secret']):
+        return None
+    try:
+        import razorpay
+        return razorpay.Client(auth=(config['razorpay_key_id'], config['razorpay_key_secret']), session=razorpay_session())
+    except Exception as e:
+        current_app.logger.error(f"Razorpay client init failed: {e}")
+        return None
+
+
+def _clear_stripe_key():
+    """The stripe SDK keeps its key module-global; drop it so direct SDK calls stop authenticating."""
+    stripe = sys.modules.get('stripe')  # not imported just to clear it
+    if stripe is not None:
+        stripe.api_key = None
+
+
+def _build_stripe(config):
+    if not config['stripe_secret_key']:
+        _clear_stripe_key()
+        return None
     try:
-        rp_id = get_setting('razorpay_key_id', rp_id)
-        rp_secret = get_setting('razorpay_key_secret', rp_secret)
-        stripe_key = get_setting('stripe_secret_key', stripe_key)
-    except: pass
-
-    if rp_id and rp_secret:
-        try:
-            razorpay_client = razorpay.Client(auth=(rp_id, rp_secret))
-        except:
-            razorpay_client = None
-    
-    if stripe_key:
-        stripe.api_key = stripe_key
-        stripe_api_key = stripe_key
+        import stripe
+        stripe.api_key = config['stripe_secret_key']
+        stripe.default_http_client = stripe_http_client()
+        stripe.max_network_retries = budget('stripe')['retries']
+        return stripe
+    except Exception as e:
+        _clear_stripe_key()
+        current_app.logger.error(f"Stripe client init failed: {e}")
+        return None
+
+
+class GatewayRegistry:
+    """Per-worker cache of gateway clients keyed by the shared settings version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {name: None for name in GATEWAYS}
+        self._version = None
+        self._checked_at = 0.0
+        self._loaded_at = None
+        self._pinned = False
+        self.reloads = 0
+
+    def _refresh(self):
+        if self._pinned or (self._version is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS):
+            return
+        with self._lock:
+            if self._pinned or (self._version is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS):
+                return
+            version = get_setting(GATEWAY_VERSION_KEY, '')
+            self._checked_at = time.monotonic()
+            if version == self._version:
+                return
+            config = _load_config()
+            self._clients = {'razorpay': _build_razorpay(config), 'stripe': _build_stripe(config)}
+            self._version = version
+            self._loaded_at = datetime.utcnow()
+            self.reloads += 1
+
+    def get(self, name):
+        self._refresh()
+        return self._clients.get(name)
+
+    def invalidate(self):
+        """Forces this worker to rebuild its clients on the next call."""
+        with self._lock:
+            self._version = None
+
+    def install(self, **clients):
+        """Pins the given clients (e.g. fakes in tests) and disables reloading."""
+        with self._lock:
+            self._clients = {name: clients.get(name) for name in GATEWAYS}
+            self._pinned = True
+            self._loaded_at = datetime.utcnow()
+
+    def reset(self):
+        with self._lock:
+            _clear_stripe_key()
+            self._clients = {name: None for name in GATEWAYS}
+            self._pinned = False
+            self._version = None
+
+    def health(self):
+        """Configuration state plus call/latency counters for each gateway."""
+        self._refresh()
+        calls = outbound_stats()
+        return {
+            name: {
+                "configured": self._clients.get(name) is not None,
+                "settings_version": self._version,
+                "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None,
+                "pinned": self._pinned,
+                "reloads": self.reloads,
+                **(calls.get(name) or {"state": "closed", "calls": 0, "errors": 0, "avg_ms": None, "last_error": None})
+            }
+            for name in GATEWAYS
+        }
+
+
+registry = GatewayRegistry()
+
+
+def bump_gateway_settings_version():
+    """Called after gateway settings change so every worker reloads its clients."""
+    set_setting(GATEWAY_VERSION_KEY, uuid4().hex)
+    registry.invalidate()
+
 
 def get_razorpay_client():
-    if not razorpay_client:
-        init_payment_clients()
-    return razorpay_client
+    return registry.get('razorpay')
+
 
 def get_stripe_client():
-    if not stripe_api_key:
-        init_payment_clients()
-    return stripe
+    return registry.get('stripe')
@@ -0,0 +1,261 @@
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from extensions import db
+from models import Order, OrderItem, PaymentTransaction
+from payment_gateway import get_razorpay_client, get_stripe_client
+from utils import get_setting, set_setting, increase_stock, send_notification
+from seller_ledger import credit_orders
+from seller_analytics import record_cancellations
+
+# Settles gateway orders whose verify call or webhook never arrived. Each run
+# looks at unsettled orders created since the previous run (minus a lookback
+# window so slow payments are rechecked), pulls the gateway's payments for the
+# same window with paged list calls, and applies the results in bulk.
+RECONCILE_WATERMARK_KEY = 'payment_reconcile_watermark'
+RECONCILE_REPORT_KEY = 'payment_reconcile_last_report'
+RECONCILE_LOOKBACK = timedelta(hours=24)
+RECONCILE_FAILURE_GRACE = timedelta(minutes=30)
+RECONCILE_PAGE_SIZE = 500
+GATEWAY_PAGE_SIZE = 100
+
+OPEN_STATUSES = ('pending', 'pending_payment')
+
+
+def _ts(dt):
+    return int((dt - datetime(1970, 1, 1)).total_seconds())
+
+
+def get_watermark():
+    value = get_setting(RECONCILE_WATERMARK_KEY)
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def fetch_razorpay_payments(client, since, until):
+    """All Razorpay payments created in [since, until], grouped by Razorpay order id."""
+    by_order = defaultdict(list)
+    skip = 0
+    while True:
+        page = client.payment.all({'from': _ts(since), 'to': _ts(until), 'count': GATEWAY_PAGE_SIZE, 'skip': skip})
+        items = page.get('items', [])
+        for p in items:
+            if p.get('order_id'):
+                by_order[p['order_id']].append(p)
+        if len(items) < GATEWAY_PAGE_SIZE:
+            return by_order
+        skip += len(items)
+
+
+def fetch_stripe_sessions(stripe, since, until):
+    """All Stripe checkout sessions created in [since, until], keyed by session id."""
+    sessions = {}
+    starting_after = None
+    while True:
+        params = {'created': {'gte': _ts(since), 'lte': _ts(until)}, 'limit': GATEWAY_PAGE_SIZE}
+        if starting_after:
+            params['starting_after'] = starting_after
+        page = stripe.checkout.Session.list(**params)
+        for s in page.data:
+            sessions[s.id] = s
+        if not page.has_more or not page.data:
+            return sessions
+        starting_after = page.data[-1].id
+
+
+def _razorpay_state(payments):
+    """(state, transaction_id, amount, failure_reason) for a Razorpay order's payment attempts."""
+    captured = [p for p in payments if p.get('status') in ('captured', 'refunded')]
+    if captured:
+        p = captured[0]
+        return 'paid', p['id'], p.get('amount', 0) / 100.0, None
+    if payments and all(p.get('status') == 'failed' for p in payments):
+        p = payments[0]
+        return 'failed', p['id'], p.get('amount', 0) / 100.0, p.get('error_description') or 'Payment failed'
+    return 'pending', None, None, None
+
+
+def _stripe_state(session):
+    if session.payment_status == 'paid':
+        return 'paid', session.payment_intent or session.id, (session.amount_total or 0) / 100.0, None
+    if session.status == 'expired':
+        return 'failed', session.id, (session.amount_total or 0) / 100.0, 'Checkout session expired'
+    return 'pending', None, None, None
+
+
+class _GatewayState:
+    """Lazily fetches each gateway's payments for the run window, once per run."""
+
+    def __init__(self, since, until, report):
+        self.since, self.until, self.report = since, until, report
+        self._razorpay = self._stripe = None
+
+    def lookup(self, order):
+        if order.payment_gateway in ('razorpay', 'upi'):
+            if self._razorpay is None:
+                client = get_razorpay_client()
+                if not client:
+                    self.report['unavailable'].append('razorpay')
+                    self._razorpay = {}
+                else:
+                    self._razorpay = fetch_razorpay_payments(client, self.since, self.until)
+            return _razorpay_state(self._razorpay.get(order.payment_reference, []))
+        if order.payment_gateway == 'stripe':
+            if self._stripe is None:
+                stripe = get_stripe_client()
+                if not stripe or not stripe.api_key:
+                    self.report['unavailable'].append('stripe')
+                    self._stripe = {}
+                else:
+                    self._stripe = fetch_stripe_sessions(stripe, self.since, self.until)
+            session = self._stripe.get(order.payment_reference)
+            return _stripe_state(session) if session else ('pending', None, None, None)
+        return 'pending', None, None, None
+
+
+def _mismatch(report, order, issue, detail):
+    report['mismatches'].append({
+        "order_id": order.id,
+        "gateway": order.payment_gateway,
+        "reference": order.payment_reference,
+        "issue": issue,
+        "detail": detail
+    })
+
+
+def _claim(ids, *criteria):
+    """Locks the orders in `ids` that still match `criteria`; returns their ids.
+
+    Pages are read unlocked, so the webhook or the buyer may have settled or
+    cancelled some of them since. Only claimed orders are changed.
+    """
+    return {r.id for r in db.session.query(Order.id)
+            .filter(Order.id.in_(ids), *criteria).with_for_update().all()}
+
+
+def _settle_paid(rows, now):
+    """rows: [(order, txn_id, amount)]. Bulk-updates orders and inserts missing transactions; returns the rows settled."""
+    claimed = _claim([o.id for o, _, _ in rows], Order.status.in_(OPEN_STATUSES), Order.payment_status != 'paid')
+    rows = [r for r in rows if r[0].id in claimed]
+    if not rows:
+        return rows
+    ids = [o.id for o, _, _ in rows]
+    Order.query.filter(Order.id.in_(ids)).update(
+        {Order.status: 'paid', Order.payment_status: 'paid'}, synchronize_session=False)
+    known = {r.transaction_id for r in db.session.query(PaymentTransaction.transaction_id)
+             .filter(PaymentTransaction.transaction_id.in_([t for _, t, _ in rows])).all()}
+    txns = [{"order_id": o.id, "amount": amount, "payment_status": 'success', "payment_gateway": o.payment_gateway,
+             "transaction_id": txn_id, "created_at": now}
+            for o, txn_id, amount in rows if txn_id not in known]
+    if txns:
+        db.session.execute(db.insert(PaymentTransaction), txns)
+    credit_orders(ids)
+    return rows
+
+
+def _settle_failed(rows, now):
+    """rows: [(order, txn_id, amount, reason)]. Marks orders failed and releases their stock; returns the rows settled."""
+    claimed = _claim([o.id for o, _, _, _ in rows], Order.status.in_(OPEN_STATUSES), Order.payment_status != 'paid')
+    rows = [r for r in rows if r[0].id in claimed]
+    if not rows:
+        return rows
+    ids = [o.id for o, _, _, _ in rows]
+    Order.query.filter(Order.id.in_(ids)).update(
+        {Order.status: 'payment_failed', Order.payment_status: 'failed'}, synchronize_session=False)
+    record_cancellations(ids)
+    released = db.session.query(OrderItem.product_id, db.func.sum(OrderItem.quantity)) \
+        .filter(OrderItem.order_id.in_(ids)).group_by(OrderItem.product_id).all()
+    for product_id, qty in released:
+        increase_stock(product_id, qty)
+    db.session.execute(db.insert(PaymentTransaction), [
+        {"order_id": o.id, "amount": amount, "payment_status": 'failure', "payment_gateway": o.payment_gateway,
+         "transaction_id": txn_id, "failure_reason": reason, "created_at": now}
+        for o, txn_id, amount, reason in rows
+    ])
+    return rows
+
+
+def reconcile_payments(now=None, lookback=RECONCILE_LOOKBACK, page_size=RECONCILE_PAGE_SIZE, notify=True):
+    """
+    Reconciles unsettled gateway orders created since the last run and advances the
+    watermark. Returns a report of settled orders and mismatches needing review.
+    """
+    now = now or datetime.utcnow()
+    watermark = get_watermark()
+    since = (watermark or now) - lookback
+    report = {"since": since.isoformat(), "until": now.isoformat(), "checked": 0, "paid": [], "failed": [],
+              "pending": 0, "mismatches": [], "unavailable": []}
+    gateways = _GatewayState(since, now, report)
+
+    unsettled = Order.query.filter(
+        Order.payment_reference.isnot(None),
+        Order.payment_gateway.in_(('razorpay', 'upi', 'stripe')),
+        Order.payment_status.in_(('unpaid', 'failed')),
+        Order.created_at >= since,
+        Order.created_at <= now
+    ).order_by(Order.id)
+
+    last_id = 0
+    while True:
+        orders = unsettled.filter(Order.id > last_id).limit(page_size).all()
+        if not orders:
+            break
+        last_id = orders[-1].id
+        paid, failed = [], []
+        for order in orders:
+            report['checked'] += 1
+            state, txn_id, amount, reason = gateways.lookup(order)
+            if state == 'paid':
+                if order.status not in OPEN_STATUSES:
+                    _mismatch(report, order, 'captured_after_close', f"Gateway captured {amount} but order is {order.status}")
+                elif abs(amount - (order.total_amount or 0)) > 0.01:
+                    _mismatch(report, order, 'amount_mismatch', f"Gateway captured {amount}, order total {order.total_amount}")
+                else:
+                    paid.append((order, txn_id, amount))
+            elif state == 'failed' and order.status in OPEN_STATUSES and order.created_at <= now - RECONCILE_FAILURE_GRACE:
+                failed.append((order, txn_id, amount, reason))
+            elif order.status in OPEN_STATUSES:
+                report['pending'] += 1
+
+        if paid:
+            paid = _settle_paid(paid, now)
+        if failed:
+            failed = _settle_failed(failed, now)
+        db.session.commit()
+        report['paid'].extend(o.id for o, _, _ in paid)
+        report['failed'].extend(o.id for o, _, _, _ in failed)
+
+        if notify:
+            for order, _, _ in paid:
+                send_notification(order.user.email, "Payment Success", f"Order #{order.id} paid.", user_id=order.user_id)
+            for order, _, _, reason in failed:
+                send_notification(order.user.email, f"Payment Failed for Order #{order.id}",
+                                  f"Your payment for order #{order.id} of {order.total_amount} failed. Reason: {reason}. Stock has been released.",
+                                  sms_to=order.user.phone)
+        db.session.expunge_all()
+
+    if not report['unavailable']:
+        set_setting(RECONCILE_WATERMARK_KEY, now.isoformat())
+    set_setting(RECONCILE_REPORT_KEY, json.dumps(report))
+    return report
+
+
+def last_report():
+    value = get_setting(RECONCILE_REPORT_KEY)
+    return json.loads(value) if value else None
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description="Reconcile unsettled gateway payments (run every few minutes from cron).")
+    parser.add_argument('--lookback-hours', type=float, default=RECONCILE_LOOKBACK.total_seconds() / 3600)
+    parser.add_argument('--no-notify', action='store_true', help="Do not email customers about settled orders")
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        result = reconcile_payments(lookback=timedelta(hours=args.lookback_hours), notify=not args.no_notify)
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,418 @@
+import csv
+import io
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+from uuid import uuid4
+from flask import current_app
+from werkzeug.utils import secure_filename
+from extensions import db, socketio
+from models import Product, Inventory, Category, File, ProductImage, ProductImportJob
+from cart_store import invalidate_products
+import httpx
+from outbound import CircuitBreaker, budget
+from image_variants import queue_variants
+import file_store
+
+# Bulk catalog import. The upload is stored and a ProductImportJob is queued;
+# a background task streams the file in chunks, validates each row, and upserts
+# products and inventory by (seller, SKU) with one bulk insert and one bulk
+# update per chunk. Image URLs are downloaded by a small thread pool after the
+# chunk is committed. Rejected rows are written to a per-job error CSV and the
+# job row carries the progress counters the seller polls.
+# Image URLs are arbitrary third-party hosts, so they do not go through the
+# shared outbound clients: each hop is resolved once, checked to be public and
+# connected to by that address (no second lookup to rebind), redirects are
+# followed by hand and re-checked, bodies are streamed and cut off at
+# MAX_IMAGE_BYTES, and each host has its own circuit breaker.
+IMPORT_CHUNK_SIZE = 500
+IMAGE_WORKERS = 4
+MAX_IMAGES_PER_ROW = 5
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+ALLOWED_EXTENSIONS = ('.csv', '.xlsx')
+IMAGE_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+MAX_IMAGE_REDIRECTS = 3
+MAX_HOST_BREAKERS = 1000
+
+_image_lock = threading.Lock()
+_image_client = None
+_host_breakers = {}
+
+
+def import_dir():
+    path = os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_rows(path):
+    """Yields (row_number, {column: text}) without loading the whole file. Row 1 is the header."""
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [_cell(h).lower() for h in next(rows, ())]
+            for n, values in enumerate(rows, start=2):
+                if any(v is not None for v in values):
+                    yield n, {h: _cell(v) for h, v in zip(header, values) if h}
+        finally:
+            wb.close()
+        return
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader, [])]
+        for n, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield n, {h: v.strip() for h, v in zip(header, values) if h}
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CategoryLookup:
+    """Categories a seller may list under, keyed by lower-cased slug and name. Loaded once per job."""
+
+    def __init__(self, seller_id):
+        rows = db.session.query(Category.id, Category.slug, Category.name).filter(db.or_(
+            Category.seller_id.is_(None), Category.is_approved == True, Category.seller_id == seller_id
+        )).all()
+        self._ids = {}
+        for r in rows:
+            self._ids.setdefault(r.name.lower(), r.id)
+            self._ids[r.slug.lower()] = r.id
+
+    def resolve(self, value):
+        return self._ids.get(value.strip().lower()) if value else None
+
+
+def _validate(raw, categories):
+    """Returns (clean row, None) or (None, error message)."""
+    sku, name = raw.get('sku', ''), raw.get('name', '')
+    if not sku:
+        return None, "Missing sku"
+    if len(sku) > 50:
+        return None, "sku longer than 50 characters"
+    if not name:
+        return None, "Missing name"
+    try:
+        price = float(raw.get('price') or '')
+        mrp = float(raw['mrp']) if raw.get('mrp') else 0.0
+        stock_qty = int(float(raw['stock_qty'])) if raw.get('stock_qty') else 0
+    except ValueError:
+        return None, "price, mrp and stock_qty must be numbers"
+    if price <= 0 or mrp < 0 or stock_qty < 0:
+        return None, "price must be positive; mrp and stock_qty cannot be negative"
+    category_id = categories.resolve(raw.get('category'))
+    if not category_id:
+        return None, f"Unknown category: {raw.get('category') or '(blank)'}"
+    specifications = None
+    if raw.get('specifications'):
+        try:
+            specifications = json.loads(raw['specifications'])
+        except ValueError:
+            return None, "specifications must be a JSON object"
+        if not isinstance(specifications, dict):
+            return None, "specifications must be a JSON object"
+    urls = [u for u in raw.get('image_urls', '').replace(',', '|').split('|') if u.strip()]
+    return {
+        "sku": sku,
+        "name": name[:200],
+        "description": raw.get('description', ''),
+        "price": price,
+        "mrp": mrp,
+        "brand": raw.get('brand') or None,
+        "category_id": category_id,
+        "specifications": specifications,
+        "stock_qty": stock_qty,
+        "image_urls": [u.strip() for u in urls[:MAX_IMAGES_PER_ROW]]
+    }, None
+
+
+def _upsert(seller_id, rows):
+    """
+    Inserts new SKUs and updates existing ones for the seller in bulk.
+    Returns ({sku: product_id}, [updated product ids]).
+    """
+    if not rows:
+        return {}, []
+    existing = {}
+    for pid, sku in db.session.query(Product.id, Product.sku) \
+            .filter(Product.seller_id == seller_id, Product.sku.in_([r['sku'] for r in rows])) \
+            .order_by(Product.id.desc()):
+        existing[sku] = pid
+
+    fields = ('name', 'description', 'price', 'mrp', 'brand', 'category_id', 'specifications')
+    updates = [dict({f: r[f] for f in fields}, id=existing[r['sku']]) for r in rows if r['sku'] in existing]
+    inserts = [dict({f: r[f] for f in fields}, sku=r['sku'], seller_id=seller_id, status='pending', created_at=datetime.utcnow())
+               for r in rows if r['sku'] not in existing]
+
+    ids = dict(existing)
+    if updates:
+        db.session.execute(db.update(Product), updates)
+    if inserts:
+        for pid, sku in db.session.execute(db.insert(Product).returning(Product.id, Product.sku), inserts):
+            ids[sku] = pid
+
+    stock = {ids[r['sku']]: r['stock_qty'] for r in rows}
+    inventory = dict(db.session.query(Inventory.product_id, Inventory.id).filter(Inventory.product_id.in_(list(stock))).all())
+    inv_updates = [{"id": inventory[pid], "stock_qty": qty} for pid, qty in stock.items() if pid in inventory]
+    inv_inserts = [{"product_id": pid, "stock_qty": qty} for pid, qty in stock.items() if pid not in inventory]
+    if inv_updates:
+        db.session.execute(db.update(Inventory), inv_updates)
+    if inv_inserts:
+        db.session.execute(db.insert(Inventory), inv_inserts)
+    return ids, [u['id'] for u in updates]
+
+
+def _resolve_public(url):
+    """Returns (parsed url, address) for an http(s) URL whose host resolves only to public addresses."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("Image URL must be http(s)")
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    addresses = sorted({info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)})
+    if not addresses or not all(ipaddress.ip_address(a).is_global for a in addresses):
+        raise ValueError("Image URL must point to a public host")
+    return parsed, addresses[0]
+
+
+def images_client():
+    """
+    Client for image downloads. It never follows redirects or reads proxy
+    settings, and keeps no idle connections: requests go to IP addresses, so a
+    pooled TLS connection could otherwise be reused for another host name.
+    """
+    global _image_client
+    with _image_lock:
+        if _image_client is None:
+            cfg = budget('product_images')
+            _image_client = httpx.Client(timeout=httpx.Timeout(cfg['timeout'], connect=cfg['connect']),
+                                         limits=httpx.Limits(max_keepalive_connections=0),
+                                         follow_redirects=False, trust_env=False)
+        return _image_client
+
+
+def host_breaker(host):
+    with _image_lock:
+        if host not in _host_breakers:
+            if len(_host_breakers) >= MAX_HOST_BREAKERS:
+                _host_breakers.clear()
+            _host_breakers[host] = CircuitBreaker(f"product_images:{host}")
+        return _host_breakers[host]
+
+
+def _read_image(response, deadline):
+    if response.status_code != 200:
+        raise ValueError(f"HTTP {response.status_code}")
+    content_type = response.headers.get('content-type', '').split(';')[0].strip().lower()
+    if content_type not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Not an image ({content_type or 'no content type'})")
+    if int(response.headers.get('content-length') or 0) > MAX_IMAGE_BYTES:
+        raise ValueError("Image larger than 5 MB")
+    body = bytearray()
+    for chunk in response.iter_bytes():
+        body.extend(chunk)
+        if len(body) > MAX_IMAGE_BYTES:
+            raise ValueError("Image larger than 5 MB")
+        if time.monotonic() > deadline:
+            raise ValueError("Image download timed out")
+    return bytes(body), IMAGE_EXTENSIONS[content_type]
+
+
+def _fetch_image(url):
+    client = images_client()
+    deadline = time.monotonic() + budget('product_images')['timeout']
+    for _ in range(MAX_IMAGE_REDIRECTS + 1):
+        parsed, address = _resolve_public(url)
+        # Connect to the address that was checked; Host and SNI keep the name
+        target = httpx.URL(url).copy_with(host=address)
+        extensions = {'sni_hostname': parsed.hostname} if parsed.scheme == 'https' else {}
+        request = client.build_request('GET', target, headers={'Host': httpx.URL(url).netloc.decode('ascii')},
+                                       extensions=extensions)
+        circuit = host_breaker(parsed.hostname)
+        circuit.before_call()
+        start = time.monotonic()
+        try:
+            response = client.send(request, stream=True)
+        except httpx.TransportError as e:
+            circuit.record(False, (time.monotonic() - start) * 1000, repr(e))
+            raise
+        failed = response.status_code >= 500
+        circuit.record(not failed, (time.monotonic() - start) * 1000, f"HTTP {response.status_code}" if failed else None)
+        try:
+            if response.is_redirect:
+                url = urljoin(url, response.headers['location'])
+                continue
+            return _read_image(response, deadline)
+        finally:
+            response.close()
+    raise ValueError("Too many redirects")
+
+
+def _download(task):
+    row_number, sku, product_id, position, url = task
+    try:
+        return task, _fetch_image(url), None
+    except Exception as e:
+        return task, None, f"Image {url}: {e}"
+
+
+def _attach_images(seller_id, rows, ids, upload_folder):
+    """
+    Downloads image URLs for products that have no images yet (so re-importing
+    does not duplicate them) and links them in bulk. Returns (new file ids, errors).
+    """
+    wanted = [(n, r) for n, r in rows if r['image_urls']]
+    if not wanted:
+        return [], []
+    has_images = {pid for (pid,) in db.session.query(ProductImage.product_id).filter(
+        ProductImage.product_id.in_([ids[r['sku']] for _, r in wanted])).distinct()}
+    tasks = [(n, r['sku'], ids[r['sku']], pos, url)
+             for n, r in wanted if ids[r['sku']] not in has_images
+             for pos, url in enumerate(r['image_urls'])]
+    if not tasks:
+        return [], []
+
+    files, links, errors = [], [], []
+    with ThreadPoolExecutor(max_workers=IMAGE_WORKERS) as pool:
+        for (n, sku, product_id, position, url), result, error in pool.map(_download, tasks):
+            if error:
+                errors.append((n, sku, error))
+                continue
+            content, ext = result
+            original = secure_filename(os.path.basename(urlparse(url).path)) or f"{sku}{ext}"
+            stored = f"{uuid4().hex}_{original}"
+            sha256, name, size, _ = file_store.write_blob(io.BytesIO(content), upload_folder, f"x{ext}")
+            file_store.acquire(sha256, name, size)
+            files.append({"owner_id": seller_id, "filename": original, "stored_filename": stored,
+                          "filepath": os.path.join(upload_folder, name), "size": size, "sha256": sha256, "status": 'active'})
+            links.append((stored, product_id, position))
+
+    file_ids = {}
+    if files:
+        file_ids = dict((stored, fid) for fid, stored in db.session.execute(
+            db.insert(File).returning(File.id, File.stored_filename), files))
+        db.session.execute(db.insert(ProductImage), [
+            {"product_id": product_id, "file_id": file_ids[stored], "position": position}
+            for stored, product_id, position in links
+        ])
+    return list(file_ids.values()), errors
+
+
+def create_job(seller_id, upload):
+    """Stores the uploaded file and queues a job for it."""
+    filename = secure_filename(upload.filename or '')
+    if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise ValueError("Upload a .csv or .xlsx file")
+    path = os.path.join(import_dir(), f"{uuid4().hex}_{filename}")
+    upload.save(path)
+    job = ProductImportJob(seller_id=seller_id, filename=filename, source_path=path, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def run_import(job_id, chunk_size=IMPORT_CHUNK_SIZE):
+    """Runs a queued job to completion, committing after every chunk."""
+    job = db.session.get(ProductImportJob, job_id)
+    if not job or job.status != 'queued':
+        return job
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    job.error_path = os.path.join(import_dir(), f"job_{job.id}_errors.csv")
+    db.session.commit()
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    seller_id = job.seller_id
+    categories = CategoryLookup(seller_id)
+    seen = set()
+    try:
+        with open(job.error_path, 'w', newline='') as ef:
+            errors = csv.writer(ef)
+            errors.writerow(('row', 'sku', 'error'))
+            for chunk in _chunks(iter_rows(job.source_path), chunk_size):
+                valid = []
+                for n, raw in chunk:
+                    clean, error = _validate(raw, categories)
+                    if clean and clean['sku'] in seen:
+                        clean, error = None, "Duplicate sku in file"
+                    if error:
+                        errors.writerow((n, raw.get('sku', ''), error))
+                        job.error_count += 1
+                        continue
+                    seen.add(clean['sku'])
+                    valid.append((n, clean))
+
+                ids, updated = _upsert(seller_id, [r for _, r in valid])
+                job.total_rows += len(chunk)
+                job.updated_count += len(updated)
+                job.created_count += len(valid) - len(updated)
+                db.session.commit()
+                if updated:
+                    invalidate_products(updated)
+
+                saved, image_errors = _attach_images(seller_id, valid, ids, upload_folder)
+                for row in image_errors:
+                    errors.writerow(row)
+                job.error_count += len(image_errors)
+                job.images_saved += len(saved)
+                db.session.commit()
+                queue_variants(saved)
+        job.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Product import {job_id} failed: {e}")
+        job = db.session.get(ProductImportJob, job_id)
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def start_import(app, job_id):
+    """Runs the job in a background task. Tests call run_import directly."""
+    if app.testing:
+        return
+    socketio.start_background_task(_run_in_context, app, job_id)
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_import(job_id)
+        finally:
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    # Run queued jobs by hand, e.g. after a restart interrupted the worker.
+    import sys
+    from app import create_app
+    with create_app().app_context():
+        ids = [int(a) for a in sys.argv[1:]] or [j.id for j in ProductImportJob.query.filter_by(status='queued')]
+        for job_id in ids:
+            print(run_import(job_id).to_dict())
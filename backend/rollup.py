@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from extensions import db
+
+# Helpers shared by the rollup tables (seller_daily_sales, daily_order_stats):
+# counter upserts in the caller's transaction, and date bucketing done on the
+# daily rows in Python, so the same code runs on SQLite and PostgreSQL.
+GROUPS = ('day', 'week', 'month')
+
+
+def increment(model, keys, counters, rows):
+    """
+    Adds `counters` of each row to the row with the same `keys`, creating it
+    as needed. Uses INSERT .. ON CONFLICT DO UPDATE where the dialect has it.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    now = datetime.utcnow()
+    for r in rows:
+        r['updated_at'] = now
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        set_ = {c: table.c[c] + stmt.excluded[c] for c in counters}
+        set_['updated_at'] = stmt.excluded.updated_at
+        db.session.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_), rows)
+        return
+    # Other databases: update the rows that exist, insert the rest.
+    key_columns = [getattr(model, k) for k in keys]
+    wanted = {tuple(r[k] for k in keys) for r in rows}
+    existing = {tuple(k) for k in db.session.query(*key_columns).filter(db.tuple_(*key_columns).in_(list(wanted)))}
+    updates = [r for r in rows if tuple(r[k] for k in keys) in existing]
+    if updates:
+        db.session.execute(
+            db.update(table).where(*[table.c[k] == db.bindparam(f'k_{k}') for k in keys])
+            .values({c: table.c[c] + db.bindparam(f'b_{c}') for c in counters}, updated_at=now),
+            [dict({f'b_{c}': r[c] for c in counters}, **{f'k_{k}': r[k] for k in keys}) for r in updates]
+        )
+    inserts = [r for r in rows if tuple(r[k] for k in keys) not in existing]
+    if inserts:
+        db.session.execute(db.insert(table), inserts)
+
+
+def bucket(day, group):
+    """First day of the day/week (Monday)/month containing `day`."""
+    if group == 'week':
+        return day - timedelta(days=day.weekday())
+    if group == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def label(day, group):
+    """
+    Chart label of the period containing `day`, as the old strftime('%Y-%W')
+    query made them. Weeks restart at week 00 on 1 January, so a week that
+    spans New Year gets two labels; group by label rather than by bucket().
+    """
+    if group == 'week':
+        return day.strftime('%Y-%W')
+    if group == 'month':
+        return day.strftime('%Y-%m')
+    return day.isoformat()
@@ -1,90 +1,44 @@
-from flask import Blueprint, request, jsonify, abort, current_app
+from flask import Blueprint, request, jsonify, abort, current_app, Response, stream_with_context
 from extensions import db
-from models import User, Address, Product, Order, OrderItem, WithdrawalRequest, PaymentRecord, SellerRequest, SupportTicket, Setting, Category, Inventory, File, ProductImage, CategoryPermission, Coupon, Advertisement
-from utils import role_required, set_setting, get_setting, send_notification, emit_update, increase_stock
+from models import User, Address, Product, WithdrawalRequest, PaymentRecord, SellerRequest, SupportTicket, Setting, Category, Inventory, ProductImage, CategoryPermission, Coupon, Advertisement, NotificationJob
+from utils import role_required, set_setting, get_setting, emit_update, increase_stock
+from cart_store import invalidate_products
+from seller_ledger import reverse_withdrawal
+from image_variants import queue_variants
+import file_store
+import admin_stats
+import admin_lists
+import notification_fanout
+import log_viewer
 from datetime import datetime, timedelta
-from werkzeug.utils import secure_filename
-from uuid import uuid4
-import os
-import requests
 from flask_jwt_extended import get_jwt_identity
 
 admin_bp = Blueprint('admin', __name__)
 
+def _list(spec):
+    try:
+        return jsonify(admin_lists.page(spec, request.args))
+    except ValueError as e:
+        abort(400, description=str(e))
+
 @admin_bp.route('/dashboard', methods=['GET'])
 @role_required('admin')
 def admin_dashboard():
-    start_str = request.args.get('start_date')
-    end_str = request.args.get('end_date')
-    interval = request.args.get('interval', 'day')
-
-    order_query = Order.query
-    if start_str:
-        try:
-            start_date = datetime.fromisoformat(start_str)
-            order_query = order_query.filter(Order.created_at >= start_date)
-        except: pass
-    if end_str:
-        try:
-            end_date = datetime.fromisoformat(end_str) + timedelta(days=1)
-            order_query = order_query.filter(Order.created_at < end_date)
-        except: pass
-
-    total_orders = order_query.count()
-    total_sales = db.session.query(db.func.sum(Order.total_amount)).select_from(Order).filter(
-        Order.id.in_([o.id for o in order_query.with_entities(Order.id).all()])
-    ).scalar() or 0
-
-    total_users = User.query.filter_by(role='user').count()
-    total_sellers = User.query.filter_by(role='seller').count()
-    pending_withdrawals = WithdrawalRequest.query.filter_by(status='requested').count()
-
-    if interval == 'month':
-        fmt = '%Y-%m'
-    elif interval == 'week':
-        fmt = '%Y-%W'
-    else:
-        fmt = '%Y-%m-%d'
-
-    graph_query = db.session.query(
-        db.func.strftime(fmt, Order.created_at).label('period'),
-        db.func.count(Order.id),
-        db.func.sum(Order.total_amount)
-    )
-    
-    if start_str:
-        try:
-            graph_query = graph_query.filter(Order.created_at >= datetime.fromisoformat(start_str))
-        except: pass
-    if end_str:
-        try:
-            graph_query = graph_query.filter(Order.created_at < datetime.fromisoformat(end_str) + timedelta(days=1))
-        except: pass
-        
-    graph_results = graph_query.group_by('period').order_by('period').all()
-    
-    chart_data = []
-    for res in graph_results:
-        chart_data.append({
-            "name": res[0],
-            "orders": res[1],
-            "sales": res[2] or 0
-        })
-
-    return jsonify({
-        "total_users": total_users,
-        "total_sellers": total_sellers,
-        "total_orders": total_orders,
-        "total_sales": total_sales,
-        "pending_withdrawals": pending_withdrawals,
-        "chart_data": chart_data
-    })
+    start, end = None, None
+    try:
+        if request.args.get('start_date'):
+            start = datetime.fromisoformat(request.args['start_date']).date()
+    except ValueError: pass
+    try:
+        if request.args.get('end_date'):
+            end = datetime.fromisoformat(request.args['end_date']).date()
+    except ValueError: pass
+    return jsonify(admin_stats.dashboard(start, end, request.args.get('interval', 'day')))
 
 @admin_bp.route('/users', methods=['GET'])
 @role_required('admin')
 def admin_users():
-    users = User.query.all()
-    return jsonify([u.to_dict() for u in users])
+    return _list(admin_lists.USERS)
 
 @admin_bp.route('/users', methods=['POST'])
 @role_required('admin')
@@ -140,8 +94,7 @@ def admin_delete_user(user_id):
 @admin_bp.route('/sellers', methods=['GET'])
 @role_required('admin')
 def admin_sellers():
-    sellers = User.query.filter_by(role='seller').all()
-    return jsonify([s.to_dict() for s in sellers])
+    return _list(admin_lists.SELLERS)
 
 @admin_bp.route('/sellers', methods=['POST'])
 @role_required('admin')
@@ -249,13 +202,7 @@ def admin_reject_seller_request(req_id):
 @admin_bp.route('/products', methods=['GET'])
 @role_required('admin')
 def admin_list_products():
-    products = Product.query.all()
-    response = []
-    for p in products:
-        prod_dict = p.to_dict()
-        prod_dict['seller_name'] = p.seller.name if p.seller else "Unknown"
-        response.append(prod_dict)
-    return jsonify(response)
+    return _list(admin_lists.PRODUCTS)
 
 @admin_bp.route('/products', methods=['POST'])
 @role_required('admin')
@@ -309,20 +256,16 @@ def admin_add_product():
         db.session.add(inventory)
         
         upload_folder = current_app.config['UPLOAD_FOLDER']
+        new_files = []
         for idx, f in enumerate(files or []):
             if not f or f.filename == '': continue
-            filename = secure_filename(f.filename)
-            unique_name = f"{uuid4().hex}_{filename}"
-            save_path = os.path.join(upload_folder, unique_name)
-            f.save(save_path)
-            size = os.path.getsize(save_path)
-            frec = File(owner_id=get_jwt_identity(), filename=filename, stored_filename=unique_name, filepath=save_path, size=size, status='active')
-            db.session.add(frec)
-            db.session.flush()
+            frec, _ = file_store.store_file(f, get_jwt_identity(), upload_folder)
+            new_files.append(frec.id)
             pi = ProductImage(product_id=product.id, file_id=frec.id, position=idx)
             db.session.add(pi)
 
         db.session.commit()
+        queue_variants(new_files)
         emit_update('product', 'created', product.to_dict())
         return jsonify(product.to_dict()), 201
     except Exception as e:
@@ -332,13 +275,7 @@ def admin_add_product():
 @admin_bp.route('/products-for-approval', methods=['GET'])
 @role_required('admin')
 def admin_pending_products():
-    products = Product.query.filter_by(status='pending').all()
-    response = []
-    for p in products:
-        prod_dict = p.to_dict()
-        prod_dict['seller_name'] = p.seller.name
-        response.append(prod_dict)
-    return jsonify(response)
+    return _list(admin_lists.PENDING_PRODUCTS)
 
 @admin_bp.route('/products/<int:product_id>/status', methods=['PUT'])
 @role_required('admin')
@@ -347,68 +284,18 @@ def admin_approve_product(product_id):
     data = request.json or {}
     product.status = data.get('status')
     db.session.commit()
+    invalidate_products([product.id])
     return jsonify(product.to_dict())
 
 @admin_bp.route('/orders', methods=['GET'])
 @role_required('admin')
 def admin_list_orders():
-    sku = request.args.get('sku')
-    status = request.args.get('status')
-    category_id = request.args.get('category_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    query = Order.query.join(User)
-
-    if status:
-        query = query.filter(Order.status == status)
-    if start_date:
-        try: query = query.filter(Order.created_at >= datetime.fromisoformat(start_date))
-        except: pass
-    if end_date:
-        try: query = query.filter(Order.created_at <= datetime.fromisoformat(end_date))
-        except: pass
-
-    if sku or category_id:
-        query = query.join(OrderItem).join(Product)
-        if sku: query = query.filter(Product.sku.ilike(f"%{sku}%"))
-        if category_id: query = query.filter(Product.category_id == category_id)
-        query = query.distinct()
-
-    orders = query.order_by(Order.created_at.desc()).all()
-    
-    res = []
-    for o in orders:
-        sellers = set()
-        for item in o.items:
-            if item.seller: sellers.add(item.seller.name)
-        res.append({
-            "id": o.id,
-            "customer_name": o.user.name,
-            "user_name": o.user.name,
-            "seller_names": ", ".join(sellers),
-            "total": o.total_amount,
-            "status": o.status,
-            "created_at": o.created_at.isoformat()
-        })
-    return jsonify(res)
+    return _list(admin_lists.ORDERS)
 
 @admin_bp.route('/withdrawals', methods=['GET'])
 @role_required('admin')
 def admin_withdrawals():
-    reqs = WithdrawalRequest.query.all()
-    result = []
-    for r in reqs:
-        result.append({
-            "id": r.id,
-            "seller_id": r.seller_id,
-            "amount": r.amount,
-            "seller_name": r.seller.name,
-            "status": r.status,
-            "requested_at": r.requested_at.isoformat(),
-            "payments": [{"id": p.id, "amount": p.amount, "method": p.method, "paid_at": p.paid_at.isoformat() if p.paid_at else None} for p in r.payments]
-        })
-    return jsonify(result)
+    return _list(admin_lists.WITHDRAWALS)
 
 @admin_bp.route('/withdrawals/<int:req_id>/approve', methods=['PUT'])
 @role_required('admin')
@@ -435,6 +322,7 @@ def admin_reject_withdrawal(req_id):
     data = request.json or {}
     wr.status = 'rejected'
     wr.rejection_reason = data.get('reason', 'No reason')
+    reverse_withdrawal(wr)
     db.session.commit()
     return jsonify(message="Withdrawal rejected")
 
@@ -451,8 +339,7 @@ def admin_mark_withdrawal_paid(req_id):
 @admin_bp.route('/support', methods=['GET'])
 @role_required('admin')
 def admin_get_support_tickets():
-    tickets = SupportTicket.query.order_by(SupportTicket.created_at.desc()).all()
-    return jsonify([t.to_dict() for t in tickets])
+    return _list(admin_lists.SUPPORT_TICKETS)
 
 @admin_bp.route('/support/<int:id>/status', methods=['PUT'])
 @role_required('admin')
@@ -490,31 +377,30 @@ def admin_send_notification():
 
     if not all([target, subject, message]):
         return jsonify({"error": "Missing required fields"}), 400
+    if target not in notification_fanout.TARGETS:
+        return jsonify({"error": "Invalid target"}), 400
 
-    recipients = []
     if target == 'specific':
         if not user_id: return jsonify({"error": "User ID required"}), 400
-        user = User.query.get(user_id)
-        if user: recipients.append(user)
-    elif target == 'all_sellers':
-        recipients = User.query.filter_by(role='seller').all()
-    elif target == 'all_users':
-        recipients = User.query.filter_by(is_active=True).all()
+        try: user_id = int(user_id)
+        except (TypeError, ValueError): return jsonify({"error": "Invalid user ID"}), 400
+        if not db.session.get(User, user_id): return jsonify({"error": "User not found"}), 404
     else:
-        return jsonify({"error": "Invalid target"}), 400
+        user_id = None
 
-    count = 0
-    for r in recipients:
-        send_notification(r.email, subject, message, user_id=r.id)
-        count += 1
+    job = notification_fanout.create_job(int(get_jwt_identity()), target, subject, message, user_id=user_id)
+    notification_fanout.start_fanout(current_app._get_current_object(), job.id)
+    return jsonify(dict(job.to_dict(), message=f"Sending notification to {job.total} recipients")), 202
 
-    return jsonify({"message": f"Notification sent to {count} recipients"})
+@admin_bp.route('/notifications/jobs/<int:job_id>', methods=['GET'])
+@role_required('admin')
+def admin_notification_job(job_id):
+    return jsonify(NotificationJob.query.get_or_404(job_id).to_dict())
 
 @admin_bp.route('/ads', methods=['GET'])
 @role_required('admin')
 def admin_list_ads():
-    ads = Advertisement.query.order_by(Advertisement.priority.desc()).all()
-    return jsonify([a.to_dict() for a in ads])
+    return _list(admin_lists.ADS)
 
 @admin_bp.route('/ads', methods=['POST'])
 @role_required('admin')
@@ -598,15 +484,26 @@ def admin_delete_ad(ad_id):
 @admin_bp.route('/logs', methods=['GET'])
 @role_required('admin')
 def admin_get_logs():
-    log_path = os.path.join(current_app.instance_path, 'app.log')
+    filters = _log_filters()
+    limit = min(max(request.args.get('limit', log_viewer.DEFAULT_LIMIT, type=int), 1), log_viewer.MAX_LIMIT)
+    records = log_viewer.tail(log_viewer.log_dir(), filters, limit)
+    return jsonify({"entries": [log_viewer.to_dict(r) for r in records]})
+
+@admin_bp.route('/logs/download', methods=['GET'])
+@role_required('admin')
+def admin_download_logs():
+    filters = _log_filters()
+    return Response(
+        stream_with_context(log_viewer.iter_export(log_viewer.log_dir(), filters)),
+        mimetype='text/plain',
+        headers={"Content-Disposition": "attachment; filename=app-log.txt"}
+    )
+
+def _log_filters():
     try:
-        if not os.path.exists(log_path):
-            return jsonify({"logs": []})
-        with open(log_path, 'r') as f:
-            lines = f.readlines()
-            return jsonify({"logs": lines[-100:]})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return log_viewer.parse_filters(request.args)
+    except ValueError as e:
+        abort(400, description=str(e))
 
 @admin_bp.route('/site-settings', methods=['GET'])
 @role_required('admin')
@@ -648,11 +545,8 @@ def admin_create_category():
     
     image_filename = None
     if file and file.filename:
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid4().hex}_{filename}"
-        save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_name)
-        file.save(save_path)
-        image_filename = unique_name
+        blob, _ = file_store.save_blob(file, current_app.config['UPLOAD_FOLDER'])
+        image_filename = blob.path
 
     cat = Category(name=name, slug=slug, description=data.get('description', ''), image=image_filename, is_approved=True)
     db.session.add(cat)
@@ -682,14 +576,16 @@ def admin_update_category(id):
         else:
             cat.is_approved = bool(val)
             
+    freed = []
     if file and file.filename:
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid4().hex}_{filename}"
-        save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_name)
-        file.save(save_path)
-        cat.image = unique_name
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        blob, _ = file_store.save_blob(file, upload_folder)
+        # Release after acquiring, so re-uploading the same image nets to zero
+        freed = file_store.release([file_store.sha_from_name(cat.image)], upload_folder)
+        cat.image = blob.path
 
     db.session.commit()
+    file_store.remove_files(freed)
     return jsonify(cat.to_dict())
 
 @admin_bp.route('/categories/<int:id>', methods=['DELETE'])
@@ -698,8 +594,10 @@ def admin_delete_category(id):
     cat = Category.query.get_or_404(id)
     if Product.query.filter_by(category_id=id).first():
         return jsonify({"error": "Cannot delete category with products"}), 400
+    freed = file_store.release([file_store.sha_from_name(cat.image)], current_app.config['UPLOAD_FOLDER'])
     db.session.delete(cat)
     db.session.commit()
+    file_store.remove_files(freed)
     return jsonify({"message": "Category deleted"})
 
 @admin_bp.route('/payment-gateways', methods=['GET'])
@@ -709,11 +607,13 @@ def admin_get_payment_gateways():
     rp_key = get_setting('razorpay_key_id', '')
     rp_secret = get_setting('razorpay_key_secret', '')
     st_key = get_setting('stripe_secret_key', '')
+    rp_webhook = get_setting('razorpay_webhook_secret', '')
     st_webhook = get_setting('stripe_webhook_secret', '')
     
     return jsonify({
         "razorpay_key_id": rp_key,
         "razorpay_key_secret": "********" if rp_secret else "",
+        "razorpay_webhook_secret": "********" if rp_webhook else "",
         "stripe_secret_key": "********" if st_key else "",
         "stripe_webhook_secret": "********" if st_webhook else ""
     })
@@ -727,43 +627,50 @@ def admin_update_payment_gateways():
         set_setting('razorpay_key_id', data['razorpay_key_id'])
     if data.get('razorpay_key_secret') and '****' not in data['razorpay_key_secret']:
         set_setting('razorpay_key_secret', data['razorpay_key_secret'])
+    if data.get('razorpay_webhook_secret') and '****' not in data['razorpay_webhook_secret']:
+        set_setting('razorpay_webhook_secret', data['razorpay_webhook_secret'])
         
     if data.get('stripe_secret_key') and '****' not in data['stripe_secret_key']:
         set_setting('stripe_secret_key', data['stripe_secret_key'])
     if data.get('stripe_webhook_secret') and '****' not in data['stripe_webhook_secret']:
         set_setting('stripe_webhook_secret', data['stripe_webhook_secret'])
         
-    # Trigger reload of payment clients
-    from payment_gateway import init_payment_clients
-    init_payment_clients()
+    # Reload payment clients in every worker
+    from payment_gateway import bump_gateway_settings_version
+    bump_gateway_settings_version()
         
     return jsonify(message="Payment settings updated")
 
+@admin_bp.route('/payment-gateways/health', methods=['GET'])
+@role_required('admin')
+def admin_payment_gateway_health():
+    from payment_gateway import registry
+    return jsonify(registry.health())
+
+@admin_bp.route('/payments/reconcile', methods=['GET'])
+@role_required('admin')
+def admin_get_payment_reconciliation():
+    from payment_reconcile import last_report, get_watermark
+    watermark = get_watermark()
+    return jsonify({
+        "watermark": watermark.isoformat() if watermark else None,
+        "last_report": last_report()
+    })
+
+@admin_bp.route('/payments/reconcile', methods=['POST'])
+@role_required('admin')
+def admin_run_payment_reconciliation():
+    from payment_reconcile import reconcile_payments
+    data = request.json or {}
+    lookback_hours = data.get('lookback_hours')
+    kwargs = {"lookback": timedelta(hours=float(lookback_hours))} if lookback_hours else {}
+    return jsonify(reconcile_payments(**kwargs))
+
 
 @admin_bp.route('/coupons', methods=['GET'])
 @role_required('admin')
 def admin_list_coupons():
-    coupons = Coupon.query.all()
-    # Coupon model doesn't have to_dict? Let's check models.py.
-    # Yes, Coupon model in models.py does NOT have to_dict. 
-    # I need to add to_dict to Coupon model first or construct it here.
-    # Constructing here for safety if I can't modify models.py easily (I can, but this is faster)
-    # Actually, Coupon model needs to be updated in models.py to be useful.
-    # I already overwrote models.py in previous step. I should check if I included to_dict.
-    # Checking models.py content from my write... Coupon does NOT have to_dict.
-    # I will add manual dict creation here.
-    return jsonify([{
-        "id": c.id,
-        "code": c.code,
-        "type": c.type,
-        "discount_percent": c.discount_percent,
-        "max_discount_amount": c.max_discount_amount,
-        "min_order_value": c.min_order_value,
-        "expiry_date": c.expiry_date.isoformat() if c.expiry_date else None,
-        "usage_limit": c.usage_limit,
-        "used_count": c.used_count,
-        "is_active": c.is_active
-    } for c in coupons])
+    return _list(admin_lists.COUPONS)
 
 @admin_bp.route('/coupons/<int:id>', methods=['DELETE'])
 @role_required('admin')
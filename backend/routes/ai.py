@@ -1,10 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
-from ai_service import generate_product_suggestions, configure_genai_client
+from ai_service import generate_product_suggestions, configure_genai_client, genai_client_error
 import json
-from PIL import Image
 import io
-from google.genai.errors import ClientError
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -21,6 +19,7 @@ def generate_from_image():
         return jsonify({"error": "AI service not configured"}), 500
 
     try:
+        from PIL import Image
         pil_image = Image.open(io.BytesIO(image_data))
         prompt = "Analyze this product image. Provide a JSON response with: 'title', 'description', and 'category_hint'."
         
@@ -30,7 +29,7 @@ def generate_from_image():
                 model="gemini-2.5-flash",
                 contents=[pil_image, prompt]
             )
-        except ClientError as e:
+        except genai_client_error() as e:
             if e.code == 429:
                 current_app.logger.warning("Gemini 2.5 Flash rate limited. Retrying with gemini-2.5-flash-lite.")
                 response = client.models.generate_content(
@@ -49,7 +48,7 @@ def generate_from_image():
         text_response = text_response.strip()
 
         return jsonify(json.loads(text_response))
-    except ClientError as e:
+    except genai_client_error() as e:
         error_msg = str(e)
         status_code = 500
         if e.code == 429:
@@ -4,9 +4,23 @@ from extensions import db
 from models import User, Address
 from datetime import timedelta
 from flask import current_app
+from guest_cart import merge_guest_cart, request_guest_token, GUEST_CART_COOKIE
 
 auth_bp = Blueprint('auth', __name__)
 
+def _merge_guest_cart(user_id, resp):
+    """Folds an anonymous shopper's signed cart into their account and clears the cookie."""
+    token = request_guest_token()
+    if not token:
+        return resp
+    try:
+        merge_guest_cart(user_id, token)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Guest cart merge failed for user {user_id}: {e}")
+    resp.delete_cookie(GUEST_CART_COOKIE)
+    return resp
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.json or {}
@@ -32,7 +46,9 @@ def register():
     db.session.commit()
 
     access_token = create_access_token(identity=str(user.id), additional_claims={"role": user.role})
-    return jsonify(access_token=access_token, user=user.to_dict()), 201
+    resp = jsonify(access_token=access_token, user=user.to_dict())
+    resp.status_code = 201
+    return _merge_guest_cart(user.id, resp)
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -58,7 +74,7 @@ def login():
         })
 
     token = create_access_token(identity=str(user.id), additional_claims={"role": user.role, "client_id": user.client_id})
-    return jsonify(access_token=token, user=user.to_dict())
+    return _merge_guest_cart(user.id, jsonify(access_token=token, user=user.to_dict()))
 
 @auth_bp.route('/complete-onboarding', methods=['POST'])
 @jwt_required()
@@ -1,7 +1,10 @@
-from flask import Blueprint, send_from_directory, current_app, request, abort, jsonify
-from models import File, Product, Category, Advertisement, Setting
+from flask import Blueprint, current_app, request, abort, jsonify
+from models import File, FileVariant, Product, Category, Advertisement, Setting
 from extensions import db
 from utils import get_setting
+from image_variants import IMAGE_SIZES, pick_variant
+import file_serving
+import file_store
 from datetime import datetime
 import os
 
@@ -9,18 +12,30 @@ general_bp = Blueprint('general', __name__)
 
 @general_bp.route('/static/images/<path:filename>')
 def serve_image(filename):
-    return send_from_directory(os.path.join(current_app.instance_path, '..', 'images'), filename)
+    return file_serving.serve_from(current_app.config['FILE_OFFLOAD_ROOTS']['images'], filename, 'images')
 
 @general_bp.route('/uploads/<path:filename>')
 def serve_upload(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    # Blob names are content hashes, so those URLs never change content
+    sha256 = file_store.sha_from_name(filename)
+    return file_serving.serve_from(current_app.config['UPLOAD_FOLDER'], filename, 'uploads', etag=sha256, immutable=bool(sha256))
 
 @general_bp.route('/files/<int:file_id>/download')
 def download_file(file_id):
     file = File.query.get_or_404(file_id)
-    if os.path.exists(file.filepath):
-        return send_from_directory(os.path.dirname(file.filepath), os.path.basename(file.filepath))
-    abort(404)
+    size = request.args.get('size')
+    if size:
+        if size not in IMAGE_SIZES:
+            abort(400, description=f"size must be one of {', '.join(IMAGE_SIZES)}")
+        variant = pick_variant(FileVariant.query.filter_by(file_id=file.id, size=size).all(), size, request.headers.get('Accept'))
+        if variant and os.path.exists(variant.filepath):
+            response = file_serving.serve(variant.filepath, etag=variant.stored_filename if file.sha256 else None, immutable=bool(file.sha256))
+            response.vary.add('Accept')
+            return response
+        # Not rendered yet: send the original but revalidate soon so the variant takes over
+        return file_serving.serve(file.filepath, etag=file.sha256, max_age=file_serving.REVALIDATE_MAX_AGE, download_name=file.filename)
+    # A file id always refers to the same content
+    return file_serving.serve(file.filepath, etag=file.sha256, immutable=bool(file.sha256), download_name=file.filename)
 
 @general_bp.route('/sitemap.xml')
 def sitemap():
@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify, abort, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from extensions import db
-from models import Order, OrderItem, Product, User, Coupon
-from utils import get_or_create_cart, decrease_stock, increase_stock, emit_update
+from models import Order, OrderItem, Product, User, Coupon, Cart, CartItem
+from utils import decrease_stock, increase_stock, emit_update
+from cart_service import price_cart
+from cart_store import invalidate_cart
+from seller_ledger import credit_order, debit_refund
+from seller_analytics import record_orders, record_cancellations, CANCELLED_STATUSES
+import admin_stats
 from payment_gateway import get_razorpay_client, get_stripe_client
 import os
-from datetime import datetime
 
 order_bp = Blueprint('order', __name__)
 
@@ -16,8 +20,8 @@ def create_order():
     data = request.json or {}
     gateway = data.get('payment_method', 'cod')
 
-    cart = get_or_create_cart(user_id)
-    if not cart.items:
+    pricing = price_cart(user_id)
+    if not pricing or not pricing['items']:
         abort(400, description="Cart is empty")
 
     try:
@@ -25,50 +29,26 @@ def create_order():
         db.session.add(order)
         db.session.flush()
 
-        total = 0
-        cart_items_list = [] # For discount calc
-        
-        for item in cart.items:
-            product = item.product
-            if product.status != 'approved':
-                raise ValueError(f"Product {product.name} not available")
-            decrease_stock(product.id, item.quantity)
-            subtotal = product.price * item.quantity
+        for line in pricing['items']:
+            if line['status'] != 'approved':
+                raise ValueError(f"Product {line['product_name']} not available")
+            decrease_stock(line['product_id'], line['quantity'])
             oi = OrderItem(
                 order_id=order.id,
-                product_id=product.id,
-                seller_id=product.seller_id,
-                quantity=item.quantity,
-                price=product.price,
-                subtotal=subtotal
+                product_id=line['product_id'],
+                seller_id=line['seller_id'],
+                quantity=line['quantity'],
+                price=line['price'],
+                subtotal=line['subtotal']
             )
             db.session.add(oi)
-            total += subtotal
-            cart_items_list.append({'price': product.price, 'quantity': item.quantity, 'seller_id': product.seller_id})
-
-        # Apply Coupon
-        discount = 0
-        if cart.coupon_code:
-            coupon = Coupon.query.filter_by(code=cart.coupon_code, is_active=True).first()
-            if coupon:
-                # Validate again
-                is_valid = True
-                if coupon.expiry_date and coupon.expiry_date < datetime.utcnow(): is_valid = False
-                elif coupon.usage_limit > 0 and coupon.used_count >= coupon.usage_limit: is_valid = False
-                elif coupon.min_order_value > 0 and total < coupon.min_order_value: is_valid = False
-                
-                if is_valid:
-                    if coupon.type == 'admin':
-                        discount = (total * coupon.discount_percent) / 100
-                    elif coupon.type == 'seller' and coupon.seller_id:
-                        seller_total = sum(i['price'] * i['quantity'] for i in cart_items_list if i['seller_id'] == coupon.seller_id)
-                        discount = (seller_total * coupon.discount_percent) / 100
-                    
-                    if coupon.max_discount_amount and discount > coupon.max_discount_amount:
-                        discount = coupon.max_discount_amount
-                        
-                    coupon.used_count = (coupon.used_count or 0) + 1
-                    db.session.add(coupon)
+
+        # Apply Coupon (already validated by the pricing pass)
+        total = pricing['total']
+        discount = pricing['discount']
+        if pricing['coupon_id']:
+            Coupon.query.filter_by(id=pricing['coupon_id']).update(
+                {Coupon.used_count: db.func.coalesce(Coupon.used_count, 0) + 1}, synchronize_session=False)
 
         final_total = max(0, total - discount)
         order.total_amount = final_total
@@ -109,7 +89,7 @@ def create_order():
 
         elif gateway == "stripe":
             stripe = get_stripe_client()
-            if not stripe.api_key: raise ValueError("Stripe not configured")
+            if not stripe: raise ValueError("Stripe not configured")
             session = stripe.checkout.Session.create(
                 payment_method_types=["card"],
                 line_items=[{"price_data": {"currency": "usd", "product_data": {"name": f"Order {order.id}"}, "unit_amount": int(final_total * 100)}, "quantity": 1}],
@@ -124,13 +104,15 @@ def create_order():
                 "checkout_url": session.url,
             })
 
-        for item in list(cart.items):
-            db.session.delete(item)
+        record_orders([order.id])
+        admin_stats.record_orders([order.id])
+        CartItem.query.filter_by(cart_id=pricing['cart_id']).delete(synchronize_session=False)
         
         # Clear coupon from cart (optional, but clean)
-        cart.coupon_code = None
+        Cart.query.filter_by(id=pricing['cart_id']).update({Cart.coupon_code: None}, synchronize_session=False)
         
         db.session.commit()
+        invalidate_cart(user_id)
         emit_update('order', 'created', {"id": order.id, "total": final_total})
         return jsonify(response_data)
 
@@ -147,6 +129,10 @@ def cancel_order(order_id):
     if order.status == 'cancelled': abort(400, description="Already cancelled")
     for item in order.items:
         increase_stock(item.product_id, item.quantity)
+    if order.payment_status == 'paid':
+        debit_refund(order, order.total_amount, f"cancel:{order.id}")
+    if order.status not in CANCELLED_STATUSES:
+        record_cancellations([order.id])
     order.status = 'cancelled'
     order.payment_status = 'refunded'
     db.session.commit()
@@ -179,7 +165,14 @@ def update_order_status(order_id):
         
     order = Order.query.get_or_404(order_id)
     data = request.json or {}
+    previous = order.status
     if 'status' in data: order.status = data['status']
     if 'delivery_info' in data: order.delivery_info = data['delivery_info']
+    if (previous in CANCELLED_STATUSES) != (order.status in CANCELLED_STATUSES):
+        record_cancellations([order.id], sign=1 if order.status in CANCELLED_STATUSES else -1)
+    # Cash/pay-later orders are paid on delivery
+    if order.status == 'delivered' and order.payment_gateway in ('cod', 'pay_later') and order.payment_status != 'paid':
+        order.payment_status = 'paid'
+        credit_order(order)
     db.session.commit()
     return jsonify(status=order.status)
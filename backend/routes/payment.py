@@ -4,6 +4,11 @@ from extensions import db
 from models import Order, PaymentTransaction
 from payment_gateway import get_razorpay_client, get_stripe_client
 from utils import send_notification, increase_stock
+from seller_ledger import credit_order
+from seller_analytics import record_cancellations
+from payment_events import razorpay_webhook_secret, verify_razorpay_signature, record_event, start_webhook_worker, wake_webhook_worker
+import hashlib
+import json
 import os
 
 payment_bp = Blueprint('payment', __name__)
@@ -55,6 +60,7 @@ def verify_razorpay():
         order.status = "paid"
         txn = PaymentTransaction(order_id=order.id, amount=order.total_amount, payment_status='success', payment_gateway='razorpay', transaction_id=data.get("razorpay_payment_id"))
         db.session.add(txn)
+        credit_order(order)
         db.session.commit()
         send_notification(order.user.email, "Payment Success", f"Order #{order.id} paid.")
     
@@ -62,8 +68,27 @@ def verify_razorpay():
 
 @payment_bp.route('/webhooks/razorpay', methods=['POST'])
 def webhook_razorpay():
-    # Implementation of webhook verification
-    return jsonify(status='ok')
+    # Verify, store and acknowledge; the inbox worker applies the event.
+    secret = razorpay_webhook_secret()
+    if not secret: abort(500, description="Razorpay webhook secret not configured")
+
+    body = request.get_data()
+    if not verify_razorpay_signature(body, request.headers.get('X-Razorpay-Signature'), secret):
+        return jsonify(error="Invalid signature"), 400
+    try:
+        event = json.loads(body)
+    except ValueError:
+        return jsonify(error="Malformed payload"), 400
+    if not isinstance(event, dict):
+        return jsonify(error="Malformed payload"), 400
+
+    event_id = request.headers.get('X-Razorpay-Event-Id') or hashlib.sha256(body).hexdigest()
+    if not record_event('razorpay', event_id, event.get('event'), body):
+        return jsonify(status='duplicate')
+
+    start_webhook_worker(current_app._get_current_object())
+    wake_webhook_worker()
+    return jsonify(status='queued')
 
 @payment_bp.route('/failure', methods=['POST'])
 @jwt_required()
@@ -82,6 +107,7 @@ def payment_failure():
     if order.payment_status != 'paid' and order.status != 'payment_failed' and order.status != 'cancelled':
         order.status = 'payment_failed'
         order.payment_status = 'failed'
+        record_cancellations([order.id])
         
         # Rollback Stock
         for item in order.items:
@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify, abort, current_app
+from flask import Blueprint, request, jsonify, abort, current_app, Response, stream_with_context, send_file
 from flask_jwt_extended import get_jwt_identity, get_jwt
 from extensions import db
-from models import User, Product, OrderItem, WithdrawalRequest, Order, Inventory, File, ProductImage, PaymentRecord, SellerPurchaseBill, SellerSalesBill, Category, CategoryPermission, SellerRequest, Coupon, CartItem, WishlistItem, Review, Advertisement
+from models import User, Product, OrderItem, WithdrawalRequest, Order, Inventory, ProductImage, PaymentRecord, SellerPurchaseBill, SellerSalesBill, Category, CategoryPermission, SellerRequest, Coupon, CartItem, WishlistItem, Review, Advertisement, ProductImportJob
 from utils import role_required, emit_update
-from werkzeug.utils import secure_filename
+from cart_store import invalidate_products, carts_containing, invalidate_carts
+from seller_ledger import get_balance, lock_balance, debit_withdrawal, reverse_withdrawal
+import seller_history
+import product_import
+from catalog_bulk import bulk_edit, BULK_EDIT_MAX_ROWS
+import seller_analytics
+from image_variants import queue_variants
+import file_store
 from uuid import uuid4
 import os
 from datetime import datetime, timedelta
@@ -16,12 +23,37 @@ def seller_dashboard():
     user_id = get_jwt_identity()
     products = Product.query.filter_by(seller_id=user_id).count()
     orders = OrderItem.query.filter_by(seller_id=user_id).count()
-    total_sales = db.session.query(db.func.sum(OrderItem.subtotal)) \
-        .filter_by(seller_id=user_id).scalar() or 0
     return jsonify({
         "product_count": products,
         "pending_orders": orders,
-        "total_sales": total_sales
+        "total_sales": get_balance(int(user_id)).total_sales
+    })
+
+@seller_bp.route('/analytics', methods=['GET'])
+@role_required('seller', 'admin')
+def seller_analytics_report():
+    """Sales time series and top products from the daily rollup. Defaults to the last 30 days."""
+    user_id = int(get_jwt_identity())
+    group = request.args.get('group', 'day')
+    if group not in ('day', 'week', 'month'):
+        abort(400, description="group must be day, week or month")
+    try:
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else datetime.utcnow().date()
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else end - timedelta(days=29)
+    except ValueError:
+        abort(400, description="Dates must be YYYY-MM-DD")
+    if start > end or (end - start).days >= seller_analytics.MAX_RANGE_DAYS:
+        abort(400, description="Invalid date range")
+
+    series = seller_analytics.sales_series(user_id, start, end, group)
+    totals = {k: round(sum(p[k] for p in series), 2) for k in ('units', 'revenue', 'cancelled_units', 'cancelled_revenue', 'net_units', 'net_revenue')}
+    return jsonify({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "group": group,
+        "series": series,
+        "totals": totals,
+        "top_products": seller_analytics.top_products(user_id, start, end, min(request.args.get('top', 10, type=int), 50))
     })
 
 @seller_bp.route('/products', methods=['GET'])
@@ -45,9 +77,11 @@ def seller_add_product():
         stock_qty = form.get('stock_qty', 0)
         brand = form.get('brand')
         specifications = form.get('specifications')
+        file_ids = form.get('file_ids')
     else:
         data = request.json or {}
         files = []
+        file_ids = data.get('file_ids')
         name = data.get('name')
         description = data.get('description', '')
         price = data.get('price')
@@ -97,35 +131,78 @@ def seller_add_product():
     db.session.add(inventory)
 
     saved_file_records = []
+    written = []
     try:
         upload_folder = current_app.config['UPLOAD_FOLDER']
         for idx, f in enumerate(files or []):
             if not f or f.filename == '':
                 continue
-            filename = secure_filename(f.filename)
-            unique_name = f"{uuid4().hex}_{filename}"
-            save_path = os.path.join(upload_folder, unique_name)
-            f.save(save_path)
-            size = os.path.getsize(save_path)
-            frec = File(owner_id=user_id, filename=filename, stored_filename=unique_name, filepath=save_path, size=size, status='active')
-            db.session.add(frec)
-            db.session.flush()
+            frec, created = file_store.store_file(f, user_id, upload_folder)
+            if created:
+                written.append(created)
             saved_file_records.append(frec)
             pi = ProductImage(product_id=product.id, file_id=frec.id, position=idx)
             db.session.add(pi)
+        # Images sent ahead through /api/upload/sessions
+        for idx, frec in enumerate(file_store.owned_files(file_ids, user_id), start=len(files or [])):
+            db.session.add(ProductImage(product_id=product.id, file_id=frec.id, position=idx))
 
         db.session.commit()
+        queue_variants([f.id for f in saved_file_records])
         return jsonify(product=product.to_dict()), 201
     except Exception as e:
         db.session.rollback()
-        for frec in saved_file_records:
-            try:
-                if os.path.exists(frec.filepath):
-                    os.remove(frec.filepath)
-            except Exception:
-                pass
+        file_store.discard(written)
         abort(500, description=str(e))
 
+@seller_bp.route('/products/import', methods=['POST'])
+@role_required('seller', 'admin')
+def seller_import_products():
+    """Queues a CSV/XLSX catalog import; poll the returned job for progress."""
+    user_id = int(get_jwt_identity())
+    upload = request.files.get('file')
+    if not upload or upload.filename == '':
+        abort(400, description="No file uploaded")
+    try:
+        job = product_import.create_job(user_id, upload)
+    except ValueError as e:
+        abort(400, description=str(e))
+    product_import.start_import(current_app._get_current_object(), job.id)
+    return jsonify(job.to_dict()), 202
+
+@seller_bp.route('/products/import', methods=['GET'])
+@role_required('seller', 'admin')
+def seller_import_jobs():
+    user_id = int(get_jwt_identity())
+    jobs = ProductImportJob.query.filter_by(seller_id=user_id).order_by(ProductImportJob.id.desc()).limit(20).all()
+    return jsonify([j.to_dict() for j in jobs])
+
+@seller_bp.route('/products/import/<int:job_id>', methods=['GET'])
+@role_required('seller', 'admin')
+def seller_import_job(job_id):
+    job = ProductImportJob.query.filter_by(id=job_id, seller_id=int(get_jwt_identity())).first_or_404()
+    return jsonify(job.to_dict())
+
+@seller_bp.route('/products/import/<int:job_id>/errors', methods=['GET'])
+@role_required('seller', 'admin')
+def seller_import_errors(job_id):
+    job = ProductImportJob.query.filter_by(id=job_id, seller_id=int(get_jwt_identity())).first_or_404()
+    if not job.error_path or not os.path.exists(job.error_path):
+        abort(404, description="No error file for this import")
+    return send_file(job.error_path, mimetype='text/csv', as_attachment=True, download_name=f"import_{job.id}_errors.csv")
+
+@seller_bp.route('/products/bulk', methods=['PUT'])
+@role_required('seller', 'admin')
+def seller_bulk_edit_products():
+    """Stock/price/mrp/status for many products at once, matched by product_id or sku."""
+    data = request.json
+    rows = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        abort(400, description="Expected a non-empty list of items")
+    if len(rows) > BULK_EDIT_MAX_ROWS:
+        abort(400, description=f"At most {BULK_EDIT_MAX_ROWS} items per request")
+    return jsonify(bulk_edit(int(get_jwt_identity()), rows))
+
 @seller_bp.route('/products/<int:product_id>', methods=['PUT'])
 @role_required('seller', 'admin')
 def seller_edit_product(product_id):
@@ -169,6 +246,7 @@ def seller_edit_product(product_id):
         except: pass
 
     # Handle Files (Append new images)
+    new_files = []
     if files:
         upload_folder = current_app.config['UPLOAD_FOLDER']
         # Get current max position
@@ -178,21 +256,23 @@ def seller_edit_product(product_id):
         for idx, f in enumerate(files):
             if not f or f.filename == '': continue
             try:
-                filename = secure_filename(f.filename)
-                unique_name = f"{uuid4().hex}_{filename}"
-                save_path = os.path.join(upload_folder, unique_name)
-                f.save(save_path)
-                size = os.path.getsize(save_path)
-                frec = File(owner_id=user_id, filename=filename, stored_filename=unique_name, filepath=save_path, size=size, status='active')
-                db.session.add(frec)
-                db.session.flush()
+                frec, _ = file_store.store_file(f, user_id, upload_folder)
+                new_files.append(frec.id)
                 
                 pi = ProductImage(product_id=product.id, file_id=frec.id, position=current_max_pos + 1 + idx)
                 db.session.add(pi)
             except Exception as e:
                 print(f"Error saving file update: {e}")
 
+    uploaded = file_store.owned_files(data.get('file_ids'), user_id)
+    if uploaded:
+        max_pos = db.session.query(db.func.max(ProductImage.position)).filter_by(product_id=product.id).scalar()
+        for idx, frec in enumerate(uploaded, start=0 if max_pos is None else max_pos + 1):
+            db.session.add(ProductImage(product_id=product.id, file_id=frec.id, position=idx))
+
     db.session.commit()
+    invalidate_products([product.id])
+    queue_variants(new_files)
     return jsonify(product.to_dict())
 
 @seller_bp.route('/products/<int:product_id>', methods=['DELETE'])
@@ -205,6 +285,7 @@ def seller_delete_product(product_id):
     if OrderItem.query.filter_by(product_id=product.id).first():
         return jsonify({"error": "Cannot delete product with existing orders. Please contact support to archive it."}), 400
 
+    affected_carts = carts_containing([product.id])
     try:
         # Delete dependencies
         if product.inventory:
@@ -218,6 +299,7 @@ def seller_delete_product(product_id):
 
         db.session.delete(product)
         db.session.commit()
+        invalidate_carts(affected_carts)
         return jsonify(message="Product deleted")
     except Exception as e:
         db.session.rollback()
@@ -240,6 +322,7 @@ def seller_update_stock(product_id):
     new_stock = int(data.get('stock'))
     product.inventory.stock_qty = new_stock
     db.session.commit()
+    invalidate_products([product.id])
     return jsonify(message="Stock updated")
 
 @seller_bp.route('/inventory', methods=['GET'])
@@ -249,21 +332,84 @@ def seller_inventory():
     prods = Product.query.filter_by(seller_id=user_id).all()
     return jsonify([p.to_dict() for p in prods])
 
+SELLER_ORDER_SORTS = {
+    'newest': (Order.created_at.desc(), Order.id.desc()),
+    'oldest': (Order.created_at.asc(), Order.id.asc()),
+    'total_high_low': (db.desc('seller_total'), Order.id.desc()),
+    'total_low_high': (db.asc('seller_total'), Order.id.asc()),
+}
+
 @seller_bp.route('/orders', methods=['GET'])
 @role_required('seller', 'admin')
 def seller_orders():
-    user_id = get_jwt_identity()
-    items = OrderItem.query.filter_by(seller_id=user_id).all()
-    result = []
-    for i in items:
-        result.append({
-            "order_id": i.order_id,
-            "product_name": i.product.name,
-            "quantity": i.quantity,
-            "price": i.price,
-            "status": i.order.status
-        })
-    return jsonify(result)
+    """
+    Fulfillment queue: one row per order with this seller's lines, filtered by
+    status (comma separated), from/to dates and product_id. Orders are paged in
+    one grouped query and their lines fetched in a second one.
+    """
+    user_id = int(get_jwt_identity())
+    status = request.args.get('status')
+    product_id = request.args.get('product_id', type=int)
+    sort_by = request.args.get('sort_by', 'newest')
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    date_from, date_to = _history_range()
+
+    seller_total = db.func.sum(OrderItem.subtotal).label('seller_total')
+    query = db.session.query(
+        Order.id, Order.created_at, Order.status, Order.payment_status, Order.delivery_info,
+        User.name.label('buyer_name'), seller_total
+    ).join(OrderItem, OrderItem.order_id == Order.id) \
+        .join(User, User.id == Order.user_id) \
+        .filter(OrderItem.seller_id == user_id)
+    if status:
+        query = query.filter(Order.status.in_(status.split(',')))
+    if date_from:
+        query = query.filter(Order.created_at >= date_from)
+    if date_to:
+        query = query.filter(Order.created_at < date_to)
+    if product_id:
+        query = query.filter(Order.id.in_(
+            db.session.query(OrderItem.order_id).filter(OrderItem.seller_id == user_id, OrderItem.product_id == product_id)
+        ))
+    query = query.group_by(Order.id, User.name)
+
+    total = query.order_by(None).count()
+    rows = query.order_by(*SELLER_ORDER_SORTS.get(sort_by, SELLER_ORDER_SORTS['newest'])) \
+        .offset((page - 1) * limit).limit(limit).all()
+
+    lines = {}
+    if rows:
+        items = db.session.query(
+            OrderItem.order_id, OrderItem.product_id, Product.name, OrderItem.quantity, OrderItem.price, OrderItem.subtotal
+        ).outerjoin(Product, Product.id == OrderItem.product_id) \
+            .filter(OrderItem.seller_id == user_id, OrderItem.order_id.in_([r.id for r in rows])) \
+            .order_by(OrderItem.id).all()
+        for i in items:
+            lines.setdefault(i.order_id, []).append({
+                "product_id": i.product_id,
+                "product_name": i.name,
+                "quantity": i.quantity,
+                "price": i.price,
+                "subtotal": i.subtotal
+            })
+
+    return jsonify({
+        "orders": [{
+            "order_id": r.id,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "status": r.status,
+            "payment_status": r.payment_status,
+            "delivery_info": r.delivery_info,
+            "buyer_name": r.buyer_name,
+            "total": r.seller_total,
+            "items": lines.get(r.id, [])
+        } for r in rows],
+        "total": total,
+        "pages": (total + limit - 1) // limit,
+        "page": page,
+        "per_page": limit
+    })
 
 @seller_bp.route('/bank-details', methods=['GET', 'POST'])
 @role_required('seller', 'admin')
@@ -295,16 +441,7 @@ def seller_bank_details():
 def seller_withdrawals():
     user_id = get_jwt_identity()
     reqs = WithdrawalRequest.query.filter_by(seller_id=user_id).order_by(WithdrawalRequest.requested_at.desc()).all()
-    
-    total_sales = db.session.query(db.func.sum(OrderItem.subtotal)).filter_by(seller_id=user_id).scalar() or 0
-    
-    withdrawn_amount = db.session.query(db.func.sum(WithdrawalRequest.amount)).filter(
-        WithdrawalRequest.seller_id == user_id,
-        WithdrawalRequest.status != 'rejected',
-        WithdrawalRequest.status != 'cancelled'
-    ).scalar() or 0
-    
-    available_balance = total_sales - withdrawn_amount
+    bal = get_balance(int(user_id))
     
     user = User.query.get(user_id)
     has_bank = all([user.bank_account_number, user.bank_ifsc, user.bank_beneficiary_name])
@@ -312,8 +449,8 @@ def seller_withdrawals():
     bank_details_configured = has_bank or has_upi
 
     response = {
-        "balance": available_balance,
-        "total_withdrawn": withdrawn_amount,
+        "balance": bal.balance,
+        "total_withdrawn": bal.total_withdrawn,
         "bank_details_configured": bank_details_configured,
         "has_bank": has_bank,
         "has_upi": has_upi,
@@ -336,13 +473,8 @@ def seller_request_withdrawal():
     user_id = get_jwt_identity()
     data = request.json or {}
     
-    total_sales = db.session.query(db.func.sum(OrderItem.subtotal)).filter_by(seller_id=user_id).scalar() or 0
-    withdrawn_amount = db.session.query(db.func.sum(WithdrawalRequest.amount)).filter(
-        WithdrawalRequest.seller_id == user_id,
-        WithdrawalRequest.status != 'rejected',
-        WithdrawalRequest.status != 'cancelled'
-    ).scalar() or 0
-    available_balance = total_sales - withdrawn_amount
+    # Lock the balance row so concurrent requests cannot overdraw it
+    available_balance = lock_balance(int(user_id)).balance
 
     requested_amount = data.get('amount')
     if requested_amount is not None:
@@ -354,9 +486,11 @@ def seller_request_withdrawal():
         amount = available_balance
 
     if amount <= 0:
+        db.session.rollback()
         abort(400, description="Invalid amount or insufficient balance")
         
     if amount > available_balance + 0.01:
+        db.session.rollback()
         abort(400, description="Insufficient balance")
     
     payment_method = data.get('payment_method')
@@ -375,6 +509,8 @@ def seller_request_withdrawal():
         due_date=target_time
     )
     db.session.add(wr)
+    db.session.flush()
+    debit_withdrawal(wr)
     db.session.commit()
 
     if payment_method or payment_details:
@@ -401,56 +537,46 @@ def seller_cancel_withdrawal(id):
         abort(400, description="Cannot cancel withdrawal that is not in requested state")
         
     wr.status = 'cancelled'
+    reverse_withdrawal(wr)
     db.session.commit()
     
-    total_sales = db.session.query(db.func.sum(OrderItem.subtotal)).filter_by(seller_id=user_id).scalar() or 0
-    withdrawn_amount = db.session.query(db.func.sum(WithdrawalRequest.amount)).filter(
-        WithdrawalRequest.seller_id == user_id,
-        WithdrawalRequest.status != 'rejected',
-        WithdrawalRequest.status != 'cancelled'
-    ).scalar() or 0
-    balance = total_sales - withdrawn_amount
-    
-    return jsonify(message="Withdrawal cancelled", balance=balance)
+    return jsonify(message="Withdrawal cancelled", balance=get_balance(int(user_id)).balance)
 
 @seller_bp.route('/transactions', methods=['GET'])
 @role_required('seller', 'admin')
 def seller_transactions():
-    user_id = get_jwt_identity()
-    
-    sales = db.session.query(
-        OrderItem.id, 
-        OrderItem.subtotal, 
-        Order.created_at.label('date'),
-        Product.name
-    ).join(Order).join(Product).filter(OrderItem.seller_id == user_id).all()
-    
-    withdrawals = WithdrawalRequest.query.filter_by(seller_id=user_id).all()
-    
-    transactions = []
-    
-    for s in sales:
-        transactions.append({
-            "id": f"sale-{s.id}",
-            "type": "credit",
-            "amount": s.subtotal,
-            "date": s.date.isoformat(),
-            "description": f"Sale: {s.name}",
-            "status": "completed"
-        })
-        
-    for w in withdrawals:
-        transactions.append({
-            "id": f"withdraw-{w.id}",
-            "type": "debit",
-            "amount": w.amount,
-            "date": w.requested_at.isoformat(),
-            "description": f"Withdrawal Request #{w.id}",
-            "status": w.status
-        })
-        
-    transactions.sort(key=lambda x: x['date'], reverse=True)
-    return jsonify(transactions)
+    user_id = int(get_jwt_identity())
+    date_from, date_to = _history_range()
+    limit = min(request.args.get('limit', seller_history.DEFAULT_PAGE_SIZE, type=int), seller_history.MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    try:
+        cursor = seller_history.decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    rows, next_cursor = seller_history.fetch_page(user_id, max(limit, 1), cursor, date_from, date_to)
+    return jsonify({
+        "transactions": [seller_history.to_dict(r) for r in rows],
+        "next_cursor": next_cursor
+    })
+
+@seller_bp.route('/transactions/export', methods=['GET'])
+@role_required('seller', 'admin')
+def seller_transactions_export():
+    user_id = int(get_jwt_identity())
+    date_from, date_to = _history_range()
+    return Response(
+        stream_with_context(seller_history.iter_csv(user_id, date_from, date_to)),
+        mimetype='text/csv',
+        headers={"Content-Disposition": "attachment; filename=transactions.csv"}
+    )
+
+def _history_range():
+    try:
+        return (seller_history.parse_date(request.args.get('from')),
+                seller_history.parse_date(request.args.get('to'), end=True))
+    except ValueError as e:
+        abort(400, description=str(e))
 
 @seller_bp.route('/profile', methods=['GET'])
 @role_required('seller', 'admin')
@@ -560,11 +686,8 @@ def seller_request_category():
 
     image_filename = None
     if file and file.filename:
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid4().hex}_{filename}"
-        save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_name)
-        file.save(save_path)
-        image_filename = unique_name
+        blob, _ = file_store.save_blob(file, current_app.config['UPLOAD_FOLDER'])
+        image_filename = blob.path
 
     cat = Category(
         name=name,
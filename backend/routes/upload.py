@@ -1,10 +1,10 @@
 from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models import File
-from werkzeug.utils import secure_filename
-from uuid import uuid4
-import os
+from image_variants import queue_variants, is_image
+import file_store
+import chunked_upload
+from models import UploadSession
 from flask import current_app
 
 upload_bp = Blueprint('upload', __name__)
@@ -19,25 +19,72 @@ def upload_file():
         return jsonify({"error": "No selected file"}), 400
     
     if file:
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid4().hex}_{filename}"
-        save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_name)
-        file.save(save_path)
-        size = os.path.getsize(save_path)
-        
-        file_record = File(
-            owner_id=get_jwt_identity(),
-            filename=filename,
-            stored_filename=unique_name,
-            filepath=save_path,
-            size=size,
-            status='active'
-        )
-        db.session.add(file_record)
+        file_record, _ = file_store.store_file(file, get_jwt_identity(), current_app.config['UPLOAD_FOLDER'])
         db.session.commit()
+        if is_image(file_record.filename):
+            queue_variants([file_record.id])
         
         return jsonify({
             "message": "File uploaded successfully",
             "id": file_record.id,
             "url": f"/api/files/{file_record.id}/download"
         }), 201
+
+def _own_session(session_id):
+    session = db.session.get(UploadSession, session_id)
+    if not session or str(session.owner_id) != str(get_jwt_identity()):
+        abort(404)
+    return session
+
+@upload_bp.route('/sessions', methods=['POST'])
+@jwt_required()
+def create_upload_session():
+    """Starts a resumable upload: {filename, size}. Send chunks with PUT, then complete."""
+    data = request.json or {}
+    try:
+        session = chunked_upload.create_session(get_jwt_identity(), data.get('filename'), data.get('size'), current_app.config['UPLOAD_FOLDER'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(dict(session.to_dict(), chunk_size=chunked_upload.MAX_CHUNK_SIZE)), 201
+
+@upload_bp.route('/sessions/<session_id>', methods=['GET'])
+@jwt_required()
+def get_upload_session(session_id):
+    """Where to resume: `offset` is the number of bytes stored so far."""
+    return jsonify(_own_session(session_id).to_dict())
+
+@upload_bp.route('/sessions/<session_id>', methods=['PUT'])
+@jwt_required()
+def put_upload_chunk(session_id):
+    """Raw chunk body; the Upload-Offset header (or ?offset=) says where it starts."""
+    session = _own_session(session_id)
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', '')))
+    except ValueError:
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+    try:
+        session = chunked_upload.append_chunk(session, offset, request.stream)
+    except chunked_upload.OffsetMismatch as e:
+        return jsonify({"error": str(e), "offset": e.offset}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e), "offset": session.received}), 400
+    return jsonify(session.to_dict())
+
+@upload_bp.route('/sessions/<session_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload_session(session_id):
+    """Finishes the upload once every byte is stored: {sha256}. Returns the File like a normal upload."""
+    session = _own_session(session_id)
+    try:
+        file_record = chunked_upload.complete(session, (request.json or {}).get('sha256'), current_app.config['UPLOAD_FOLDER'])
+    except chunked_upload.OffsetMismatch as e:
+        return jsonify({"error": "Upload is incomplete", "offset": e.offset}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e), "offset": session.received}), 400
+    if is_image(file_record.filename):
+        queue_variants([file_record.id])
+    return jsonify({
+        "message": "File uploaded successfully",
+        "id": file_record.id,
+        "url": f"/api/files/{file_record.id}/download"
+    }), 201
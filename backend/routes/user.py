@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify, abort, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models import User, Address, Cart, CartItem, WishlistItem, Product, Coupon, Order
-from utils import get_or_create_cart, get_or_create_wishlist
+from models import User, Address, Cart, WishlistItem, Product, Coupon, Order
+from utils import get_or_create_wishlist
+import cart_store
+import guest_cart
 from datetime import datetime, timedelta
 import os
 
@@ -51,64 +53,13 @@ def change_password():
 @jwt_required()
 def get_cart_route():
     user_id = get_jwt_identity()
-    cart = Cart.query.filter_by(user_id=user_id).first()
-    if not cart:
-        return jsonify({"items": [], "total": 0, "discount": 0, "final_total": 0})
-    
-    items = []
-    total = 0
-    for item in cart.items:
-        items.append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product.name,
-            "price": item.product.price,
-            "mrp": item.product.mrp,
-            "quantity": item.quantity,
-            "image": item.product.product_images[0].file.filepath if item.product.product_images else None,
-            "image_url": f"/api/files/{item.product.product_images[0].file.id}/download" if item.product.product_images else None,
-            "seller_id": item.product.seller_id
-        })
-        total += item.product.price * item.quantity
-
-    discount = 0
-    coupon_data = None
-
-    if cart.coupon_code:
-        coupon = Coupon.query.filter_by(code=cart.coupon_code, is_active=True).first()
-        is_valid = True
-        if not coupon: is_valid = False
-        elif coupon.expiry_date and coupon.expiry_date < datetime.utcnow(): is_valid = False
-        elif coupon.usage_limit > 0 and coupon.used_count >= coupon.usage_limit: is_valid = False
-        elif coupon.min_order_value > 0 and total < coupon.min_order_value: is_valid = False
-        
-        if is_valid:
-            if coupon.type == 'admin':
-                discount = (total * coupon.discount_percent) / 100
-            elif coupon.type == 'seller' and coupon.seller_id:
-                seller_total = sum(item['price'] * item['quantity'] for item in items if item['seller_id'] == coupon.seller_id)
-                discount = (seller_total * coupon.discount_percent) / 100
-            
-            if coupon.max_discount_amount and discount > coupon.max_discount_amount:
-                discount = coupon.max_discount_amount
-            
-            coupon_data = {
-                "code": coupon.code,
-                "discount_percent": coupon.discount_percent,
-                "type": coupon.type
-            }
-        else:
-             cart.coupon_code = None
-             db.session.commit()
-
-    final_total = max(0, total - discount)
-
+    view = cart_store.get_cart_view(user_id)
     return jsonify({
-        "items": items,
-        "total": total,
-        "discount": discount,
-        "coupon": coupon_data,
-        "final_total": final_total
+        "items": view['items'],
+        "total": view['total'],
+        "discount": view['discount'],
+        "coupon": view['coupon'],
+        "final_total": view['final_total']
     })
 
 @user_bp.route('/cart/items', methods=['POST'])
@@ -121,38 +72,25 @@ def add_to_cart():
     product = Product.query.get_or_404(product_id)
     if product.status != 'approved':
         abort(400, description="Product not available")
-    cart = get_or_create_cart(user_id)
-    existing = CartItem.query.filter_by(cart_id=cart.id, product_id=product_id).first()
-    if existing:
-        existing.quantity += quantity
-    else:
-        ci = CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity)
-        db.session.add(ci)
-    db.session.commit()
+    cart_store.add_item(user_id, product.id, quantity)
     return jsonify(message="Added to cart")
 
 @user_bp.route('/cart/items/<int:item_id>', methods=['DELETE'])
 @jwt_required()
 def remove_from_cart(item_id):
     user_id = get_jwt_identity()
-    cart = get_or_create_cart(user_id)
-    item = CartItem.query.filter_by(id=item_id, cart_id=cart.id).first_or_404()
-    db.session.delete(item)
-    db.session.commit()
+    if cart_store.remove_item(user_id, item_id) is None:
+        abort(404)
     return jsonify(message="Removed from cart")
 
 @user_bp.route('/cart/items/<int:item_id>', methods=['PUT'])
 @jwt_required()
 def update_cart_item(item_id):
     user_id = get_jwt_identity()
-    cart = get_or_create_cart(user_id)
-    item = CartItem.query.filter_by(id=item_id, cart_id=cart.id).first_or_404()
     data = request.json or {}
-    if 'quantity' in data:
-        item.quantity = int(data['quantity'])
-        if item.quantity <= 0:
-            db.session.delete(item)
-    db.session.commit()
+    quantity = int(data['quantity']) if 'quantity' in data else None
+    if cart_store.update_item(user_id, item_id, quantity) is None:
+        abort(404)
     return jsonify(message="Cart item updated")
 
 @user_bp.route('/cart/apply-coupon', methods=['POST'])
@@ -176,20 +114,69 @@ def apply_coupon():
     if coupon.usage_limit > 0 and coupon.used_count >= coupon.usage_limit:
          return jsonify({"error": "Coupon usage limit exceeded"}), 400
 
-    cart.coupon_code = code
-    db.session.commit()
+    cart_store.set_coupon(user_id, code)
     return jsonify({"message": "Coupon applied"})
 
 @user_bp.route('/cart/remove-coupon', methods=['POST'])
 @jwt_required()
 def remove_coupon():
     user_id = get_jwt_identity()
-    cart = Cart.query.filter_by(user_id=user_id).first()
-    if cart:
-        cart.coupon_code = None
-        db.session.commit()
+    cart_store.set_coupon(user_id, None)
     return jsonify({"message": "Coupon removed"})
 
+def _guest_cart_response(cart, status=200):
+    # Pricing drops a coupon that no longer applies, so sign the cart afterwards
+    priced = guest_cart.price_guest_cart(cart)
+    token = guest_cart.dump_guest_cart(cart)
+    resp = jsonify({**priced, "guest_cart": token})
+    resp.status_code = status
+    return guest_cart.set_guest_cookie(resp, token)
+
+@user_bp.route('/cart/guest', methods=['GET', 'POST'])
+def get_guest_cart():
+    cart = guest_cart.load_guest_cart(guest_cart.request_guest_token())
+    return _guest_cart_response(cart)
+
+@user_bp.route('/cart/guest/items', methods=['POST'])
+def add_to_guest_cart():
+    data = request.json or {}
+    product_id = data.get('product_id')
+    quantity = int(data.get('quantity', 1))
+    product = Product.query.get_or_404(product_id)
+    if product.status != 'approved':
+        abort(400, description="Product not available")
+    cart = guest_cart.load_guest_cart(guest_cart.request_guest_token())
+    guest_cart.set_quantity(cart, product.id, cart['items'].get(product.id, 0) + quantity)
+    return _guest_cart_response(cart)
+
+@user_bp.route('/cart/guest/items/<int:product_id>', methods=['PUT'])
+def update_guest_cart_item(product_id):
+    cart = guest_cart.load_guest_cart(guest_cart.request_guest_token())
+    if product_id not in cart['items']:
+        abort(404)
+    data = request.json or {}
+    if 'quantity' in data:
+        guest_cart.set_quantity(cart, product_id, int(data['quantity']))
+    return _guest_cart_response(cart)
+
+@user_bp.route('/cart/guest/items/<int:product_id>', methods=['DELETE'])
+def remove_from_guest_cart(product_id):
+    cart = guest_cart.load_guest_cart(guest_cart.request_guest_token())
+    if product_id not in cart['items']:
+        abort(404)
+    guest_cart.set_quantity(cart, product_id, 0)
+    return _guest_cart_response(cart)
+
+@user_bp.route('/cart/guest/coupon', methods=['POST'])
+def apply_guest_coupon():
+    data = request.json or {}
+    code = data.get('code')
+    cart = guest_cart.load_guest_cart(guest_cart.request_guest_token())
+    if code and not Coupon.query.filter_by(code=code, is_active=True).first():
+        return jsonify({"error": "Invalid coupon code"}), 400
+    cart['coupon'] = code or None
+    return _guest_cart_response(cart)
+
 @user_bp.route('/wishlist', methods=['GET'])
 @jwt_required()
 def get_wishlist_route():
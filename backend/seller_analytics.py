@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from extensions import db
+from models import Order, OrderItem, Product, SellerDailySales
+from rollup import increment, bucket
+
+# Per-seller, per-product, per-day sales counters. Orders are counted on the
+# day they were placed: record_orders() adds units/revenue when an order is
+# created and record_cancellations() adds cancelled units/revenue when it is
+# cancelled or its payment fails, both in the caller's transaction. Analytics
+# queries read only this table, so their cost depends on the date range, not
+# on order history. rebuild() recomputes rows from orders.
+CANCELLED_STATUSES = ('cancelled', 'payment_failed')
+COUNTERS = ('units', 'revenue', 'cancelled_units', 'cancelled_revenue')
+MAX_RANGE_DAYS = 731
+
+
+def _increment(rows):
+    """Adds counters to (seller_id, product_id, day) rows, creating them as needed."""
+    increment(SellerDailySales, ('seller_id', 'product_id', 'day'), COUNTERS, rows)
+
+
+def _order_rows(order_ids, cancelled, sign=1):
+    lines = db.session.query(OrderItem.seller_id, OrderItem.product_id, OrderItem.quantity, OrderItem.subtotal, Order.created_at) \
+        .join(Order, Order.id == OrderItem.order_id).filter(OrderItem.order_id.in_(list(order_ids))).all()
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for seller_id, product_id, quantity, subtotal, created_at in lines:
+        counters = totals[(seller_id, product_id, (created_at or datetime.utcnow()).date())]
+        if cancelled:
+            counters['cancelled_units'] += sign * quantity
+            counters['cancelled_revenue'] += sign * subtotal
+        else:
+            counters['units'] += sign * quantity
+            counters['revenue'] += sign * subtotal
+    return [dict(c, seller_id=k[0], product_id=k[1], day=k[2]) for k, c in totals.items()]
+
+
+def record_orders(order_ids):
+    """Counts newly placed orders."""
+    if order_ids:
+        _increment(_order_rows(order_ids, cancelled=False))
+
+
+def record_cancellations(order_ids, sign=1):
+    """Counts orders that were just cancelled or failed; sign=-1 undoes it if one is reopened."""
+    if order_ids:
+        _increment(_order_rows(order_ids, cancelled=True, sign=sign))
+
+
+def rebuild(seller_ids=None):
+    """Recomputes rollup rows from orders, one seller per transaction. Returns the number of rows written."""
+    if seller_ids is None:
+        seller_ids = [r[0] for r in db.session.query(OrderItem.seller_id).distinct()]
+    cancelled = Order.status.in_(CANCELLED_STATUSES)
+    written = 0
+    for seller_id in sorted(seller_ids):
+        SellerDailySales.query.filter_by(seller_id=seller_id).delete(synchronize_session=False)
+        rows = db.session.query(
+            OrderItem.product_id,
+            db.func.date(Order.created_at),
+            db.func.sum(OrderItem.quantity),
+            db.func.sum(OrderItem.subtotal),
+            db.func.sum(db.case((cancelled, OrderItem.quantity), else_=0)),
+            db.func.sum(db.case((cancelled, OrderItem.subtotal), else_=0))
+        ).join(Order, Order.id == OrderItem.order_id) \
+            .filter(OrderItem.seller_id == seller_id) \
+            .group_by(OrderItem.product_id, db.func.date(Order.created_at)).all()
+        now = datetime.utcnow()
+        batch = [{
+            "seller_id": seller_id, "product_id": product_id,
+            "day": day if isinstance(day, date) else date.fromisoformat(day),
+            "units": units, "revenue": revenue, "cancelled_units": c_units, "cancelled_revenue": c_revenue,
+            "updated_at": now
+        } for product_id, day, units, revenue, c_units, c_revenue in rows if day]
+        if batch:
+            db.session.execute(db.insert(SellerDailySales), batch)
+        db.session.commit()
+        written += len(batch)
+    return written
+
+
+def sales_series(seller_id, start, end, group='day'):
+    """Totals per day/week/month between start and end (inclusive dates), with empty periods filled in."""
+    rows = db.session.query(
+        SellerDailySales.day,
+        db.func.sum(SellerDailySales.units), db.func.sum(SellerDailySales.revenue),
+        db.func.sum(SellerDailySales.cancelled_units), db.func.sum(SellerDailySales.cancelled_revenue)
+    ).filter(SellerDailySales.seller_id == seller_id, SellerDailySales.day >= start, SellerDailySales.day <= end) \
+        .group_by(SellerDailySales.day).all()
+
+    buckets = {}
+    day = start
+    while day <= end:
+        buckets.setdefault(bucket(day, group), dict.fromkeys(COUNTERS, 0))
+        day += timedelta(days=1)
+    for day, units, revenue, c_units, c_revenue in rows:
+        b = buckets[bucket(day, group)]
+        b['units'] += units or 0
+        b['revenue'] += revenue or 0
+        b['cancelled_units'] += c_units or 0
+        b['cancelled_revenue'] += c_revenue or 0
+    return [dict(
+        {k: round(v, 2) for k, v in c.items()},
+        date=d.isoformat(),
+        net_units=c['units'] - c['cancelled_units'],
+        net_revenue=round(c['revenue'] - c['cancelled_revenue'], 2)
+    ) for d, c in sorted(buckets.items())]
+
+
+def top_products(seller_id, start, end, limit=10):
+    """Best-selling products by net revenue in the range."""
+    net_revenue = db.func.sum(SellerDailySales.revenue - SellerDailySales.cancelled_revenue)
+    rows = db.session.query(
+        SellerDailySales.product_id, Product.name,
+        db.func.sum(SellerDailySales.units - SellerDailySales.cancelled_units), net_revenue
+    ).outerjoin(Product, Product.id == SellerDailySales.product_id) \
+        .filter(SellerDailySales.seller_id == seller_id, SellerDailySales.day >= start, SellerDailySales.day <= end) \
+        .group_by(SellerDailySales.product_id, Product.name) \
+        .order_by(net_revenue.desc(), SellerDailySales.product_id).limit(limit).all()
+    return [{"product_id": pid, "name": name, "net_units": units, "net_revenue": round(revenue or 0, 2)}
+            for pid, name, units, revenue in rows]
+
+
+if __name__ == '__main__':
+    from app import create_app
+    with create_app().app_context():
+        print(f"Wrote {rebuild()} rollup rows")
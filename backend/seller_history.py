@@ -0,0 +1,136 @@
+import base64
+import csv
+import io
+from datetime import datetime, timedelta
+from extensions import db
+from models import Order, OrderItem, Product, WithdrawalRequest
+
+# A seller's transaction history is sale lines plus withdrawal requests. Both
+# are selected with the same columns and merged in SQL with UNION ALL, ordered
+# newest first on (date, kind, id) so keyset pagination has a unique sort key.
+# The seller and date filters are applied inside each branch so each side can
+# use its seller index; the cursor is applied to the merged result.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EXPORT_CHUNK_SIZE = 1000
+CSV_COLUMNS = ('date', 'id', 'type', 'amount', 'description', 'status')
+
+
+def parse_date(value, end=False):
+    """YYYY-MM-DD or ISO datetime. A bare `to` date covers the whole day."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def encode_cursor(row):
+    raw = f"{row.date.isoformat()}|{row.kind}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        date, kind, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(date), kind, int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def history_query(seller_id, date_from=None, date_to=None):
+    """Returns (select, merged subquery) for the seller's sales and withdrawals."""
+    sales = db.select(
+        db.literal('sale').label('kind'),
+        OrderItem.id.label('id'),
+        OrderItem.subtotal.label('amount'),
+        Order.created_at.label('date'),
+        Product.name.label('name'),
+        db.literal('completed').label('status')
+    ).join(Order, Order.id == OrderItem.order_id) \
+        .outerjoin(Product, Product.id == OrderItem.product_id) \
+        .where(OrderItem.seller_id == seller_id)
+
+    withdrawals = db.select(
+        db.literal('withdraw').label('kind'),
+        WithdrawalRequest.id.label('id'),
+        WithdrawalRequest.amount.label('amount'),
+        WithdrawalRequest.requested_at.label('date'),
+        db.cast(db.null(), db.String).label('name'),
+        WithdrawalRequest.status.label('status')
+    ).where(WithdrawalRequest.seller_id == seller_id)
+
+    if date_from:
+        sales = sales.where(Order.created_at >= date_from)
+        withdrawals = withdrawals.where(WithdrawalRequest.requested_at >= date_from)
+    if date_to:
+        sales = sales.where(Order.created_at < date_to)
+        withdrawals = withdrawals.where(WithdrawalRequest.requested_at < date_to)
+
+    merged = db.union_all(sales, withdrawals).subquery()
+    query = db.select(merged).order_by(merged.c.date.desc(), merged.c.kind.desc(), merged.c.id.desc())
+    return query, merged
+
+
+def _after(merged, cursor):
+    date, kind, row_id = cursor
+    return db.or_(
+        merged.c.date < date,
+        db.and_(merged.c.date == date, db.or_(
+            merged.c.kind < kind,
+            db.and_(merged.c.kind == kind, merged.c.id < row_id)
+        ))
+    )
+
+
+def fetch_page(seller_id, limit=DEFAULT_PAGE_SIZE, cursor=None, date_from=None, date_to=None):
+    """Returns (rows, next_cursor); next_cursor is None on the last page."""
+    query, merged = history_query(seller_id, date_from, date_to)
+    if cursor:
+        query = query.where(_after(merged, cursor))
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def to_dict(row):
+    if row.kind == 'sale':
+        return {
+            "id": f"sale-{row.id}",
+            "type": "credit",
+            "amount": row.amount,
+            "date": row.date.isoformat(),
+            "description": f"Sale: {row.name or 'Deleted product'}",
+            "status": row.status
+        }
+    return {
+        "id": f"withdraw-{row.id}",
+        "type": "debit",
+        "amount": row.amount,
+        "date": row.date.isoformat(),
+        "description": f"Withdrawal Request #{row.id}",
+        "status": row.status
+    }
+
+
+def iter_csv(seller_id, date_from=None, date_to=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the CSV export a chunk at a time, walking the same keyset pages."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    cursor = None
+    while True:
+        rows, next_cursor = fetch_page(seller_id, chunk_size, cursor, date_from, date_to)
+        for row in rows:
+            t = to_dict(row)
+            writer.writerow([t[c] for c in CSV_COLUMNS])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        if not next_cursor:
+            return
+        cursor = decode_cursor(next_cursor)
@@ -0,0 +1,243 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import SellerLedgerEntry, SellerBalance, Order, OrderItem, Product, PaymentTransaction, WithdrawalRequest
+
+# Every change to what the platform owes a seller is an immutable
+# SellerLedgerEntry: paid order lines credit the seller, refunds and withdrawals
+# debit them. Each entry is applied to the seller's SellerBalance row in the
+# same transaction, so balances are read in O(1) and concurrent writers for a
+# seller serialize on that single row. References are unique per seller, which
+# makes posting idempotent (a replayed payment event cannot credit twice).
+
+PAID_STATUSES = ('paid',)
+
+
+def _ensure_balance(seller_id):
+    """Creates the seller's zero balance row unless it exists, without failing if another writer just did."""
+    row = {"seller_id": seller_id, "balance": 0.0, "total_sales": 0.0, "total_refunded": 0.0, "total_withdrawn": 0.0,
+           "updated_at": datetime.utcnow()}
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(SellerBalance).values(row).on_conflict_do_nothing(index_elements=['seller_id']))
+        return
+    if db.session.query(SellerBalance.seller_id).filter_by(seller_id=seller_id).first() is None:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(SellerBalance).values(row))
+        except IntegrityError:
+            pass  # Another writer created it first
+
+
+def lock_balance(seller_id):
+    """Returns the seller's balance row locked FOR UPDATE, creating it if needed."""
+    # Upsert first: two first postings for a seller must not both try to INSERT
+    _ensure_balance(seller_id)
+    return SellerBalance.query.filter_by(seller_id=seller_id).with_for_update().one()
+
+
+def get_balance(seller_id):
+    """Unlocked read of the seller's balance (zeros if nothing was posted yet)."""
+    return db.session.get(SellerBalance, seller_id) or \
+        SellerBalance(seller_id=seller_id, balance=0.0, total_sales=0.0, total_refunded=0.0, total_withdrawn=0.0)
+
+
+def _apply(bal, entry_type, amount):
+    bal.balance = round(bal.balance + amount, 2)
+    if entry_type == 'sale':
+        bal.total_sales = round(bal.total_sales + amount, 2)
+    elif entry_type == 'refund':
+        bal.total_refunded = round(bal.total_refunded - amount, 2)
+    elif entry_type in ('withdrawal', 'withdrawal_reversal'):
+        bal.total_withdrawn = round(bal.total_withdrawn - amount, 2)
+
+
+def post_entries(entries):
+    """
+    Posts entries (dicts with seller_id, entry_type, signed amount, reference and
+    optional order_id/order_item_id/withdrawal_id/description/created_at) in the
+    caller's transaction. Already-posted references are skipped. Balance rows are
+    locked in seller id order so multi-seller postings cannot deadlock.
+    Returns the rows that were posted.
+    """
+    if not entries:
+        return []
+    by_seller = defaultdict(list)
+    for e in entries:
+        by_seller[int(e['seller_id'])].append(e)
+    # Lock first, then check references, so a concurrent duplicate waits and is skipped.
+    balances = {seller_id: lock_balance(seller_id) for seller_id in sorted(by_seller)}
+    seen = set(db.session.query(SellerLedgerEntry.seller_id, SellerLedgerEntry.reference).filter(
+        SellerLedgerEntry.seller_id.in_(list(by_seller)),
+        SellerLedgerEntry.reference.in_(list({e['reference'] for e in entries}))
+    ).all())
+
+    now = datetime.utcnow()
+    posted = []
+    for seller_id in sorted(by_seller):
+        fresh = []
+        for e in by_seller[seller_id]:
+            if (seller_id, e['reference']) not in seen:
+                seen.add((seller_id, e['reference']))
+                fresh.append(e)
+        if not fresh:
+            continue
+        bal = balances[seller_id]
+        rows = []
+        for e in fresh:
+            amount = round(float(e['amount']), 2)
+            _apply(bal, e['entry_type'], amount)
+            rows.append({
+                "seller_id": seller_id,
+                "entry_type": e['entry_type'],
+                "amount": amount,
+                "balance_after": bal.balance,
+                "reference": e['reference'],
+                "order_id": e.get('order_id'),
+                "order_item_id": e.get('order_item_id'),
+                "withdrawal_id": e.get('withdrawal_id'),
+                "description": e.get('description'),
+                "created_at": e.get('created_at') or now
+            })
+        db.session.execute(db.insert(SellerLedgerEntry), rows)
+        posted.extend(rows)
+    return posted
+
+
+def _sale_entries(order_ids):
+    rows = db.session.query(OrderItem.id, OrderItem.order_id, OrderItem.seller_id, OrderItem.subtotal,
+                            Product.name, Order.created_at) \
+        .join(Order, Order.id == OrderItem.order_id) \
+        .outerjoin(Product, Product.id == OrderItem.product_id) \
+        .filter(OrderItem.order_id.in_(list(order_ids))).order_by(OrderItem.id).all()
+    return [{
+        "seller_id": r.seller_id,
+        "entry_type": 'sale',
+        "amount": r.subtotal,
+        "reference": f"order_item:{r.id}",
+        "order_id": r.order_id,
+        "order_item_id": r.id,
+        "description": f"Sale: {r.name or 'Deleted product'}",
+        "created_at": r.created_at
+    } for r in rows]
+
+
+def credit_orders(order_ids):
+    """Credits sellers for every line of the given (now paid) orders."""
+    if not order_ids:
+        return []
+    entries = _sale_entries(order_ids)
+    now = datetime.utcnow()
+    for e in entries:
+        e['created_at'] = now
+    return post_entries(entries)
+
+
+def credit_order(order):
+    return credit_orders([order.id])
+
+
+def debit_refund(order, amount, reference):
+    """
+    Debits sellers for a refund of `amount` against an order, split in proportion
+    to each seller's share of the order and capped at what is still credited.
+    """
+    rows = db.session.query(SellerLedgerEntry.seller_id, SellerLedgerEntry.entry_type, db.func.sum(SellerLedgerEntry.amount)) \
+        .filter(SellerLedgerEntry.order_id == order.id, SellerLedgerEntry.entry_type.in_(('sale', 'refund'))) \
+        .group_by(SellerLedgerEntry.seller_id, SellerLedgerEntry.entry_type).all()
+    sales, net = defaultdict(float), defaultdict(float)
+    for seller_id, entry_type, total in rows:
+        net[seller_id] += total
+        if entry_type == 'sale':
+            sales[seller_id] += total
+    fraction = min(1.0, amount / order.total_amount) if order.total_amount else 1.0
+    entries = []
+    for seller_id, credited in sales.items():
+        debit = min(net[seller_id], round(credited * fraction, 2))
+        if debit > 0:
+            entries.append({
+                "seller_id": seller_id,
+                "entry_type": 'refund',
+                "amount": -debit,
+                "reference": f"refund:{reference}",
+                "order_id": order.id,
+                "description": f"Refund for Order #{order.id}"
+            })
+    return post_entries(entries)
+
+
+def debit_withdrawal(wr):
+    """Debits a new withdrawal request. Call with the balance row already locked."""
+    return post_entries([{
+        "seller_id": wr.seller_id,
+        "entry_type": 'withdrawal',
+        "amount": -wr.amount,
+        "reference": f"withdrawal:{wr.id}",
+        "withdrawal_id": wr.id,
+        "description": f"Withdrawal Request #{wr.id}",
+        "created_at": wr.requested_at
+    }])
+
+
+def reverse_withdrawal(wr):
+    """Credits back a cancelled or rejected withdrawal."""
+    return post_entries([{
+        "seller_id": wr.seller_id,
+        "entry_type": 'withdrawal_reversal',
+        "amount": wr.amount,
+        "reference": f"withdrawal_reversal:{wr.id}",
+        "withdrawal_id": wr.id,
+        "description": f"Withdrawal #{wr.id} {wr.status}"
+    }])
+
+
+def backfill(seller_ids=None):
+    """
+    Builds ledger entries from existing history, one seller per transaction:
+    lines of paid orders, recorded refunds on those orders, and withdrawals that
+    were not rejected or cancelled. Safe to re-run; posted references are skipped.
+    Returns the number of entries posted.
+    """
+    if seller_ids is None:
+        seller_ids = {r[0] for r in db.session.query(OrderItem.seller_id).distinct()} | \
+                     {r[0] for r in db.session.query(WithdrawalRequest.seller_id).distinct()}
+    posted = 0
+    for seller_id in sorted(seller_ids):
+        paid_orders = [r[0] for r in db.session.query(OrderItem.order_id).join(Order, Order.id == OrderItem.order_id)
+                       .filter(OrderItem.seller_id == seller_id,
+                               Order.payment_status.in_(PAID_STATUSES + ('partially_refunded',)))
+                       .distinct().all()]
+        entries = [e for e in _sale_entries(paid_orders) if e['seller_id'] == seller_id] if paid_orders else []
+        for wr in WithdrawalRequest.query.filter(WithdrawalRequest.seller_id == seller_id,
+                                                 WithdrawalRequest.status.notin_(('rejected', 'cancelled'))):
+            entries.append({
+                "seller_id": seller_id,
+                "entry_type": 'withdrawal',
+                "amount": -wr.amount,
+                "reference": f"withdrawal:{wr.id}",
+                "withdrawal_id": wr.id,
+                "description": f"Withdrawal Request #{wr.id}",
+                "created_at": wr.requested_at
+            })
+        entries.sort(key=lambda e: e['created_at'] or datetime.min)
+        posted += len(post_entries(entries))
+
+        refunds = db.session.query(Order, db.func.sum(PaymentTransaction.amount)) \
+            .join(PaymentTransaction, PaymentTransaction.order_id == Order.id) \
+            .filter(Order.id.in_(paid_orders), PaymentTransaction.payment_status == 'refunded') \
+            .group_by(Order.id).all() if paid_orders else []
+        for order, refunded in refunds:
+            posted += len(debit_refund(order, refunded, f"backfill:{order.id}"))
+        db.session.commit()
+    return posted
+
+
+if __name__ == '__main__':
+    from app import create_app
+    with create_app().app_context():
+        print(f"Posted {backfill()} ledger entries")
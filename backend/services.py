@@ -1,9 +1,8 @@
-import smtplib
 import os
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import requests
+from outbound import http_client, smtp_pool
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -29,11 +28,7 @@ def send_email(to_email, subject, body_html):
     msg.attach(MIMEText(body_html, 'html'))
 
     try:
-        server = smtplib.SMTP(email_host, int(email_port))
-        server.starttls()
-        server.login(email_user, email_password)
-        server.sendmail(from_email, to_email, msg.as_string())
-        server.quit()
+        smtp_pool(email_host, email_port, email_user, email_password).send(from_email, to_email, msg.as_string())
         logger.info(f"Email sent to {to_email}")
         return True
     except Exception as e:
@@ -64,7 +59,7 @@ def send_push_notification(user_id, title, message, data=None):
     }
 
     try:
-        response = requests.post(endpoint, json=payload, headers=headers, timeout=5)
+        response = http_client('push').post(endpoint, json=payload, headers=headers)
         if response.status_code in [200, 201]:
              logger.info(f"Notification sent to user {user_id}")
              return True
@@ -74,3 +69,35 @@ def send_push_notification(user_id, title, message, data=None):
     except Exception as e:
         logger.error(f"Notification exception for user {user_id}: {e}")
         return False
+
+def send_push_batch(user_ids, title, message, data=None):
+    """
+    Sends the same push notification to many users. With NOTIFICATION_BATCH_ENDPOINT
+    set, one request carries the whole list of user_ids; otherwise each user gets a
+    call to NOTIFICATION_ENDPOINT over the pooled client. Returns the number sent.
+    """
+    api_key = os.getenv("NOTIFICATION_API_KEY")
+    batch_endpoint = os.getenv("NOTIFICATION_BATCH_ENDPOINT")
+
+    if not (api_key and batch_endpoint):
+        return sum(1 for uid in user_ids if send_push_notification(uid, title, message, data))
+
+    payload = {
+        "user_ids": list(user_ids),
+        "title": title,
+        "message": message,
+        "data": data or {}
+    }
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    try:
+        response = http_client('push').post(batch_endpoint, json=payload, headers=headers)
+        if response.status_code in [200, 201, 202]:
+            logger.info(f"Notification sent to {len(user_ids)} users")
+            return len(user_ids)
+        logger.error(f"Batch notification failed: {response.status_code} {response.text}")
+    except Exception as e:
+        logger.error(f"Batch notification exception for {len(user_ids)} users: {e}")
+    return 0
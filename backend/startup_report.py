@@ -0,0 +1,120 @@
+"""
+Cold-start report for the backend.
+
+Imports `app` and runs create_app() in a fresh interpreter under
+`python -X importtime`, then prints the time spent per top-level package and
+checks that heavy optional SDKs were not loaded at startup. Exits non-zero when
+startup exceeds the budget, so it can run in CI:
+
+    python startup_report.py --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Loaded on first use only; importing any of these at startup is a regression.
+LAZY_MODULES = ('google.genai', 'PIL', 'razorpay', 'stripe')
+DEFAULT_BUDGET_MS = 1500
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+built = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (built - imported) * 1000,
+    "lazy_loaded": [m for m in %r if m in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def package_costs(rows):
+    """Self time summed per top-level package, in ms, most expensive first."""
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return sorted(((pkg, us / 1000.0) for pkg, us in totals.items()), key=lambda x: -x[1])
+
+
+def run_probe(backend_dir=None):
+    backend_dir = backend_dir or os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE], cwd=backend_dir,
+                          capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['packages'] = package_costs(parse_importtime(proc.stderr))
+    return result
+
+
+def build_report(runs=3, budget_ms=DEFAULT_BUDGET_MS, top=15):
+    """Median of several cold starts; per-package costs come from the median run."""
+    probes = sorted((run_probe() for _ in range(max(1, runs))), key=lambda p: p['import_ms'] + p['create_app_ms'])
+    median = probes[len(probes) // 2]
+    total = median['import_ms'] + median['create_app_ms']
+    return {
+        "total_ms": round(total, 1),
+        "import_ms": round(median['import_ms'], 1),
+        "create_app_ms": round(median['create_app_ms'], 1),
+        "runs_ms": [round(p['import_ms'] + p['create_app_ms'], 1) for p in probes],
+        "spread_ms": round(statistics.pstdev([p['import_ms'] + p['create_app_ms'] for p in probes]), 1),
+        "packages": [{"package": pkg, "ms": round(ms, 1)} for pkg, ms in median['packages'][:top]],
+        "lazy_loaded": median['lazy_loaded'],
+        "budget_ms": budget_ms,
+        "ok": total <= budget_ms and not median['lazy_loaded']
+    }
+
+
+def print_report(report):
+    print(f"Cold start: {report['total_ms']} ms (import {report['import_ms']} ms + create_app {report['create_app_ms']} ms), "
+          f"budget {report['budget_ms']} ms, runs {report['runs_ms']}")
+    print(f"{'package':<30} {'self ms':>10}")
+    for row in report['packages']:
+        print(f"{row['package']:<30} {row['ms']:>10.1f}")
+    if report['lazy_loaded']:
+        print(f"FAIL: loaded at startup but should be lazy: {', '.join(report['lazy_loaded'])}")
+    if report['total_ms'] > report['budget_ms']:
+        print(f"FAIL: cold start {report['total_ms']} ms exceeds budget {report['budget_ms']} ms")
+    if report['ok']:
+        print("OK")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-package import cost and check the cold-start budget.")
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = build_report(runs=args.runs, budget_ms=args.budget_ms, top=args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
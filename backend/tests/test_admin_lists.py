@@ -0,0 +1,163 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from unittest import mock
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Order, OrderItem, Coupon
+
+class AdminListsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.admin = User(name="Admin", email="admin@test.com", role="admin")
+        self.sellers = [User(name=f"Seller {i}", email=f"seller{i}@test.com", role="seller", is_approved=i % 2 == 0) for i in range(3)]
+        self.buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        for u in [self.admin, self.buyer] + self.sellers:
+            u.set_password("password")
+        cat = Category(name="Kitchen", slug="kitchen")
+        db.session.add_all([self.admin, self.buyer, cat] + self.sellers)
+        db.session.commit()
+        token = create_access_token(identity=str(self.admin.id), additional_claims={'role': 'admin'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+        self.products = []
+        for i in range(7):
+            p = Product(seller_id=self.sellers[i % 3].id, category_id=cat.id, name=f"Item {i}", sku=f"SKU-{i}",
+                        price=[5, 3, 5, 1, 9, 5, 2][i], status='pending' if i < 2 else 'approved')
+            db.session.add(p)
+            self.products.append(p)
+        db.session.flush()
+        db.session.add_all([Inventory(product_id=p.id, stock_qty=10) for p in self.products])
+
+        start = datetime(2024, 5, 1)
+        for i in range(5):
+            order = Order(user_id=self.buyer.id, total_amount=10 * i, status='paid' if i % 2 else 'pending',
+                          created_at=start + timedelta(days=i))
+            db.session.add(order)
+            db.session.flush()
+            # Two lines each, from different sellers
+            for p in (self.products[i], self.products[i + 1]):
+                db.session.add(OrderItem(order_id=order.id, product_id=p.id, seller_id=p.seller_id, quantity=1, price=p.price, subtotal=p.price))
+        db.session.add_all([Coupon(code=f"SAVE{i}", discount_percent=10, expiry_date=start if i else None) for i in range(3)])
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def get(self, url, expect=200, **params):
+        res = self.app.get(url, headers=self.headers, query_string=params)
+        self.assertEqual(res.status_code, expect, res.json)
+        return res.json
+
+    def walk(self, url, **params):
+        """Every item across all pages, plus the number of pages."""
+        items, pages, cursor = [], 0, None
+        while True:
+            data = self.get(url, **dict(params, **({'cursor': cursor} if cursor else {})))
+            items.extend(data['items'])
+            pages += 1
+            cursor = data['next_cursor']
+            if not cursor:
+                return items, pages
+
+    def test_keyset_pages_with_ties(self):
+        # Prices have ties, so the id tie-breaker decides the order within a price
+        items, pages = self.walk('/api/admin/products', sort='price', limit=2)
+        self.assertEqual(pages, 4)
+        expected = sorted(self.products, key=lambda p: (p.price, p.id))
+        self.assertEqual([i['id'] for i in items], [p.id for p in expected])
+        self.assertIn('seller_name', items[0])
+
+        items, _ = self.walk('/api/admin/products', sort='-price', limit=3)
+        self.assertEqual([i['id'] for i in items], [p.id for p in sorted(self.products, key=lambda p: (-p.price, -p.id))])
+
+    def test_nulls_sort_last(self):
+        for sort in ('expiry_date', '-expiry_date'):
+            items, _ = self.walk('/api/admin/coupons', sort=sort, limit=1)
+            self.assertEqual(len(items), 3)
+            self.assertEqual(items[-1]['code'], 'SAVE0')
+
+    def test_filters(self):
+        data = self.get('/api/admin/sellers', is_approved='true')
+        self.assertEqual({u['email'] for u in data['items']}, {'seller0@test.com', 'seller2@test.com'})
+        self.assertEqual(len(self.get('/api/admin/users', role='seller')['items']), 3)
+        self.assertEqual(self.get('/api/admin/users', q='buyer@')['items'][0]['id'], self.buyer.id)
+        self.assertEqual(len(self.get('/api/admin/products-for-approval')['items']), 2)
+
+        orders = self.get('/api/admin/orders', status='paid')['items']
+        self.assertEqual([o['total'] for o in orders], [30, 10])
+        # Orders 1 and 2 both contain product 2; each is listed once
+        orders = self.get('/api/admin/orders', sku='SKU-2')['items']
+        self.assertEqual(sorted(o['total'] for o in orders), [10, 20])
+        orders = self.get('/api/admin/orders', start_date='2024-05-02', end_date='2024-05-03')['items']
+        self.assertEqual([o['total'] for o in orders], [20, 10])
+        self.assertEqual(set(orders[0]['seller_names'].split(', ')), {"Seller 0", "Seller 2"})
+
+    def test_orders_page_through_projection(self):
+        items, pages = self.walk('/api/admin/orders', sort='total', limit=2)
+        self.assertEqual(pages, 3)
+        self.assertEqual([o['total'] for o in items], [0, 10, 20, 30, 40])
+        self.assertTrue(all(o['customer_name'] == 'Buyer' and o['seller_names'] for o in items))
+        # The sku filter is a case-insensitive prefix match
+        self.assertEqual(len(self.get('/api/admin/orders', sku='SKU-')['items']), 5)
+        self.assertEqual(sorted(o['total'] for o in self.get('/api/admin/orders', sku='sku-2')['items']), [10, 20])
+        self.assertEqual(self.get('/api/admin/orders', sku='KU-2')['items'], [])
+
+    def test_sku_filter_uses_pattern_match_on_postgres(self):
+        import admin_lists
+        bind = mock.Mock(dialect=postgresql.dialect())
+        with mock.patch.object(db.session, 'get_bind', return_value=bind):
+            clause = admin_lists._order_sku('ab_1%')
+        compiled = clause.compile(dialect=postgresql.dialect())
+        self.assertIn("upper(product.sku) LIKE", str(compiled))
+        self.assertIn('AB\\_1\\%%', compiled.params.values())
+
+    def test_rejects_unknown_sort_and_bad_params(self):
+        self.get('/api/admin/users', expect=400, sort='password_hash')
+        self.get('/api/admin/users', expect=400, is_active='maybe')
+        self.get('/api/admin/orders', expect=400, start_date='yesterday')
+        self.get('/api/admin/orders', expect=400, cursor='garbage')
+        # A cursor only continues the sort it was issued for
+        cursor = self.get('/api/admin/products', sort='price', limit=2)['next_cursor']
+        self.get('/api/admin/products', expect=400, sort='name', cursor=cursor)
+        self.assertEqual(len(self.get('/api/admin/products', limit=10000)['items']), 7)
+
+    def test_query_count_does_not_grow_with_page(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            def count(url, limit):
+                statements.clear()
+                self.get(url, limit=limit)
+                return len(statements)
+            for url in ('/api/admin/orders', '/api/admin/products', '/api/admin/users'):
+                self.assertEqual(count(url, 1), count(url, 5), url)
+            # Orders, customers and seller names come from one statement
+            count('/api/admin/orders', 5)
+            self.assertEqual(len([s for s in statements if 'order_item' in s]), 1)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+from datetime import datetime, date
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db, cache
+from models import User, Order, DailyOrderStats
+import admin_stats
+
+class AdminStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.admin = User(name="Admin", email="admin@test.com", role="admin")
+        self.buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        for u in (self.admin, self.buyer):
+            u.set_password("password")
+        db.session.add_all([self.admin, self.buyer])
+        db.session.commit()
+        token = create_access_token(identity=str(self.admin.id), additional_claims={'role': 'admin'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+        # Mon 4, Tue 5 and Sun 10 March (one ISO week), then 2 April
+        for when, amount in ((datetime(2024, 3, 4, 9), 10), (datetime(2024, 3, 4, 23, 59), 5.5),
+                             (datetime(2024, 3, 5, 1), 20), (datetime(2024, 3, 10, 12), 1), (datetime(2024, 4, 2, 8), 100)):
+            self.place(when, amount)
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def place(self, when, amount):
+        order = Order(user_id=self.buyer.id, total_amount=amount, status='pending', created_at=when)
+        db.session.add(order)
+        db.session.flush()
+        admin_stats.record_orders([order.id])
+        db.session.commit()
+        return order
+
+    def dashboard(self, **params):
+        res = self.app.get('/api/admin/dashboard', headers=self.headers, query_string=params)
+        self.assertEqual(res.status_code, 200)
+        return res.json
+
+    def test_daily_rollup_and_range(self):
+        row = db.session.get(DailyOrderStats, date(2024, 3, 4))
+        self.assertEqual((row.orders, row.revenue), (2, 15.5))
+
+        data = self.dashboard(start_date='2024-03-04', end_date='2024-03-05')
+        self.assertEqual((data['total_orders'], data['total_sales']), (3, 35.5))
+        self.assertEqual(data['chart_data'], [
+            {"name": "2024-03-04", "orders": 2, "sales": 15.5},
+            {"name": "2024-03-05", "orders": 1, "sales": 20},
+        ])
+        self.assertEqual(data['total_users'], 1)
+
+    def test_week_and_month_buckets(self):
+        weeks = self.dashboard(interval='week')['chart_data']
+        self.assertEqual([(p['name'], p['orders']) for p in weeks], [('2024-10', 4), ('2024-14', 1)])
+        months = self.dashboard(interval='month')['chart_data']
+        self.assertEqual([(p['name'], p['orders'], p['sales']) for p in months], [('2024-03', 4, 36.5), ('2024-04', 1, 100)])
+        # Unknown intervals fall back to days
+        self.assertEqual(len(self.dashboard(interval='hour')['chart_data']), 4)
+
+        # A week spanning New Year is labelled like strftime('%Y-%W'): 2024-53, then 2025-00
+        for when in (datetime(2024, 12, 31), datetime(2025, 1, 1), datetime(2025, 1, 5), datetime(2025, 1, 6)):
+            self.place(when, 1)
+        weeks = self.dashboard(interval='week', start_date='2024-12-01', end_date='2025-01-31')['chart_data']
+        self.assertEqual([(p['name'], p['orders']) for p in weeks], [('2024-53', 1), ('2025-00', 2), ('2025-01', 1)])
+
+    def test_cached_per_range_and_rebuild(self):
+        before = self.dashboard()
+        self.place(datetime(2024, 4, 2, 9), 50)
+        self.assertEqual(self.dashboard()['total_orders'], before['total_orders'])
+        cache.client._data.clear()
+        self.assertEqual(self.dashboard()['total_orders'], before['total_orders'] + 1)
+
+        incremental = {r.day: (r.orders, r.revenue) for r in DailyOrderStats.query}
+        self.assertEqual(admin_stats.rebuild(), 4)
+        self.assertEqual({r.day: (r.orders, r.revenue) for r in DailyOrderStats.query}, incremental)
+
+if __name__ == '__main__':
+    unittest.main()
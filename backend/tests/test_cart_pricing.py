@@ -0,0 +1,139 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, File, ProductImage, Cart, CartItem, Coupon, Order
+
+class CartPricingTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+
+        db.create_all()
+
+        self.user = User(name="Buyer", email="buyer@test.com", role="user")
+        self.user.set_password("password")
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.seller.set_password("password")
+        self.other_seller = User(name="Other", email="other@test.com", role="seller", is_approved=True)
+        self.other_seller.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([self.user, self.seller, self.other_seller, cat])
+        db.session.commit()
+
+        self.cart = Cart(user_id=self.user.id)
+        db.session.add(self.cart)
+        db.session.flush()
+        self.products = []
+        for idx in range(5):
+            seller = self.seller if idx % 2 == 0 else self.other_seller
+            p = Product(seller_id=seller.id, category_id=cat.id, name=f"P{idx}", price=100 + idx, mrp=200, status='approved')
+            db.session.add(p)
+            db.session.flush()
+            db.session.add(Inventory(product_id=p.id, stock_qty=10))
+            for pos in (1, 0):
+                f = File(owner_id=seller.id, filename=f"{idx}-{pos}.png", stored_filename=f"{idx}-{pos}.png", filepath=f"/tmp/{idx}-{pos}.png")
+                db.session.add(f)
+                db.session.flush()
+                db.session.add(ProductImage(product_id=p.id, file_id=f.id, position=pos))
+            db.session.add(CartItem(cart_id=self.cart.id, product_id=p.id, quantity=2))
+            self.products.append(p)
+        db.session.commit()
+
+        res = self.app.post('/api/auth/login', json={'email': 'buyer@test.com', 'password': 'password'})
+        self.headers = {'Authorization': f"Bearer {res.get_json()['access_token']}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _count_queries(self, fn):
+        statements = []
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_execute)
+        return result, statements
+
+    def test_cart_totals_and_first_image(self):
+        res = self.app.get('/api/user/cart', headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        data = res.get_json()
+        self.assertEqual(len(data['items']), 5)
+        self.assertEqual(data['total'], sum((100 + i) * 2 for i in range(5)))
+        self.assertEqual(data['final_total'], data['total'])
+        first = data['items'][0]
+        self.assertEqual(first['stock_qty'], 10)
+        # Position 0 image wins over the earlier-inserted position 1 image
+        pi = ProductImage.query.filter_by(product_id=self.products[0].id, position=0).first()
+        self.assertEqual(first['image_url'], f"/api/files/{pi.file_id}/download")
+
+    def test_cart_view_is_single_query(self):
+        db.session.expire_all()
+        res, statements = self._count_queries(lambda: self.app.get('/api/user/cart', headers=self.headers))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len([s for s in statements if s.lstrip().upper().startswith('SELECT')]), 1)
+
+    def test_seller_coupon_discount(self):
+        db.session.add(Coupon(code='SELL10', type='seller', seller_id=self.seller.id, discount_percent=10))
+        self.cart.coupon_code = 'SELL10'
+        db.session.commit()
+        data = self.app.get('/api/user/cart', headers=self.headers).get_json()
+        seller_total = sum((100 + i) * 2 for i in range(5) if i % 2 == 0)
+        self.assertAlmostEqual(data['discount'], seller_total * 0.10)
+        self.assertEqual(data['coupon']['code'], 'SELL10')
+
+    def test_rejected_coupon_is_cleared(self):
+        db.session.add(Coupon(code='BIG', type='admin', discount_percent=10, min_order_value=100000))
+        self.cart.coupon_code = 'BIG'
+        db.session.commit()
+        data = self.app.get('/api/user/cart', headers=self.headers).get_json()
+        self.assertEqual(data['discount'], 0)
+        self.assertIsNone(data['coupon'])
+        # Reading the cart leaves the row alone; the next cart write detaches the coupon
+        db.session.expire_all()
+        self.assertEqual(Cart.query.get(self.cart.id).coupon_code, 'BIG')
+        self.app.post('/api/user/cart/items', json={'product_id': self.products[0].id, 'quantity': 1}, headers=self.headers)
+        db.session.expire_all()
+        self.assertIsNone(Cart.query.get(self.cart.id).coupon_code)
+
+    def test_checkout_matches_cart_view(self):
+        db.session.add(Coupon(code='ALL5', type='admin', discount_percent=5, max_discount_amount=20))
+        self.cart.coupon_code = 'ALL5'
+        db.session.commit()
+        view = self.app.get('/api/user/cart', headers=self.headers).get_json()
+
+        res = self.app.post('/api/orders', json={'payment_method': 'cod'}, headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        order = Order.query.get(res.get_json()['order_id'])
+        self.assertAlmostEqual(order.total_amount, view['final_total'])
+        self.assertEqual(len(order.items), 5)
+        self.assertEqual(CartItem.query.filter_by(cart_id=self.cart.id).count(), 0)
+        self.assertEqual(Coupon.query.filter_by(code='ALL5').first().used_count, 1)
+        self.assertEqual(Inventory.query.filter_by(product_id=self.products[0].id).first().stock_qty, 8)
+
+    def test_checkout_rejects_unapproved_product(self):
+        self.products[1].status = 'rejected'
+        db.session.commit()
+        res = self.app.post('/api/orders', json={'payment_method': 'cod'}, headers=self.headers)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Order.query.count(), 0)
+        self.assertEqual(Inventory.query.filter_by(product_id=self.products[0].id).first().stock_qty, 10)
+
+if __name__ == '__main__':
+    unittest.main()
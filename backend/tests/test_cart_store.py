@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Cart, CartItem
+
+class CartStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+
+        db.create_all()
+
+        self.user = User(name="Buyer", email="buyer@test.com", role="user")
+        self.user.set_password("password")
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.seller.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([self.user, self.seller, cat])
+        db.session.commit()
+
+        self.product = Product(seller_id=self.seller.id, category_id=cat.id, name="Lamp", price=100, mrp=150, status='approved')
+        db.session.add(self.product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=self.product.id, stock_qty=5))
+        db.session.commit()
+
+        self.headers = self._login('buyer@test.com')
+        self.seller_headers = self._login('seller@test.com')
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _login(self, email):
+        res = self.app.post('/api/auth/login', json={'email': email, 'password': 'password'})
+        return {'Authorization': f"Bearer {res.get_json()['access_token']}"}
+
+    def _selects(self, fn):
+        statements = []
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_execute)
+        return result, statements
+
+    def test_reading_empty_cart_does_not_create_one(self):
+        res = self.app.get('/api/user/cart', headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()['items'], [])
+        self.assertEqual(Cart.query.count(), 0)
+
+    def test_cached_read_skips_database(self):
+        self.app.post('/api/user/cart/items', json={'product_id': self.product.id, 'quantity': 2}, headers=self.headers)
+        res, selects = self._selects(lambda: self.app.get('/api/user/cart', headers=self.headers))
+        self.assertEqual(res.get_json()['total'], 200)
+        self.assertEqual(selects, [])
+
+    def test_writes_go_through_to_tables_and_cache(self):
+        self.app.post('/api/user/cart/items', json={'product_id': self.product.id, 'quantity': 1}, headers=self.headers)
+        self.app.post('/api/user/cart/items', json={'product_id': self.product.id, 'quantity': 2}, headers=self.headers)
+        item = CartItem.query.first()
+        self.assertEqual(item.quantity, 3)
+        self.assertEqual(self.app.get('/api/user/cart', headers=self.headers).get_json()['items'][0]['quantity'], 3)
+
+        self.app.put(f'/api/user/cart/items/{item.id}', json={'quantity': 1}, headers=self.headers)
+        self.assertEqual(self.app.get('/api/user/cart', headers=self.headers).get_json()['total'], 100)
+
+        res = self.app.delete(f'/api/user/cart/items/{item.id}', headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(CartItem.query.count(), 0)
+        self.assertEqual(self.app.get('/api/user/cart', headers=self.headers).get_json()['items'], [])
+
+    def test_other_users_item_is_not_found(self):
+        self.app.post('/api/user/cart/items', json={'product_id': self.product.id}, headers=self.headers)
+        item = CartItem.query.first()
+        res = self.app.delete(f'/api/user/cart/items/{item.id}', headers=self.seller_headers)
+        self.assertEqual(res.status_code, 404)
+
+    def test_price_change_invalidates_cached_cart(self):
+        self.app.post('/api/user/cart/items', json={'product_id': self.product.id, 'quantity': 1}, headers=self.headers)
+        self.assertEqual(self.app.get('/api/user/cart', headers=self.headers).get_json()['total'], 100)
+
+        res = self.app.put(f'/api/seller/products/{self.product.id}', json={'price': 80}, headers=self.seller_headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.app.get('/api/user/cart', headers=self.headers).get_json()['total'], 80)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory
+
+class CatalogBulkEditTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        other = User(name="Other", email="other@test.com", role="seller", is_approved=True)
+        for u in (seller, other):
+            u.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([seller, other, cat])
+        db.session.commit()
+        self.products = []
+        for n in range(20):
+            p = Product(seller_id=seller.id, category_id=cat.id, name=f"P{n}", price=10, sku=f"SKU-{n}", status='approved')
+            db.session.add(p)
+            self.products.append(p)
+        self.foreign = Product(seller_id=other.id, category_id=cat.id, name="Theirs", price=10, sku="SKU-X")
+        db.session.add(self.foreign)
+        db.session.flush()
+        for p in self.products[:10]:
+            db.session.add(Inventory(product_id=p.id, stock_qty=1))
+        db.session.commit()
+        token = create_access_token(identity=str(seller.id), additional_claims={'role': 'seller'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def put(self, items):
+        return self.app.put('/api/seller/products/bulk', json={'items': items}, headers=self.headers)
+
+    def test_bulk_edit_applies_rows_and_reports_errors(self):
+        items = [{'sku': f"SKU-{n}", 'stock_qty': 100 + n} for n in range(20)]
+        items += [
+            {'product_id': self.products[0].id, 'price': 12.5, 'mrp': 15},
+            {'sku': 'SKU-1', 'status': 'inactive'},
+            {'sku': 'SKU-X', 'stock_qty': 5},
+            {'sku': 'SKU-2', 'status': 'approved'},
+            {'sku': 'SKU-3', 'stock_qty': -1},
+            {'price': 3}
+        ]
+        with patch('catalog_bulk.emit_update') as emit:
+            data = self.put(items).get_json()
+        self.assertEqual((data['updated'], data['errors']), (22, 4))
+        self.assertEqual(data['results'][22]['error'], "Product not found: SKU-X")
+        self.assertEqual([r['status'] for r in data['results'][23:]], ['error'] * 3)
+        emit.assert_called_once()
+
+        db.session.expire_all()
+        stock = {p.sku: p.inventory.stock_qty for p in Product.query.filter(Product.sku.like('SKU-%'), Product.seller_id == self.products[0].seller_id)}
+        self.assertEqual(stock, {f"SKU-{n}": 100 + n for n in range(20)})
+        p0, p1 = db.session.get(Product, self.products[0].id), db.session.get(Product, self.products[1].id)
+        self.assertEqual((p0.price, p0.mrp, p0.status), (12.5, 15, 'approved'))
+        self.assertEqual(p1.status, 'inactive')
+        self.assertIsNone(db.session.get(Product, self.foreign.id).inventory)
+
+    def test_statement_count_is_per_chunk_not_per_row(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            self.put([{'sku': f"SKU-{n}", 'stock_qty': 7, 'price': 11} for n in range(20)])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        writes = [s for s in statements if s.lstrip().upper().startswith(('UPDATE', 'INSERT'))]
+        self.assertLessEqual(len(writes), 3)
+
+    def test_rejects_non_finite_prices(self):
+        items = [{'sku': 'SKU-0', 'price': 'nan'}, {'sku': 'SKU-1', 'price': 'inf'}, {'sku': 'SKU-2', 'mrp': '-Infinity'}]
+        data = self.put(items).get_json()
+        self.assertEqual((data['updated'], data['errors']), (0, 3))
+        # Bare NaN/Infinity literals are accepted by the JSON parser
+        res = self.app.put('/api/seller/products/bulk', data='{"items": [{"sku": "SKU-3", "price": NaN, "mrp": Infinity}]}',
+                           content_type='application/json', headers=self.headers)
+        self.assertEqual(res.get_json()['errors'], 1)
+        db.session.expire_all()
+        self.assertEqual({p.price for p in Product.query.filter(Product.sku.in_(['SKU-0', 'SKU-1', 'SKU-3']))}, {10})
+
+    def test_rejects_empty_body(self):
+        self.assertEqual(self.put([]).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
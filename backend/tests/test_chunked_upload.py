@@ -0,0 +1,168 @@
+import unittest
+import sys
+import os
+import hashlib
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Category, File, Product, UploadSession
+import chunked_upload
+
+VIDEO = os.urandom(100_000)
+
+class ChunkedUploadTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client, in-memory database and a temporary upload folder."""
+        self.upload_folder = tempfile.mkdtemp()
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'UPLOAD_FOLDER': self.upload_folder})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.seller.set_password("password")
+        self.other = User(name="Other", email="other@test.com", role="seller", is_approved=True)
+        self.other.set_password("password")
+        db.session.add_all([self.seller, self.other])
+        db.session.commit()
+        token = create_access_token(identity=str(self.seller.id), additional_claims={'role': 'seller'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database and uploads."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.upload_folder, ignore_errors=True)
+
+    def _start(self, size=len(VIDEO), filename='banner.mp4'):
+        return self.app.post('/api/upload/sessions', headers=self.headers, json={'filename': filename, 'size': size})
+
+    def _put(self, session_id, offset, data):
+        return self.app.put(f'/api/upload/sessions/{session_id}', data=data,
+                            headers=dict(self.headers, **{'Upload-Offset': str(offset)}))
+
+    def test_resumable_upload(self):
+        res = self._start()
+        self.assertEqual(res.status_code, 201)
+        sid = res.json['id']
+
+        self.assertEqual(self._put(sid, 0, VIDEO[:40_000]).json['offset'], 40_000)
+        # A retried chunk (the response was lost) and a gap are both rejected with the real offset
+        retry = self._put(sid, 0, VIDEO[:40_000])
+        self.assertEqual((retry.status_code, retry.json['offset']), (409, 40_000))
+        self.assertEqual(self._put(sid, 90_000, VIDEO[90_000:]).status_code, 409)
+
+        # Client reconnects and asks where to resume
+        offset = self.app.get(f'/api/upload/sessions/{sid}', headers=self.headers).json['offset']
+        early = self.app.post(f'/api/upload/sessions/{sid}/complete', headers=self.headers, json={'sha256': 'x'})
+        self.assertEqual(early.status_code, 409)
+        self.assertEqual(self._put(sid, offset, VIDEO[offset:]).json['offset'], len(VIDEO))
+
+        digest = hashlib.sha256(VIDEO).hexdigest()
+        done = self.app.post(f'/api/upload/sessions/{sid}/complete', headers=self.headers, json={'sha256': digest})
+        self.assertEqual(done.status_code, 201)
+        frec = db.session.get(File, done.json['id'])
+        self.assertEqual((frec.filename, frec.size, frec.sha256), ('banner.mp4', len(VIDEO), digest))
+        with open(frec.filepath, 'rb') as f:
+            self.assertEqual(f.read(), VIDEO)
+        self.assertFalse(os.listdir(chunked_upload.partial_dir(self.upload_folder)))
+
+        # Completing again returns the same file
+        again = self.app.post(f'/api/upload/sessions/{sid}/complete', headers=self.headers, json={'sha256': digest})
+        self.assertEqual(again.json['id'], frec.id)
+
+    def test_checksum_mismatch_and_limits(self):
+        sid = self._start(size=10).json['id']
+        self.assertEqual(self._put(sid, 0, b'0123456789abc').status_code, 400)  # larger than the file
+        self._put(sid, 0, b'0123456789')
+        bad = self.app.post(f'/api/upload/sessions/{sid}/complete', headers=self.headers, json={'sha256': '0' * 64})
+        self.assertEqual((bad.status_code, bad.json['offset']), (400, 0))
+        self.assertEqual(File.query.count(), 0)
+
+        self.assertEqual(self._start(size=0).status_code, 400)
+        self.assertEqual(self._start(size=chunked_upload.MAX_UPLOAD_SIZE + 1).status_code, 400)
+
+        # Another user's session is not visible
+        token = create_access_token(identity=str(self.other.id), additional_claims={'role': 'seller'})
+        res = self.app.get(f'/api/upload/sessions/{sid}', headers={'Authorization': f"Bearer {token}"})
+        self.assertEqual(res.status_code, 404)
+
+    def test_failed_and_abandoned_completions_can_be_retried(self):
+        data = b'0123456789'
+        digest = hashlib.sha256(data).hexdigest()
+        sid = self._start(size=10).json['id']
+        self._put(sid, 0, data)
+        complete = lambda: self.app.post(f'/api/upload/sessions/{sid}/complete', headers=self.headers, json={'sha256': digest})
+
+        # store_path fails: the session is left 'failed' and a retry finishes it
+        with patch('chunked_upload.file_store.store_path', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                complete()
+        self.assertEqual(db.session.get(UploadSession, sid).status, 'failed')
+        self.assertEqual(complete().status_code, 201)
+
+        # A worker died after claiming: busy until COMPLETE_TIMEOUT, then claimable again
+        sid = self._start(size=10).json['id']
+        self._put(sid, 0, data)
+        session = db.session.get(UploadSession, sid)
+        session.status = 'completing'
+        db.session.commit()
+        self.assertEqual(complete().json['error'], "Upload is already being completed")
+        session.updated_at = datetime.utcnow() - chunked_upload.COMPLETE_TIMEOUT - timedelta(minutes=1)
+        db.session.commit()
+        self.assertEqual(complete().status_code, 201)
+
+        # The temp file is gone too: the client is sent back to offset 0
+        sid = self._start(size=10).json['id']
+        self._put(sid, 0, data)
+        session = db.session.get(UploadSession, sid)
+        session.status = 'failed'
+        db.session.commit()
+        os.remove(session.temp_path)
+        self.assertEqual((complete().status_code, db.session.get(UploadSession, sid).received), (400, 0))
+        self._put(sid, 0, data)
+        self.assertEqual(complete().status_code, 201)
+
+    def test_stale_sessions_expire(self):
+        sid = self._start().json['id']
+        session = db.session.get(UploadSession, sid)
+        session.updated_at = datetime.utcnow() - chunked_upload.SESSION_TTL - timedelta(minutes=1)
+        db.session.commit()
+        self.assertEqual(chunked_upload.expire_sessions(self.upload_folder), 1)
+        self.assertIsNone(db.session.get(UploadSession, sid))
+        self.assertFalse(os.path.exists(session.temp_path))
+
+    def test_product_uses_uploaded_files(self):
+        cat = Category(name="Kitchen", slug="kitchen")
+        db.session.add(cat)
+        db.session.commit()
+        sid = self._start(size=4, filename='photo.png').json['id']
+        self._put(sid, 0, b'\x89PNG')
+        file_id = self.app.post(f'/api/upload/sessions/{sid}/complete', headers=self.headers,
+                                json={'sha256': hashlib.sha256(b'\x89PNG').hexdigest()}).json['id']
+        foreign = File(owner_id=self.other.id, filename='x.png', stored_filename='x.png', filepath='/nowhere', status='active')
+        db.session.add(foreign)
+        db.session.commit()
+
+        res = self.app.post('/api/seller/products', headers=self.headers, json={
+            'name': 'Bowl', 'price': 10, 'category_id': cat.id, 'file_ids': [file_id, foreign.id]
+        })
+        self.assertEqual(res.status_code, 201)
+        product = db.session.get(Product, res.json['product']['id'])
+        self.assertEqual([pi.file_id for pi in product.product_images], [file_id])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from app import create_app
+from extensions import db
+from models import User, File
+import file_store
+
+VIDEO = bytes(range(256)) * 40
+
+class FileServingTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client, in-memory database and a temporary upload folder."""
+        self.upload_folder = tempfile.mkdtemp()
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'UPLOAD_FOLDER': self.upload_folder})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = User(name="Admin", email="admin@test.com", role="admin", is_approved=True)
+        owner.set_password("password")
+        db.session.add(owner)
+        db.session.commit()
+        self.file, _ = file_store.store_file(VIDEO, owner.id, self.upload_folder, filename='banner.mp4')
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database and uploads."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.upload_folder, ignore_errors=True)
+
+    def _get(self, url, **headers):
+        response = self.app.get(url, headers=headers)
+        body = response.data
+        response.close()
+        return response, body
+
+    def test_download_has_strong_etag_and_is_immutable(self):
+        url = f'/api/files/{self.file.id}/download'
+        response, body = self._get(url)
+        self.assertEqual(body, VIDEO)
+        self.assertEqual(response.headers['ETag'], f'"{self.file.sha256}"')
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+        self.assertEqual(response.mimetype, 'video/mp4')
+
+        response, body = self._get(url, **{'If-None-Match': f'"{self.file.sha256}"'})
+        self.assertEqual((response.status_code, body), (304, b''))
+
+    def test_range_requests(self):
+        response, body = self._get(f'/api/files/{self.file.id}/download', Range='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, VIDEO[100:200])
+        self.assertEqual(response.headers['Content-Range'], f'bytes 100-199/{len(VIDEO)}')
+
+    def test_serve_upload_caching(self):
+        blob = os.path.relpath(self.file.filepath, self.upload_folder).replace(os.sep, '/')
+        response, body = self._get(f'/api/uploads/{blob}')
+        self.assertEqual(body, VIDEO)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.headers['ETag'], f'"{self.file.sha256}"')
+
+        with open(os.path.join(self.upload_folder, 'legacy_logo.png'), 'wb') as f:
+            f.write(b'png')
+        response, _ = self._get('/api/uploads/legacy_logo.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, 3600)
+
+        self.assertEqual(self._get('/api/uploads/../app.log')[0].status_code, 404)
+        self.assertEqual(self._get('/api/uploads/missing.png')[0].status_code, 404)
+
+    def test_proxy_offload(self):
+        self.flask_app.config['FILE_OFFLOAD'] = 'x-accel'
+        response, body = self._get(f'/api/files/{self.file.id}/download')
+        rel = os.path.relpath(self.file.filepath, self.upload_folder).replace(os.sep, '/')
+        self.assertEqual(response.headers['X-Accel-Redirect'], f'/_protected/uploads/{rel}')
+        self.assertEqual(body, b'')
+        self.assertEqual(response.mimetype, 'video/mp4')
+        self.assertEqual(response.headers['ETag'], f'"{self.file.sha256}"')
+        response, _ = self._get(f'/api/files/{self.file.id}/download', **{'If-None-Match': f'"{self.file.sha256}"'})
+        self.assertEqual(response.status_code, 304)
+
+        self.flask_app.config['FILE_OFFLOAD'] = 'x-sendfile'
+        response, body = self._get(f'/api/files/{self.file.id}/download')
+        self.assertEqual(response.headers['X-Sendfile'], os.path.abspath(self.file.filepath))
+        self.assertEqual(body, b'')
+
+if __name__ == '__main__':
+    unittest.main()
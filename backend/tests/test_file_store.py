@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import io
+import shutil
+import tempfile
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Category, File, FileBlob
+import file_store
+
+class FileStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client, in-memory database and a temporary upload folder."""
+        self.upload_folder = tempfile.mkdtemp()
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'UPLOAD_FOLDER': self.upload_folder})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.admin = User(name="Admin", email="admin@test.com", role="admin", is_approved=True)
+        self.admin.set_password("password")
+        db.session.add(self.admin)
+        db.session.commit()
+        token = create_access_token(identity=str(self.admin.id), additional_claims={'role': 'admin'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database and uploads."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.upload_folder, ignore_errors=True)
+
+    def _upload(self, content, name):
+        return self.app.post('/api/upload', headers=self.headers, content_type='multipart/form-data',
+                             data={'file': (io.BytesIO(content), name)})
+
+    def _blob_files(self):
+        found = []
+        for root, dirs, files in os.walk(os.path.join(self.upload_folder, file_store.BLOB_DIR)):
+            dirs[:] = [d for d in dirs if d != 'tmp']
+            found.extend(files)
+        return found
+
+    def test_duplicate_uploads_share_one_blob(self):
+        first = self._upload(b'same bytes', 'a.txt')
+        second = self._upload(b'same bytes', 'b.txt')
+        other = self._upload(b'other bytes', 'c.txt')
+        self.assertEqual(first.status_code, 201)
+
+        a, b, c = (db.session.get(File, r.json['id']) for r in (first, second, other))
+        self.assertEqual(a.sha256, b.sha256)
+        self.assertEqual(a.filepath, b.filepath)
+        self.assertNotEqual(a.stored_filename, b.stored_filename)
+        self.assertEqual(b.filename, 'b.txt')
+        self.assertEqual(db.session.get(FileBlob, a.sha256).ref_count, 2)
+        self.assertEqual(db.session.get(FileBlob, c.sha256).ref_count, 1)
+        self.assertEqual(len(self._blob_files()), 2)
+        self.assertTrue(a.filepath.endswith(os.path.join(a.sha256[:2], a.sha256[2:4], a.sha256 + '.txt')))
+
+        response = self.app.get(f"/api/files/{b.id}/download")
+        self.assertEqual(response.data, b'same bytes')
+        response.close()
+
+    def test_category_image_release(self):
+        cat = Category(name="Kitchen", slug="kitchen")
+        db.session.add(cat)
+        db.session.commit()
+
+        def put(content):
+            return self.app.put(f'/api/admin/categories/{cat.id}', headers=self.headers, content_type='multipart/form-data',
+                                data={'image': (io.BytesIO(content), 'cat.png')})
+
+        put(b'old image')
+        old = db.session.get(Category, cat.id).image
+        self.assertTrue(old.startswith(file_store.BLOB_DIR))
+        put(b'old image')  # same content again keeps the blob
+        self.assertEqual(db.session.get(FileBlob, file_store.sha_from_name(old)).ref_count, 1)
+
+        put(b'new image')
+        self.assertIsNone(db.session.get(FileBlob, file_store.sha_from_name(old)))
+        self.assertFalse(os.path.exists(os.path.join(self.upload_folder, old)))
+        self.assertEqual(len(self._blob_files()), 1)
+
+    def test_migrate_existing_uploads(self):
+        for n in range(3):
+            path = os.path.join(self.upload_folder, f"legacy{n}_photo.png")
+            with open(path, 'wb') as f:
+                f.write(b'dup' if n < 2 else b'unique')
+            db.session.add(File(owner_id=self.admin.id, filename='photo.png', stored_filename=f"legacy{n}_photo.png",
+                                filepath=path, size=3, status='active'))
+        db.session.add(File(owner_id=self.admin.id, filename='gone.png', stored_filename='gone.png',
+                            filepath=os.path.join(self.upload_folder, 'gone.png'), size=1, status='active'))
+        db.session.commit()
+
+        moved, freed = file_store.migrate_existing(self.upload_folder, batch_size=2)
+        self.assertEqual((moved, freed), (3, 3))
+        self.assertEqual(len(self._blob_files()), 2)
+        self.assertFalse([f for f in os.listdir(self.upload_folder) if f.startswith('legacy')])
+        dup = File.query.filter_by(stored_filename='legacy0_photo.png').one()
+        self.assertEqual(db.session.get(FileBlob, dup.sha256).ref_count, 2)
+        self.assertIsNone(File.query.filter_by(stored_filename='gone.png').one().sha256)
+
+if __name__ == '__main__':
+    unittest.main()
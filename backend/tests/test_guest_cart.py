@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Cart, CartItem, Coupon
+
+class GuestCartTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+
+        db.create_all()
+
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.seller.set_password("password")
+        self.user = User(name="Buyer", email="buyer@test.com", role="user")
+        self.user.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([self.seller, self.user, cat])
+        db.session.commit()
+
+        self.p1 = Product(seller_id=self.seller.id, category_id=cat.id, name="Bowl", price=50, status='approved')
+        self.p2 = Product(seller_id=self.seller.id, category_id=cat.id, name="Cup", price=20, status='approved')
+        self.hidden = Product(seller_id=self.seller.id, category_id=cat.id, name="Draft", price=5, status='pending')
+        db.session.add_all([self.p1, self.p2, self.hidden])
+        db.session.flush()
+        db.session.add_all([Inventory(product_id=p.id, stock_qty=10) for p in (self.p1, self.p2, self.hidden)])
+        db.session.add(Coupon(code='TEN', type='admin', discount_percent=10))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_browsing_never_writes(self):
+        res = self.app.post('/api/user/cart/guest/items', json={'product_id': self.p1.id, 'quantity': 2})
+        self.assertEqual(res.status_code, 200)
+        token = res.get_json()['guest_cart']
+        res = self.app.post('/api/user/cart/guest/items', json={'product_id': self.p2.id, 'guest_cart': token})
+        data = res.get_json()
+        self.assertEqual(data['total'], 120)
+        self.assertEqual(Cart.query.count(), 0)
+        self.assertEqual(CartItem.query.count(), 0)
+
+    def test_cookie_roundtrip_and_coupon(self):
+        self.app.post('/api/user/cart/guest/items', json={'product_id': self.p1.id, 'quantity': 2})
+        res = self.app.post('/api/user/cart/guest/coupon', json={'code': 'TEN'})
+        self.assertEqual(res.get_json()['discount'], 10)
+        res = self.app.get('/api/user/cart/guest')
+        self.assertEqual(res.get_json()['final_total'], 90)
+
+    def test_tampered_token_is_empty_cart(self):
+        res = self.app.post('/api/user/cart/guest/items', json={'product_id': self.p1.id})
+        token = res.get_json()['guest_cart']
+        res = self.app.get('/api/user/cart/guest', headers={'X-Guest-Cart': token[:-2] + 'xx'})
+        self.assertEqual(res.get_json()['items'], [])
+
+    def test_unapproved_product_rejected(self):
+        res = self.app.post('/api/user/cart/guest/items', json={'product_id': self.hidden.id})
+        self.assertEqual(res.status_code, 400)
+
+    def test_login_merges_guest_cart(self):
+        db.session.add(Cart(user_id=self.user.id))
+        db.session.flush()
+        cart = Cart.query.filter_by(user_id=self.user.id).first()
+        db.session.add(CartItem(cart_id=cart.id, product_id=self.p1.id, quantity=1))
+        db.session.commit()
+
+        token = self.app.post('/api/user/cart/guest/items', json={'product_id': self.p1.id, 'quantity': 2}).get_json()['guest_cart']
+        token = self.app.post('/api/user/cart/guest/items', json={'product_id': self.p2.id, 'guest_cart': token}).get_json()['guest_cart']
+
+        res = self.app.post('/api/auth/login', json={'email': 'buyer@test.com', 'password': 'password', 'guest_cart': token})
+        self.assertEqual(res.status_code, 200)
+        quantities = {ci.product_id: ci.quantity for ci in CartItem.query.filter_by(cart_id=cart.id).all()}
+        self.assertEqual(quantities, {self.p1.id: 3, self.p2.id: 1})
+
+        headers = {'Authorization': f"Bearer {res.get_json()['access_token']}"}
+        self.assertEqual(self.app.get('/api/user/cart', headers=headers).get_json()['total'], 170)
+
+    def test_register_merges_guest_cart(self):
+        self.app.post('/api/user/cart/guest/items', json={'product_id': self.p2.id, 'quantity': 4})
+        res = self.app.post('/api/auth/register', json={'name': 'New', 'email': 'new@test.com', 'password': 'secret'})
+        self.assertEqual(res.status_code, 201)
+        new_user = User.query.filter_by(email='new@test.com').first()
+        cart = Cart.query.filter_by(user_id=new_user.id).first()
+        self.assertEqual([(ci.product_id, ci.quantity) for ci in CartItem.query.filter_by(cart_id=cart.id)], [(self.p2.id, 4)])
+        self.assertIn('guest_cart=;', res.headers.get('Set-Cookie', ''))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from PIL import Image
+from app import create_app
+from extensions import db
+from models import User, File, FileVariant
+from image_variants import generate_variants
+
+class ImageVariantsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client, in-memory database and a temporary upload folder."""
+        self.upload_folder = tempfile.mkdtemp()
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'UPLOAD_FOLDER': self.upload_folder})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.owner.set_password("password")
+        db.session.add(self.owner)
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database and uploads."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.upload_folder, ignore_errors=True)
+
+    def _image(self, name, size, mode='RGB'):
+        path = os.path.join(self.upload_folder, f"abc_{name}")
+        img = Image.new(mode, size, (200, 10, 10, 128) if mode == 'RGBA' else (200, 10, 10))
+        exif = Image.Exif()
+        exif[0x010F] = "CameraMaker"  # Make
+        img.save(path, exif=exif.tobytes()) if name.endswith('.jpg') else img.save(path)
+        f = File(owner_id=self.owner.id, filename=name, stored_filename=f"abc_{name}", filepath=path, size=os.path.getsize(path), status='active')
+        db.session.add(f)
+        db.session.commit()
+        return f
+
+    def test_generates_every_size_and_format(self):
+        f = self._image('photo.jpg', (1000, 500))
+        self.assertEqual(generate_variants(f.id, self.upload_folder), 6)
+
+        variants = {(v.size, v.format): v for v in FileVariant.query.filter_by(file_id=f.id)}
+        self.assertEqual(len(variants), 6)
+        self.assertEqual((variants[('thumb', 'webp')].width, variants[('thumb', 'webp')].height), (200, 100))
+        self.assertEqual(variants[('main', 'jpeg')].width, 800)
+        # Never upscaled beyond the original
+        self.assertEqual(variants[('zoom', 'jpeg')].width, 1000)
+        with Image.open(variants[('thumb', 'jpeg')].filepath) as img:
+            self.assertEqual(img.format, 'JPEG')
+            self.assertEqual(len(img.getexif()), 0)
+
+        # Regenerating replaces the rows instead of duplicating them
+        generate_variants(f.id, self.upload_folder)
+        self.assertEqual(FileVariant.query.filter_by(file_id=f.id).count(), 6)
+
+    def test_transparent_png_and_non_images(self):
+        f = self._image('logo.png', (300, 300), mode='RGBA')
+        generate_variants(f.id, self.upload_folder)
+        webp = FileVariant.query.filter_by(file_id=f.id, size='thumb', format='webp').one()
+        with Image.open(webp.filepath) as img:
+            self.assertEqual(img.mode, 'RGBA')
+
+        path = os.path.join(self.upload_folder, 'notes.txt')
+        with open(path, 'w') as fh:
+            fh.write('hello')
+        doc = File(owner_id=self.owner.id, filename='notes.txt', stored_filename='notes.txt', filepath=path, size=5, status='active')
+        db.session.add(doc)
+        db.session.commit()
+        self.assertEqual(generate_variants(doc.id, self.upload_folder), 0)
+
+    def test_download_negotiates_variant(self):
+        f = self._image('photo.png', (1000, 1000))
+
+        # Before variants exist the original is served
+        response = self.app.get(f'/api/files/{f.id}/download?size=thumb')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/png')
+        response.close()
+
+        generate_variants(f.id, self.upload_folder)
+        response = self.app.get(f'/api/files/{f.id}/download?size=thumb', headers={'Accept': 'image/webp,image/*'})
+        self.assertEqual(response.mimetype, 'image/webp')
+        self.assertIn('Accept', response.headers.get('Vary', ''))
+        with Image.open(BytesIO(response.data)) as img:
+            self.assertEqual(img.size, (200, 200))
+        response.close()
+
+        response = self.app.get(f'/api/files/{f.id}/download?size=main', headers={'Accept': 'image/png'})
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        response.close()
+
+        self.assertEqual(self.app.get(f'/api/files/{f.id}/download?size=huge').status_code, 400)
+
+    def test_product_lists_variant_urls(self):
+        from models import Category, Product, ProductImage
+        f = self._image('photo.png', (100, 100))
+        cat = Category(name="Kitchen", slug="kitchen")
+        db.session.add(cat)
+        db.session.flush()
+        p = Product(seller_id=self.owner.id, category_id=cat.id, name="Bowl", price=10)
+        db.session.add(p)
+        db.session.flush()
+        db.session.add(ProductImage(product_id=p.id, file_id=f.id, position=0))
+        db.session.commit()
+
+        with self.flask_app.test_request_context('/'):
+            image = p.to_dict()['images'][0]
+        self.assertEqual(image['variants']['thumb'], f"http://localhost/api/files/{f.id}/download?size=thumb")
+
+if __name__ == '__main__':
+    unittest.main()
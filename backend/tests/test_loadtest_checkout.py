@@ -0,0 +1,31 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest_checkout import parse_args, run_load_test, gate
+
+class CheckoutLoadTestCase(unittest.TestCase):
+    def test_small_run_passes_gates(self):
+        opts = parse_args(['--users', '12', '--products', '4', '--stock', '3', '--concurrency', '4'])
+        report = run_load_test(opts)
+
+        outcomes = report['outcomes']
+        self.assertEqual(outcomes['ok'] + outcomes['out_of_stock'] + outcomes['errors'], 12)
+        self.assertGreater(outcomes['ok'], 0)
+        self.assertGreater(outcomes['out_of_stock'], 0)
+        self.assertEqual(outcomes['verified'], outcomes['ok'])
+        self.assertEqual(report['oversold_units'], 0)
+        self.assertEqual(report['order_latency']['count'], 12)
+        self.assertEqual(gate(report, opts), [])
+
+    def test_gate_flags_oversell(self):
+        opts = parse_args([])
+        report = {"oversold_units": 2, "negative_stock_products": 1, "inconsistent_products": 1,
+                  "deadlocks": 0, "error_rate": 0.0, "order_latency": {"p95_ms": 10}}
+        self.assertEqual(gate(report, opts), ["stock oversold or inconsistent"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db, socketio
+import log_viewer
+
+def line(minute, level, message):
+    return f"2024-06-01 10:{minute:02d}:00,000 {level}: {message} [in app.py:1]\n"
+
+TRACEBACK = "Traceback (most recent call last):\n  File \"order.py\", line 9\nValueError: boom\n"
+
+class LogViewerTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and a temporary log directory with two rotations."""
+        self.log_dir = tempfile.mkdtemp()
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'LOG_DIR': self.log_dir})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+        self.headers = {'Authorization': f"Bearer {self.token}"}
+
+        self._write('app.log.2', line(0, 'INFO', 'startup') + line(1, 'WARNING', 'slow query'))
+        self._write('app.log.1', line(2, 'ERROR', 'order failed') + TRACEBACK + line(3, 'INFO', 'login ok'))
+        self._write('app.log', line(4, 'INFO', 'login ok') + line(5, 'ERROR', 'payment failed'))
+
+    def tearDown(self):
+        """Clean up database and logs."""
+        log_viewer._followers.clear()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def _write(self, name, text, mode='w'):
+        with open(os.path.join(self.log_dir, name), mode) as f:
+            f.write(text)
+
+    def get(self, url, **params):
+        res = self.app.get(url, headers=self.headers, query_string=params)
+        return res
+
+    def test_tail_across_rotations(self):
+        entries = self.get('/api/admin/logs', limit=3).json['entries']
+        self.assertEqual([e['text'].split(': ')[1].split(' [')[0] for e in entries], ['login ok', 'login ok', 'payment failed'])
+
+        entries = self.get('/api/admin/logs').json['entries']
+        self.assertEqual(len(entries), 6)
+        self.assertEqual(entries[0]['time'], '2024-06-01T10:00:00')
+        # The traceback stays with its record
+        self.assertTrue(entries[2]['text'].endswith('ValueError: boom'))
+
+    def test_filters(self):
+        entries = self.get('/api/admin/logs', level='error').json['entries']
+        self.assertEqual([e['level'] for e in entries], ['ERROR', 'ERROR'])
+        self.assertEqual(len(self.get('/api/admin/logs', level='warning').json['entries']), 3)
+        self.assertEqual(len(self.get('/api/admin/logs', q='BOOM').json['entries']), 1)
+        entries = self.get('/api/admin/logs', since='2024-06-01T10:02:00', until='2024-06-01T10:04:00').json['entries']
+        self.assertEqual([e['time'][-5:] for e in entries], ['02:00', '03:00', '04:00'])
+        self.assertEqual(self.get('/api/admin/logs', level='loud').status_code, 400)
+        self.assertEqual(self.get('/api/admin/logs', since='noon').status_code, 400)
+
+    def test_backward_reads_across_block_boundaries(self):
+        lines = [line(i % 60, 'INFO', f"message {i} " + 'x' * (i % 7)) for i in range(200)]
+        self._write('big.log', ''.join(lines) + TRACEBACK)
+        expected = [l.rstrip('\n') for l in lines] + TRACEBACK.rstrip('\n').split('\n')
+        self.assertEqual(list(log_viewer.reverse_lines(os.path.join(self.log_dir, 'big.log'), block_size=13))[1:], expected[::-1])
+        records = list(log_viewer.reverse_records(os.path.join(self.log_dir, 'big.log'), block_size=13))
+        self.assertEqual(len(records), 200)
+        self.assertTrue(records[0]['text'].endswith('ValueError: boom'))
+
+    def test_download_streams_oldest_first(self):
+        res = self.get('/api/admin/logs/download', level='warning')
+        self.assertEqual(res.mimetype, 'text/plain')
+        body = res.get_data(as_text=True)
+        self.assertEqual([l.split(' ')[2] for l in body.splitlines() if l.startswith('2024')], ['WARNING:', 'ERROR:', 'ERROR:'])
+        self.assertIn('ValueError: boom', body)
+
+    def test_follow_over_socketio(self):
+        client = socketio.test_client(self.flask_app)
+        self.assertEqual(client.emit('logs:follow', {'token': 'nope'}, callback=True), {"error": "Invalid token"})
+        user_token = create_access_token(identity='2', additional_claims={'role': 'user'})
+        self.assertEqual(client.emit('logs:follow', {'token': user_token}, callback=True), {"error": "Forbidden"})
+        self.assertEqual(client.emit('logs:follow', {'token': self.token, 'level': 'ERROR'}, callback=True), {"following": True})
+
+        follower = log_viewer.LogFollower(os.path.join(self.log_dir, 'app.log'))
+        self._write('app.log', line(6, 'INFO', 'quiet') + line(7, 'ERROR', 'disk full') + 'partial line', mode='a')
+        self.assertEqual(log_viewer.publish(follower), 2)
+        received = [m for m in client.get_received() if m['name'] == 'log_lines']
+        self.assertEqual(len(received), 1)
+        self.assertEqual([e['level'] for e in received[0]['args'][0]['entries']], ['ERROR'])
+
+        # Rotation: the handler renames app.log away and starts a new one
+        os.rename(os.path.join(self.log_dir, 'app.log'), os.path.join(self.log_dir, 'app.log.3'))
+        self._write('app.log', line(8, 'ERROR', 'after rotation'))
+        log_viewer.publish(follower)
+        entries = [m for m in client.get_received() if m['name'] == 'log_lines'][0]['args'][0]['entries']
+        self.assertIn('after rotation', entries[0]['text'])
+
+        client.emit('logs:unfollow')
+        self.assertEqual(log_viewer._followers, {})
+        client.disconnect()
+
+if __name__ == '__main__':
+    unittest.main()
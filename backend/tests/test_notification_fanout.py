@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Notification, NotificationJob
+import notification_fanout
+
+class NotificationFanoutTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.admin = User(name="Admin", email="admin@test.com", role="admin")
+        users = [self.admin]
+        for i in range(6):
+            users.append(User(name=f"User {i}", email=f"user{i}@test.com", role='seller' if i < 2 else 'user', is_active=i != 5))
+        for u in users:
+            u.set_password("password")
+        db.session.add_all(users)
+        db.session.commit()
+        token = create_access_token(identity=str(self.admin.id), additional_claims={'role': 'admin'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def send(self, **data):
+        return self.app.post('/api/admin/notifications/send', headers=self.headers, json=dict({'subject': 'Sale', 'message': 'Everything 10% off'}, **data))
+
+    def test_send_queues_job(self):
+        res = self.send(target='all_users')
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual((res.json['status'], res.json['total']), ('queued', 6))
+        # Nothing is sent inside the request
+        self.assertEqual(Notification.query.count(), 0)
+
+        res = self.app.get(f"/api/admin/notifications/jobs/{res.json['id']}", headers=self.headers)
+        self.assertEqual(res.json['status'], 'queued')
+
+        self.assertEqual(self.send(target='all_sellers').json['total'], 2)
+        self.assertEqual(self.send(target='specific', user_id=999).status_code, 404)
+        self.assertEqual(self.send(target='everyone').status_code, 400)
+
+    def test_fanout_in_chunks_with_batched_push(self):
+        job_id = self.send(target='all_users').json['id']
+        with patch('notification_fanout.send_email', return_value=True) as email, \
+             patch('notification_fanout.send_push_batch', side_effect=lambda ids, *a: len(ids)) as push, \
+             patch('notification_fanout.PUSH_BATCH_SIZE', 2):
+            job = notification_fanout.run_fanout(job_id, chunk_size=4)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.saved_count, job.emails_sent, job.pushes_sent), (6, 6, 6))
+        self.assertEqual(email.call_count, 6)
+        # Chunks of 4 and 2, pushed 2 users per call
+        self.assertEqual(sorted(len(c.args[0]) for c in push.call_args_list), [2, 2, 2])
+        rows = Notification.query.all()
+        self.assertEqual(len(rows), 6)
+        inactive = User.query.filter_by(email='user5@test.com').one()
+        self.assertNotIn(inactive.id, {n.user_id for n in rows})
+        self.assertTrue(all(n.subject == 'Sale' and not n.is_read for n in rows))
+
+    def test_failed_run_resumes_after_last_chunk(self):
+        job_id = self.send(target='all_users').json['id']
+        calls = []
+
+        def flaky(email, subject, body):
+            calls.append(email)
+            if len(calls) > 2:
+                raise RuntimeError("smtp down")
+            return True
+
+        with patch('notification_fanout.send_email', side_effect=flaky), \
+             patch('notification_fanout.send_push_batch', side_effect=lambda ids, *a: len(ids)):
+            job = notification_fanout.run_fanout(job_id, chunk_size=2)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual((job.saved_count, Notification.query.count()), (2, 2))
+
+        with patch('notification_fanout.send_email', return_value=False), \
+             patch('notification_fanout.send_push_batch', return_value=0):
+            job = notification_fanout.run_fanout(job_id, chunk_size=2)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.saved_count, job.emails_sent, job.emails_failed), (6, 2, 4))
+        self.assertEqual(Notification.query.count(), 6)
+        self.assertEqual(db.session.get(NotificationJob, job_id).pushes_failed, 4)
+
+if __name__ == '__main__':
+    unittest.main()
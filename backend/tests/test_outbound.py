@@ -0,0 +1,132 @@
+import unittest
+import smtplib
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import outbound
+from outbound import HttpClient, CircuitBreaker, CircuitOpenError, SmtpPool
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host='', port=0, timeout=None):
+        self.sent = []
+        self.alive = True
+        self.timeout = timeout
+        self.connect_timeout = None
+        self.sock = mock.Mock()
+        FakeSMTP.instances.append(self)
+
+    def connect(self, host, port):
+        self.connect_timeout = self.timeout
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, from_addr, to_addrs, message):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.append(to_addrs)
+
+    def quit(self):
+        self.alive = False
+
+class OutboundTestCase(unittest.TestCase):
+    def setUp(self):
+        outbound._breakers.clear()
+        FakeSMTP.instances = []
+        self.calls = []
+        patcher = mock.patch('outbound.time.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client(self, statuses, name='push'):
+        def handler(request):
+            self.calls.append(request.method)
+            status = statuses.pop(0) if statuses else 200
+            if isinstance(status, Exception):
+                raise status
+            return httpx.Response(status, json={})
+        return HttpClient(name, transport=httpx.MockTransport(handler))
+
+    def test_idempotent_request_retried_on_5xx(self):
+        res = self.client([503, 502]).get('http://push.test/status')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_post_not_retried_after_response(self):
+        res = self.client([503]).post('http://push.test/send', json={})
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_post_retried_when_connection_failed(self):
+        res = self.client([httpx.ConnectError("refused")]).post('http://push.test/send', json={})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_breaker_opens_then_half_opens(self):
+        cb = CircuitBreaker('x', failures=2, reset_seconds=30)
+        with mock.patch('outbound.time.monotonic', return_value=100.0):
+            cb.before_call(); cb.record(False, error='boom')
+            cb.before_call(); cb.record(False, error='boom')
+            with self.assertRaises(CircuitOpenError):
+                cb.before_call()
+        with mock.patch('outbound.time.monotonic', return_value=131.0):
+            cb.before_call()
+            with self.assertRaises(CircuitOpenError):
+                cb.before_call()
+            cb.record(True)
+        self.assertEqual(cb.stats()['state'], 'closed')
+
+    def test_open_breaker_fails_fast(self):
+        client = self.client([500] * 20)
+        for _ in range(outbound.BREAKER_FAILURES):
+            client.post('http://push.test/send')
+        with self.assertRaises(CircuitOpenError):
+            client.post('http://push.test/send')
+        self.assertEqual(len(self.calls), outbound.BREAKER_FAILURES)
+
+    def test_breaker_opened_mid_retry_surfaces_the_real_error(self):
+        client = self.client([500] * 20)
+        for _ in range(outbound.BREAKER_FAILURES - 1):
+            client.post('http://push.test/send')
+        # This call's first failure opens the circuit: the 500 comes back, not CircuitOpenError
+        res = client.get('http://push.test/status')
+        self.assertEqual(res.status_code, 500)
+        self.assertEqual(len(self.calls), outbound.BREAKER_FAILURES)
+
+        client = self.client([httpx.ConnectError("refused")] * 20, name='razorpay')
+        for _ in range(outbound.BREAKER_FAILURES - 1):
+            outbound.breaker('razorpay').record(False)
+        with self.assertRaises(httpx.ConnectError):
+            client.get('http://razorpay.test/orders')
+
+    def test_registry_shares_clients_and_breakers(self):
+        self.assertIs(outbound.http_client('push'), outbound.http_client('push'))
+        self.assertIs(outbound.razorpay_session(), outbound.razorpay_session())
+        self.assertIs(outbound.breaker('razorpay'), outbound.breaker('razorpay'))
+
+    def test_smtp_pool_reuses_and_reconnects(self):
+        with mock.patch('outbound.smtplib.SMTP', FakeSMTP):
+            pool = SmtpPool('smtp.test', 587, 'u', 'p')
+            for to in ('a@x', 'b@x', 'c@x'):
+                pool.send('shop@x', to, 'msg')
+            self.assertEqual(len(FakeSMTP.instances), 1)
+            FakeSMTP.instances[0].alive = False
+            pool.send('shop@x', 'd@x', 'msg')
+            self.assertEqual(len(FakeSMTP.instances), 2)
+            self.assertEqual(FakeSMTP.instances[1].sent, ['d@x'])
+        cfg = outbound.budget('smtp')
+        self.assertEqual((FakeSMTP.instances[0].connect_timeout, FakeSMTP.instances[0].timeout), (cfg['connect'], cfg['timeout']))
+        FakeSMTP.instances[0].sock.settimeout.assert_called_once_with(cfg['timeout'])
+
+if __name__ == '__main__':
+    unittest.main()
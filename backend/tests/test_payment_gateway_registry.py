@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app
+from extensions import db
+import payment_gateway
+from payment_gateway import GatewayRegistry, bump_gateway_settings_version
+from utils import set_setting
+
+class GatewayRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database and a clean registry."""
+        env = mock.patch.dict(os.environ, {'RAZORPAY_KEY_ID': '', 'RAZORPAY_KEY_SECRET': '', 'STRIPE_SECRET_KEY': ''})
+        env.start()
+        self.addCleanup(env.stop)
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        payment_gateway.registry.reset()
+        self.addCleanup(payment_gateway.registry.reset)
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_queries(self, fn):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return len(statements)
+
+    def test_missing_config_is_cached(self):
+        registry = GatewayRegistry()
+        self.assertIsNone(registry.get('razorpay'))
+        queries = self.count_queries(lambda: [registry.get('razorpay') or registry.get('stripe') for _ in range(20)])
+        self.assertEqual(queries, 0)
+
+    def test_version_bump_reloads_every_worker(self):
+        this_worker, other_worker = payment_gateway.registry, GatewayRegistry()
+        self.assertIsNone(this_worker.get('razorpay'))
+        self.assertIsNone(other_worker.get('razorpay'))
+
+        set_setting('razorpay_key_id', 'rzp_test_id')
+        set_setting('razorpay_key_secret', 'rzp_test_secret')
+        bump_gateway_settings_version()
+
+        self.assertIsNotNone(this_worker.get('razorpay'))
+        # Other workers keep their cached state until the next version check.
+        self.assertIsNone(other_worker.get('razorpay'))
+        with mock.patch.object(payment_gateway, 'VERSION_CHECK_SECONDS', 0):
+            client = other_worker.get('razorpay')
+        self.assertEqual(client.auth, ('rzp_test_id', 'rzp_test_secret'))
+        self.assertEqual(other_worker.reloads, 2)
+
+    def test_removing_stripe_clears_the_sdk_key(self):
+        import stripe
+        registry = payment_gateway.registry
+        set_setting('stripe_secret_key', 'sk_test_old')
+        bump_gateway_settings_version()
+        self.assertEqual(registry.get('stripe').api_key, 'sk_test_old')
+
+        set_setting('stripe_secret_key', '')
+        bump_gateway_settings_version()
+        self.assertIsNone(registry.get('stripe'))
+        self.assertIsNone(stripe.api_key)
+
+        set_setting('stripe_secret_key', 'sk_test_new')
+        bump_gateway_settings_version()
+        registry.get('stripe')
+        registry.reset()
+        self.assertIsNone(stripe.api_key)
+
+    def test_installed_clients_are_pinned(self):
+        fake = object()
+        payment_gateway.registry.install(razorpay=fake)
+        bump_gateway_settings_version()
+        self.assertIs(payment_gateway.get_razorpay_client(), fake)
+        self.assertIsNone(payment_gateway.get_stripe_client())
+
+    def test_health_reports_each_gateway(self):
+        health = payment_gateway.registry.health()
+        self.assertEqual(set(health), {'razorpay', 'stripe'})
+        self.assertFalse(health['razorpay']['configured'])
+        self.assertIn('avg_ms', health['stripe'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Order, OrderItem, PaymentTransaction
+import payment_reconcile
+from payment_reconcile import reconcile_payments, get_watermark
+from fake_gateway import install_fake_gateways
+
+class PaymentReconcileTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.rp, self.st = install_fake_gateways()
+        self.now = datetime.utcnow()
+
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.seller.set_password("password")
+        self.buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        self.buyer.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([self.seller, self.buyer, cat])
+        db.session.commit()
+        self.product = Product(seller_id=self.seller.id, category_id=cat.id, name="Bowl", price=50, status='approved')
+        db.session.add(self.product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=self.product.id, stock_qty=5))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def make_order(self, gateway='razorpay', total=100, age=timedelta(hours=1), status='pending'):
+        created = self.now - age
+        if gateway == 'stripe':
+            ref = self.st.checkout.Session.create(line_items=[{"price_data": {"unit_amount": int(total * 100)}, "quantity": 1}]).id
+            self.st.sessions[ref].created = int((created - datetime(1970, 1, 1)).total_seconds())
+        else:
+            ref = self.rp.order.create({"amount": int(total * 100)})["id"]
+        order = Order(user_id=self.buyer.id, total_amount=total, status=status, payment_status='unpaid',
+                      payment_gateway=gateway, payment_reference=ref, created_at=created)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=self.product.id, seller_id=self.seller.id,
+                                 quantity=2, price=total / 2, subtotal=total))
+        db.session.commit()
+        return order.id, ref
+
+    def pay(self, ref, amount, status='captured', age=timedelta(minutes=50)):
+        created = (self.now - age - datetime(1970, 1, 1)).total_seconds()
+        return self.rp.add_payment(ref, amount, status=status, created_at=created)
+
+    def test_settles_paid_and_failed_orders(self):
+        paid_id, paid_ref = self.make_order()
+        failed_id, failed_ref = self.make_order()
+        fresh_id, fresh_ref = self.make_order(age=timedelta(minutes=5))
+        open_id, _ = self.make_order()
+        stripe_id, session_id = self.make_order(gateway='stripe', total=30)
+        self.pay(paid_ref, 100, status='failed')
+        payment = self.pay(paid_ref, 100)
+        self.pay(failed_ref, 100, status='failed')
+        self.pay(fresh_ref, 100, status='failed', age=timedelta(minutes=1))
+        self.st.complete_session(session_id)
+
+        report = reconcile_payments(now=self.now, notify=False)
+
+        self.assertEqual(sorted(report['paid']), sorted([paid_id, stripe_id]))
+        self.assertEqual(report['failed'], [failed_id])
+        self.assertEqual(report['pending'], 2)
+        self.assertEqual(db.session.get(Order, paid_id).status, 'paid')
+        self.assertEqual(db.session.get(Order, fresh_id).status, 'pending')
+        self.assertEqual(db.session.get(Order, open_id).status, 'pending')
+        self.assertEqual(db.session.get(Order, failed_id).status, 'payment_failed')
+        self.assertEqual(Inventory.query.one().stock_qty, 7)
+        self.assertEqual(PaymentTransaction.query.filter_by(transaction_id=payment['id']).count(), 1)
+        self.assertEqual(get_watermark(), self.now)
+
+    def test_mismatches_are_reported_not_applied(self):
+        short_id, short_ref = self.make_order()
+        closed_id, closed_ref = self.make_order(status='cancelled')
+        self.pay(short_ref, 60)
+        self.pay(closed_ref, 100)
+
+        report = reconcile_payments(now=self.now, notify=False)
+
+        issues = {m['order_id']: m['issue'] for m in report['mismatches']}
+        self.assertEqual(issues, {short_id: 'amount_mismatch', closed_id: 'captured_after_close'})
+        self.assertEqual(report['paid'], [])
+        self.assertEqual(PaymentTransaction.query.count(), 0)
+
+    def test_skips_orders_settled_while_the_page_was_checked(self):
+        paid_id, paid_ref = self.make_order()
+        failed_id, failed_ref = self.make_order()
+        self.pay(paid_ref, 100)
+        self.pay(failed_ref, 100, status='failed')
+
+        # The buyer cancels one order and the webhook fails the other after the page was read
+        lookup = payment_reconcile._GatewayState.lookup
+        def racing_lookup(gateways, order):
+            if order.id == failed_id:
+                Order.query.filter_by(id=paid_id).update({'status': 'cancelled'})
+                Order.query.filter_by(id=failed_id).update({'status': 'payment_failed', 'payment_status': 'failed'})
+            return lookup(gateways, order)
+        payment_reconcile._GatewayState.lookup = racing_lookup
+        try:
+            report = reconcile_payments(now=self.now, notify=False)
+        finally:
+            payment_reconcile._GatewayState.lookup = lookup
+
+        self.assertEqual((report['paid'], report['failed']), ([], []))
+        self.assertEqual(db.session.get(Order, paid_id).status, 'cancelled')
+        self.assertEqual(Inventory.query.one().stock_qty, 5)
+        self.assertEqual(PaymentTransaction.query.count(), 0)
+
+    def test_incremental_runs_and_paged_gateway_calls(self):
+        old_id, old_ref = self.make_order(age=timedelta(days=3))
+        self.pay(old_ref, 100, age=timedelta(days=3))
+        refs = [self.make_order()[1] for _ in range(5)]
+        for ref in refs:
+            self.pay(ref, 100)
+
+        original = payment_reconcile.GATEWAY_PAGE_SIZE
+        payment_reconcile.GATEWAY_PAGE_SIZE = 2
+        try:
+            report = reconcile_payments(now=self.now, page_size=2, notify=False)
+        finally:
+            payment_reconcile.GATEWAY_PAGE_SIZE = original
+
+        self.assertEqual(len(report['paid']), 5)
+        self.assertNotIn(old_id, report['paid'])
+        self.assertEqual(self.rp.list_calls, 3)
+
+        # Nothing left to settle, so the next run makes no gateway calls.
+        report = reconcile_payments(now=self.now + timedelta(minutes=5), notify=False)
+        self.assertEqual((report['checked'], self.rp.list_calls), (0, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import sys
+import os
+import io
+import socket
+import httpx
+from unittest import mock
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, ProductImage, ProductImportJob
+import outbound
+import product_import
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'0' * 64
+
+CSV = """sku,name,price,category,stock_qty,brand,image_urls
+BWL-1,Bowl v2,12.5,kitchen,7,Acme,http://93.184.216.34/bowl.png
+CUP-1,Cup,5,Kitchen Ware,3,,http://93.184.216.34/cup.png|http://93.184.216.34/missing.png
+BAD-1,No price,,kitchen,1,,
+NOCAT,Thing,3,garden,1,,
+CUP-1,Cup again,6,kitchen,1,,
+LOCAL,Local image,4,kitchen,1,,http://127.0.0.1/secret.png
+"""
+
+def fake_images(request):
+    if request.url.path == '/missing.png':
+        return httpx.Response(404)
+    if request.url.path == '/to-local.png':
+        return httpx.Response(302, headers={'location': 'http://127.0.0.1/secret.png'})
+    if request.url.path == '/moved.png':
+        return httpx.Response(301, headers={'location': '/bowl.png'})
+    if request.url.path == '/huge.png':
+        # No content-length: the body is streamed
+        return httpx.Response(200, content=iter([b'0' * 1024 * 1024] * 6), headers={'content-type': 'image/png'})
+    if request.url.path == '/down.png':
+        return httpx.Response(503)
+    return httpx.Response(200, content=PNG, headers={'content-type': 'image/png'})
+
+class ProductImportTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.requests = []
+        def record(request):
+            self.requests.append(request)
+            return fake_images(request)
+        product_import._image_client = httpx.Client(transport=httpx.MockTransport(record), follow_redirects=False)
+        product_import._host_breakers.clear()
+
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.seller.set_password("password")
+        cat = Category(name="Kitchen Ware", slug="kitchen")
+        db.session.add_all([self.seller, cat])
+        db.session.commit()
+        self.existing = Product(seller_id=self.seller.id, category_id=cat.id, name="Bowl", price=10, sku="BWL-1", status='approved')
+        db.session.add(self.existing)
+        db.session.flush()
+        db.session.add(Inventory(product_id=self.existing.id, stock_qty=1))
+        db.session.commit()
+        token = create_access_token(identity=str(self.seller.id), additional_claims={'role': 'seller'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        product_import._image_client = None
+        product_import._host_breakers.clear()
+        for job in ProductImportJob.query.all():
+            for path in (job.source_path, job.error_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+        for image in ProductImage.query.all():
+            if os.path.exists(image.file.filepath):
+                os.remove(image.file.filepath)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def upload(self, body, name='catalog.csv'):
+        return self.app.post('/api/seller/products/import', headers=self.headers, content_type='multipart/form-data',
+                             data={'file': (io.BytesIO(body.encode()), name)})
+
+    def test_import_upserts_and_reports_errors(self):
+        res = self.upload(CSV)
+        self.assertEqual(res.status_code, 202)
+        job_id = res.get_json()['id']
+        product_import.run_import(job_id, chunk_size=2)
+
+        job = self.app.get(f'/api/seller/products/import/{job_id}', headers=self.headers).get_json()
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual((job['total_rows'], job['created'], job['updated']), (6, 2, 1))
+        self.assertEqual((job['errors'], job['images_saved']), (5, 2))
+
+        bowl = db.session.get(Product, self.existing.id)
+        self.assertEqual((bowl.name, bowl.price, bowl.brand, bowl.status), ("Bowl v2", 12.5, "Acme", 'approved'))
+        self.assertEqual(bowl.inventory.stock_qty, 7)
+        cup = Product.query.filter_by(sku="CUP-1").one()
+        self.assertEqual((cup.status, cup.inventory.stock_qty, len(cup.product_images)), ('pending', 3, 1))
+
+        errors = self.app.get(f'/api/seller/products/import/{job_id}/errors', headers=self.headers).get_data(as_text=True)
+        rows = [line.split(',', 2) for line in errors.strip().splitlines()[1:]]
+        self.assertEqual(sorted(r[1] for r in rows), ['BAD-1', 'CUP-1', 'CUP-1', 'LOCAL', 'NOCAT'])
+        self.assertIn('public host', errors)
+
+    def test_reimport_does_not_duplicate(self):
+        for _ in range(2):
+            product_import.run_import(self.upload(CSV).get_json()['id'])
+        self.assertEqual(Product.query.filter_by(sku="CUP-1").count(), 1)
+        self.assertEqual(ProductImage.query.count(), 2)
+
+    def test_image_fetch_guards(self):
+        fetch = product_import._fetch_image
+        self.assertEqual(fetch('http://93.184.216.34/moved.png')[0], PNG)
+        with self.assertRaisesRegex(ValueError, 'public host'):
+            fetch('http://93.184.216.34/to-local.png')
+        with self.assertRaisesRegex(ValueError, 'larger than 5 MB'):
+            fetch('http://93.184.216.34/huge.png')
+
+        # The checked address is the one connected to; the name goes in Host
+        public = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.216.34', 80))]
+        with mock.patch('product_import.socket.getaddrinfo', return_value=public):
+            fetch('http://images.test/bowl.png')
+        self.assertEqual((self.requests[-1].url.host, self.requests[-1].headers['host']), ('93.184.216.34', 'images.test'))
+
+        # A failing host opens its own breaker only
+        for _ in range(outbound.BREAKER_FAILURES):
+            with self.assertRaises(ValueError):
+                fetch('http://93.184.216.35/down.png')
+        with self.assertRaises(outbound.CircuitOpenError):
+            fetch('http://93.184.216.35/down.png')
+        self.assertEqual(fetch('http://93.184.216.34/bowl.png')[0], PNG)
+
+    def test_rejects_other_file_types(self):
+        self.assertEqual(self.upload("x", name='catalog.txt').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Order, OrderItem, PaymentTransaction, WebhookEvent
+from utils import set_setting
+from payment_events import process_pending_events
+from fake_gateway import FAKE_RAZORPAY_WEBHOOK_SECRET, razorpay_event, razorpay_webhook
+
+class RazorpayWebhookTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+
+        db.create_all()
+        set_setting('razorpay_webhook_secret', FAKE_RAZORPAY_WEBHOOK_SECRET)
+
+        seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        seller.set_password("password")
+        buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        buyer.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([seller, buyer, cat])
+        db.session.commit()
+
+        self.product = Product(seller_id=seller.id, category_id=cat.id, name="Bowl", price=50, status='approved')
+        db.session.add(self.product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=self.product.id, stock_qty=8))
+        self.order = Order(user_id=buyer.id, total_amount=100, status='pending', payment_status='unpaid',
+                           payment_gateway='razorpay', payment_reference='order_rp_1')
+        db.session.add(self.order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=self.order.id, product_id=self.product.id, seller_id=seller.id,
+                                 quantity=2, price=50, subtotal=100))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def post(self, event, **kwargs):
+        body, headers = razorpay_webhook(event, **kwargs)
+        return self.app.post('/api/payments/webhooks/razorpay', data=body, headers=headers)
+
+    def test_rejects_bad_signature(self):
+        res = self.post(razorpay_event('payment.captured', 'order_rp_1', 'pay_1', 100), secret='wrong')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(WebhookEvent.query.count(), 0)
+
+    def test_rejects_signed_body_that_is_not_an_object(self):
+        for event in ([], "payment.captured", 42):
+            res = self.post(event)
+            self.assertEqual((res.status_code, res.json), (400, {"error": "Malformed payload"}))
+        self.assertEqual(WebhookEvent.query.count(), 0)
+
+    def test_captured_is_queued_then_applied_once(self):
+        event = razorpay_event('payment.captured', 'order_rp_1', 'pay_1', 100)
+        res = self.post(event, event_id='evt_1')
+        self.assertEqual(res.get_json()['status'], 'queued')
+        self.assertEqual(db.session.get(Order, self.order.id).payment_status, 'unpaid')
+
+        self.assertEqual(self.post(event, event_id='evt_1').get_json()['status'], 'duplicate')
+        self.assertEqual(process_pending_events(), 1)
+        self.assertEqual(process_pending_events(), 0)
+
+        order = db.session.get(Order, self.order.id)
+        self.assertEqual((order.status, order.payment_status), ('paid', 'paid'))
+        self.assertEqual(PaymentTransaction.query.filter_by(transaction_id='pay_1').count(), 1)
+        self.assertEqual(WebhookEvent.query.one().status, 'processed')
+
+    def test_replayed_capture_under_new_event_id_is_idempotent(self):
+        self.post(razorpay_event('payment.captured', 'order_rp_1', 'pay_1', 100))
+        self.post(razorpay_event('order.paid', 'order_rp_1', 'pay_1', 100))
+        self.assertEqual(process_pending_events(), 2)
+        self.assertEqual(PaymentTransaction.query.count(), 1)
+
+    def test_failed_releases_stock(self):
+        self.post(razorpay_event('payment.failed', 'order_rp_1', 'pay_2', 100, error_description='Card declined'))
+        process_pending_events()
+        order = db.session.get(Order, self.order.id)
+        self.assertEqual((order.status, order.payment_status), ('payment_failed', 'failed'))
+        self.assertEqual(Inventory.query.filter_by(product_id=self.product.id).one().stock_qty, 10)
+        self.assertEqual(PaymentTransaction.query.one().failure_reason, 'Card declined')
+
+    def test_failure_without_payment_id_records_no_transaction(self):
+        self.post(razorpay_event('payment.failed', 'order_rp_1', None, 100))
+        process_pending_events()
+        self.assertEqual(db.session.get(Order, self.order.id).status, 'payment_failed')
+        self.assertEqual(PaymentTransaction.query.count(), 0)
+
+    def test_refund_after_capture(self):
+        self.post(razorpay_event('payment.captured', 'order_rp_1', 'pay_3', 100))
+        self.post(razorpay_event('refund.processed', 'order_rp_1', 'pay_3', 40, refund_id='rfnd_1'))
+        self.assertEqual(process_pending_events(), 2)
+        order = db.session.get(Order, self.order.id)
+        self.assertEqual(order.payment_status, 'partially_refunded')
+        self.assertEqual(PaymentTransaction.query.filter_by(transaction_id='rfnd_1').one().amount, 40)
+
+    def test_unknown_order_is_ignored(self):
+        self.post(razorpay_event('payment.captured', 'order_missing', 'pay_4', 10))
+        process_pending_events()
+        ev = WebhookEvent.query.one()
+        self.assertEqual((ev.status, ev.error), ('ignored', 'Order not found'))
+
+if __name__ == '__main__':
+    unittest.main()
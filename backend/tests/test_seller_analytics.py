@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+from datetime import datetime, date
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Order, OrderItem, SellerDailySales
+from seller_analytics import record_orders, rebuild
+
+class SellerAnalyticsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        for u in (self.seller, self.buyer):
+            u.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([self.seller, self.buyer, cat])
+        db.session.commit()
+        self.bowl = Product(seller_id=self.seller.id, category_id=cat.id, name="Bowl", price=10, status='approved')
+        self.cup = Product(seller_id=self.seller.id, category_id=cat.id, name="Cup", price=4, status='approved')
+        db.session.add_all([self.bowl, self.cup])
+        db.session.flush()
+        db.session.add_all([Inventory(product_id=self.bowl.id, stock_qty=50), Inventory(product_id=self.cup.id, stock_qty=50)])
+        db.session.commit()
+        self.seller_headers = {'Authorization': f"Bearer {create_access_token(identity=str(self.seller.id), additional_claims={'role': 'seller'})}"}
+        self.buyer_headers = {'Authorization': f"Bearer {create_access_token(identity=str(self.buyer.id), additional_claims={'role': 'user'})}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def place(self, day, lines):
+        order = Order(user_id=self.buyer.id, total_amount=0, status='pending', created_at=datetime(2024, 3, day, 10))
+        db.session.add(order)
+        db.session.flush()
+        for product, qty in lines:
+            db.session.add(OrderItem(order_id=order.id, product_id=product.id, seller_id=self.seller.id,
+                                     quantity=qty, price=product.price, subtotal=product.price * qty))
+        record_orders([order.id])
+        db.session.commit()
+        return order
+
+    def report(self, **params):
+        return self.app.get('/api/seller/analytics', query_string=params, headers=self.seller_headers).get_json()
+
+    def snapshot(self):
+        return sorted((r.product_id, r.day, r.units, r.revenue, r.cancelled_units, r.cancelled_revenue)
+                      for r in SellerDailySales.query.all())
+
+    def test_rollup_series_and_top_products(self):
+        self.place(4, [(self.bowl, 2), (self.cup, 1)])
+        self.place(4, [(self.bowl, 1)])
+        cancelled = self.place(6, [(self.cup, 5)])
+        self.place(12, [(self.cup, 3)])
+        self.assertEqual(self.app.post(f'/api/orders/{cancelled.id}/cancel', headers=self.buyer_headers).status_code, 200)
+        self.assertEqual(SellerDailySales.query.count(), 4)
+
+        data = self.report(**{'from': '2024-03-04', 'to': '2024-03-10'})
+        self.assertEqual(len(data['series']), 7)
+        self.assertEqual(data['series'][0]['revenue'], 34)
+        self.assertEqual((data['series'][2]['cancelled_units'], data['series'][2]['net_revenue']), (5, 0))
+        self.assertEqual(data['totals']['net_revenue'], 34)
+        self.assertEqual([p['name'] for p in data['top_products']], ['Bowl', 'Cup'])
+
+        weekly = self.report(**{'from': '2024-03-01', 'to': '2024-03-31', 'group': 'week'})
+        self.assertEqual(weekly['series'][0]['date'], '2024-02-26')
+        self.assertEqual([w['net_units'] for w in weekly['series'][:3]], [0, 4, 3])
+
+        live = self.snapshot()
+        rebuild()
+        self.assertEqual(self.snapshot(), live)
+
+    def test_reopening_a_cancelled_order_undoes_the_cancellation(self):
+        order = self.place(4, [(self.bowl, 2)])
+        for status in ('cancelled', 'shipped', 'shipped'):
+            self.app.put(f'/api/orders/{order.id}/status', json={'status': status}, headers=self.seller_headers)
+        row = SellerDailySales.query.one()
+        self.assertEqual((row.day, row.units, row.cancelled_units), (date(2024, 3, 4), 2, 0))
+
+    def test_rejects_bad_range(self):
+        res = self.app.get('/api/seller/analytics', query_string={'from': '2024-03-10', 'to': '2024-03-01'}, headers=self.seller_headers)
+        self.assertEqual(res.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Inventory, Order, OrderItem, PaymentTransaction, WithdrawalRequest, SellerLedgerEntry, SellerBalance
+from seller_ledger import credit_order, debit_refund, backfill, get_balance, lock_balance
+
+class SellerLedgerTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True, upi_id="seller@upi")
+        self.seller.set_password("password")
+        self.other = User(name="Other", email="other@test.com", role="seller", is_approved=True)
+        self.other.set_password("password")
+        self.buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        self.buyer.set_password("password")
+        cat = Category(name="Cat", slug="cat")
+        db.session.add_all([self.seller, self.other, self.buyer, cat])
+        db.session.commit()
+        self.p1 = Product(seller_id=self.seller.id, category_id=cat.id, name="Bowl", price=60, status='approved')
+        self.p2 = Product(seller_id=self.other.id, category_id=cat.id, name="Cup", price=40, status='approved')
+        db.session.add_all([self.p1, self.p2])
+        db.session.flush()
+        db.session.add_all([Inventory(product_id=self.p1.id, stock_qty=10), Inventory(product_id=self.p2.id, stock_qty=10)])
+        db.session.commit()
+        self.headers = {'Authorization': f"Bearer {create_access_token(identity=str(self.seller.id), additional_claims={'role': 'seller'})}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def make_order(self, payment_status='paid'):
+        order = Order(user_id=self.buyer.id, total_amount=100, status='paid', payment_status=payment_status, payment_gateway='razorpay')
+        db.session.add(order)
+        db.session.flush()
+        db.session.add_all([
+            OrderItem(order_id=order.id, product_id=self.p1.id, seller_id=self.seller.id, quantity=1, price=60, subtotal=60),
+            OrderItem(order_id=order.id, product_id=self.p2.id, seller_id=self.other.id, quantity=1, price=40, subtotal=40)
+        ])
+        db.session.commit()
+        return order
+
+    def test_credit_is_idempotent_and_refund_is_proportional(self):
+        order = self.make_order()
+        credit_order(order)
+        credit_order(order)
+        db.session.commit()
+        self.assertEqual(get_balance(self.seller.id).balance, 60)
+        self.assertEqual(get_balance(self.other.id).balance, 40)
+
+        debit_refund(order, 50, 'rfnd_1')
+        debit_refund(order, 50, 'rfnd_1')
+        db.session.commit()
+        self.assertEqual(get_balance(self.seller.id).balance, 30)
+        self.assertEqual(get_balance(self.seller.id).total_refunded, 30)
+        self.assertEqual(get_balance(self.other.id).balance, 20)
+        self.assertEqual(SellerLedgerEntry.query.count(), 4)
+
+    def test_lock_balance_upserts_the_first_row(self):
+        # A row another writer created is kept, not re-inserted over
+        db.session.execute(db.insert(SellerBalance).values(seller_id=self.seller.id, balance=5.0, total_sales=5.0,
+                                                           total_refunded=0.0, total_withdrawn=0.0))
+        self.assertEqual(lock_balance(self.seller.id).balance, 5.0)
+        self.assertEqual(lock_balance(self.other.id).balance, 0.0)
+        credit_order(self.make_order())
+        db.session.commit()
+        self.assertEqual((get_balance(self.seller.id).balance, get_balance(self.other.id).balance), (65.0, 40.0))
+        self.assertEqual(SellerBalance.query.count(), 2)
+
+    def test_withdrawal_debits_and_cancel_reverses(self):
+        credit_order(self.make_order())
+        db.session.commit()
+
+        res = self.app.post('/api/seller/withdrawals/request', json={'amount': 80}, headers=self.headers)
+        self.assertEqual(res.status_code, 400)
+        res = self.app.post('/api/seller/withdrawals/request', json={'amount': 45}, headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        wr_id = res.get_json()['id']
+
+        data = self.app.get('/api/seller/withdrawals', headers=self.headers).get_json()
+        self.assertEqual((data['balance'], data['total_withdrawn']), (15, 45))
+
+        res = self.app.post(f'/api/seller/withdrawals/{wr_id}/cancel', headers=self.headers)
+        self.assertEqual(res.get_json()['balance'], 60)
+        self.assertEqual(get_balance(self.seller.id).total_withdrawn, 0)
+
+    def test_backfill_rebuilds_from_history(self):
+        self.make_order()
+        self.make_order(payment_status='unpaid')
+        refunded = self.make_order(payment_status='partially_refunded')
+        db.session.add(PaymentTransaction(order_id=refunded.id, amount=50, payment_status='refunded', payment_gateway='razorpay', transaction_id='rfnd_9'))
+        db.session.add(WithdrawalRequest(seller_id=self.seller.id, amount=20, status='completed'))
+        db.session.add(WithdrawalRequest(seller_id=self.seller.id, amount=500, status='rejected'))
+        db.session.commit()
+
+        backfill()
+        self.assertEqual(backfill(), 0)
+        bal = db.session.get(SellerBalance, self.seller.id)
+        self.assertEqual((bal.total_sales, bal.total_refunded, bal.total_withdrawn), (120, 30, 20))
+        self.assertEqual(bal.balance, 70)
+        last = SellerLedgerEntry.query.filter_by(seller_id=self.seller.id).order_by(SellerLedgerEntry.id.desc()).first()
+        self.assertEqual(last.balance_after, 70)
+        self.assertEqual(get_balance(self.other.id).balance, 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Order, OrderItem
+
+class SellerOrdersTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        other = User(name="Other", email="other@test.com", role="seller", is_approved=True)
+        buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        cat = Category(name="Cat", slug="cat")
+        for u in (seller, other, buyer):
+            u.set_password("password")
+        db.session.add_all([seller, other, buyer, cat])
+        db.session.commit()
+        self.bowl = Product(seller_id=seller.id, category_id=cat.id, name="Bowl", price=10, status='approved')
+        self.cup = Product(seller_id=seller.id, category_id=cat.id, name="Cup", price=5, status='approved')
+        mug = Product(seller_id=other.id, category_id=cat.id, name="Mug", price=99, status='approved')
+        db.session.add_all([self.bowl, self.cup, mug])
+        db.session.flush()
+
+        # Order n is n days old; every order has a bowl, even orders also a cup and another seller's mug
+        start = datetime(2024, 1, 10)
+        for n in range(1, 7):
+            order = Order(user_id=buyer.id, total_amount=0, status='shipped' if n % 3 == 0 else 'paid',
+                          created_at=start - timedelta(days=n))
+            db.session.add(order)
+            db.session.flush()
+            db.session.add(OrderItem(order_id=order.id, product_id=self.bowl.id, seller_id=seller.id, quantity=n, price=10, subtotal=10 * n))
+            if n % 2 == 0:
+                db.session.add(OrderItem(order_id=order.id, product_id=self.cup.id, seller_id=seller.id, quantity=1, price=5, subtotal=5))
+                db.session.add(OrderItem(order_id=order.id, product_id=mug.id, seller_id=other.id, quantity=1, price=99, subtotal=99))
+        db.session.commit()
+
+        token = create_access_token(identity=str(seller.id), additional_claims={'role': 'seller'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def get(self, **params):
+        return self.app.get('/api/seller/orders', query_string=params, headers=self.headers).get_json()
+
+    def test_orders_grouped_and_paged(self):
+        data = self.get(limit=4)
+        self.assertEqual((data['total'], data['pages']), (6, 2))
+        first = data['orders'][0]
+        self.assertEqual(first['total'], 10)
+        second = data['orders'][1]
+        self.assertEqual([i['product_name'] for i in second['items']], ['Bowl', 'Cup'])
+        self.assertEqual(second['total'], 25)
+        self.assertEqual(len(self.get(limit=4, page=2)['orders']), 2)
+
+    def test_filters_and_sort(self):
+        self.assertEqual([o['total'] for o in self.get(status='shipped')['orders']], [30, 65])
+        self.assertEqual(self.get(product_id=self.cup.id)['total'], 3)
+        self.assertEqual(self.get(**{'from': '2024-01-06', 'to': '2024-01-07'})['total'], 2)
+        self.assertEqual([o['total'] for o in self.get(sort_by='total_high_low', limit=2)['orders']], [65, 50])
+
+    def test_constant_query_count(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            self.get(limit=50)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertLessEqual(len(statements), 3)
+
+if __name__ == '__main__':
+    unittest.main()
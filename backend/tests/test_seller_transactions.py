@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from extensions import db
+from models import User, Category, Product, Order, OrderItem, WithdrawalRequest
+
+class SellerTransactionsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database."""
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        seller = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        other = User(name="Other", email="other@test.com", role="seller", is_approved=True)
+        buyer = User(name="Buyer", email="buyer@test.com", role="user")
+        cat = Category(name="Cat", slug="cat")
+        for u in (seller, other, buyer):
+            u.set_password("password")
+        db.session.add_all([seller, other, buyer, cat])
+        db.session.commit()
+        product = Product(seller_id=seller.id, category_id=cat.id, name="Bowl", price=10, status='approved')
+        db.session.add(product)
+        db.session.flush()
+
+        # Sales on days 0, 2, 4, 6; withdrawals on days 1, 3, 5; one sale for another seller
+        self.start = datetime(2024, 1, 1, 12, 0)
+        for day in (0, 2, 4, 6):
+            order = Order(user_id=buyer.id, total_amount=10 * (day + 1), status='paid', payment_status='paid',
+                          created_at=self.start + timedelta(days=day))
+            db.session.add(order)
+            db.session.flush()
+            db.session.add(OrderItem(order_id=order.id, product_id=product.id, seller_id=seller.id,
+                                     quantity=1, price=10 * (day + 1), subtotal=10 * (day + 1)))
+        for day in (1, 3, 5):
+            db.session.add(WithdrawalRequest(seller_id=seller.id, amount=day, status='requested',
+                                             requested_at=self.start + timedelta(days=day)))
+        order = Order(user_id=buyer.id, total_amount=99, status='paid', created_at=self.start)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id, product_id=product.id, seller_id=other.id, quantity=1, price=99, subtotal=99))
+        db.session.commit()
+
+        token = create_access_token(identity=str(seller.id), additional_claims={'role': 'seller'})
+        self.headers = {'Authorization': f"Bearer {token}"}
+
+    def tearDown(self):
+        """Clean up database."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_keyset_pages_are_merged_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            data = self.app.get('/api/seller/transactions', query_string=params, headers=self.headers).get_json()
+            seen.extend(data['transactions'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual([t['amount'] for t in seen], [70, 5, 50, 3, 30, 1, 10])
+        self.assertEqual([t['type'] for t in seen[:2]], ['credit', 'debit'])
+        self.assertEqual(seen[0]['description'], "Sale: Bowl")
+
+    def test_date_range_and_bad_cursor(self):
+        res = self.app.get('/api/seller/transactions', query_string={'from': '2024-01-02', 'to': '2024-01-04'}, headers=self.headers)
+        self.assertEqual([t['amount'] for t in res.get_json()['transactions']], [3, 30, 1])
+        res = self.app.get('/api/seller/transactions', query_string={'cursor': 'nope'}, headers=self.headers)
+        self.assertEqual(res.status_code, 400)
+
+    def test_csv_export_streams_same_rows(self):
+        res = self.app.get('/api/seller/transactions/export', query_string={'from': '2024-01-03'}, headers=self.headers)
+        self.assertEqual(res.mimetype, 'text/csv')
+        lines = res.get_data(as_text=True).strip().splitlines()
+        self.assertEqual(lines[0], 'date,id,type,amount,description,status')
+        self.assertEqual([l.split(',')[3] for l in lines[1:]], ['70.0', '5.0', '50.0', '3.0', '30.0'])
+
+        from seller_history import iter_csv
+        chunks = list(iter_csv(User.query.filter_by(email="seller@test.com").first().id, chunk_size=2))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(''.join(chunks).count('\n'), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+import subprocess
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from startup_report import parse_importtime, package_costs, run_probe
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   sqlalchemy.util
+import time:       300 |        420 | sqlalchemy
+import time:        50 |         50 |   routes.auth
+import time:        10 |         60 | routes
+"""
+
+class StartupReportTestCase(unittest.TestCase):
+    def test_package_costs_sum_self_time(self):
+        rows = parse_importtime(SAMPLE)
+        self.assertEqual(rows[0], ('sqlalchemy.util', 120, 120))
+        self.assertEqual(package_costs(rows), [('sqlalchemy', 0.42), ('routes', 0.06)])
+
+    def test_cold_start_skips_heavy_sdks(self):
+        result = run_probe()
+        self.assertEqual(result['lazy_loaded'], [])
+        self.assertTrue(result['packages'])
+
+    def test_import_does_not_build_app(self):
+        # In a fresh interpreter, like the probe: earlier tests may have built the global app here
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        proc = subprocess.run([sys.executable, '-c', 'import app; assert app._app is None; assert callable(app.create_app)'],
+                              cwd=backend_dir, capture_output=True, text=True, timeout=300)
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+
+if __name__ == '__main__':
+    unittest.main()
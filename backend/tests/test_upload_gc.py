@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+from datetime import datetime, timedelta
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['EMAIL_HOST'] = ''
+os.environ['NOTIFICATION_ENDPOINT'] = ''
+
+from app import create_app
+from extensions import db
+from models import User, Category, Product, ProductImage, File, FileBlob, Setting, Advertisement
+import file_store
+import upload_gc
+
+OLD = datetime.utcnow() - timedelta(days=3)
+
+class UploadGcTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up test client, in-memory database and a temporary upload folder."""
+        self.upload_folder = tempfile.mkdtemp()
+        self.flask_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'UPLOAD_FOLDER': self.upload_folder})
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = User(name="Seller", email="seller@test.com", role="seller", is_approved=True)
+        self.owner.set_password("password")
+        cat = Category(name="Kitchen", slug="kitchen")
+        db.session.add_all([self.owner, cat])
+        db.session.commit()
+        self.product = Product(seller_id=self.owner.id, category_id=cat.id, name="Bowl", price=10)
+        db.session.add(self.product)
+        db.session.commit()
+
+        # Product image, orphan sharing its blob, plain orphan, recent orphan, and one used by a setting
+        self.used = self._file(b'shared', 'bowl.png')
+        self.twin = self._file(b'shared', 'copy.png')
+        self.orphan = self._file(b'orphan', 'old.png')
+        self.recent = self._file(b'recent', 'new.png', created_at=datetime.utcnow())
+        self.logo = self._file(b'logo', 'logo.png')
+        db.session.add(ProductImage(product_id=self.product.id, file_id=self.used.id, position=0))
+        db.session.add(Setting(key='site_logo', value=f'/api/files/{self.logo.id}/download'))
+
+        # Legacy files stored by name
+        cat.image = self._legacy('uuid_category.png')
+        self._legacy('uuid_banner.mp4')
+        db.session.add(Advertisement(title="Ad", image_url='/api/uploads/uuid_banner.mp4'))
+        self._legacy('uuid_stray.png')
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up database and uploads."""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.upload_folder, ignore_errors=True)
+
+    def _age(self, path):
+        stamp = time.time() - 3 * 24 * 3600
+        os.utime(path, (stamp, stamp))
+
+    def _file(self, content, name, created_at=OLD):
+        frec, _ = file_store.store_file(content, self.owner.id, self.upload_folder, filename=name)
+        frec.created_at = created_at
+        self._age(frec.filepath)
+        db.session.commit()
+        return frec
+
+    def _legacy(self, name):
+        path = os.path.join(self.upload_folder, name)
+        with open(path, 'wb') as f:
+            f.write(b'legacy')
+        self._age(path)
+        return name
+
+    def test_dry_run_changes_nothing(self):
+        report = upload_gc.collect(self.upload_folder)
+        self.assertFalse(report['applied'])
+        self.assertEqual(report['file_rows'], 2)  # twin and orphan
+        self.assertEqual(report['sample'], ['uuid_stray.png'])
+        self.assertEqual(File.query.count(), 5)
+        self.assertTrue(os.path.exists(os.path.join(self.upload_folder, 'uuid_stray.png')))
+
+    def test_apply_removes_orphans(self):
+        orphan_path, twin_sha = self.orphan.filepath, self.twin.sha256
+        report = upload_gc.collect(self.upload_folder, apply=True, batch_size=2)
+        self.assertEqual((report['file_rows'], report['paths']), (2, 1))
+
+        remaining = {f.filename for f in File.query}
+        self.assertEqual(remaining, {'bowl.png', 'new.png', 'logo.png'})
+        self.assertFalse(os.path.exists(orphan_path))
+        self.assertFalse(os.path.exists(os.path.join(self.upload_folder, 'uuid_stray.png')))
+        # The shared blob is still used by the product image
+        self.assertEqual(db.session.get(FileBlob, twin_sha).ref_count, 1)
+        self.assertTrue(os.path.exists(self.used.filepath))
+        for name in ('uuid_category.png', 'uuid_banner.mp4'):
+            self.assertTrue(os.path.exists(os.path.join(self.upload_folder, name)))
+
+        # A second run finds nothing
+        again = upload_gc.collect(self.upload_folder, apply=True)
+        self.assertEqual((again['file_rows'], again['paths']), (0, 0))
+
+    def test_blob_uploaded_again_before_disposal_is_kept(self):
+        # Pass 1: the orphan's content is uploaded again right after the GC commits
+        orphan_path = self.orphan.filepath
+        exists, revived = os.path.exists, []
+        def reupload_then_exists(path):
+            if path == orphan_path and not revived:
+                revived.append(path)
+                file_store.store_file(b'orphan', self.owner.id, self.upload_folder, filename='again.png')
+                db.session.commit()
+            return exists(path)
+        with patch('upload_gc.os.path.exists', side_effect=reupload_then_exists):
+            upload_gc.collect(self.upload_folder, apply=True)
+        self.assertTrue(revived)
+        self.assertTrue(os.path.exists(orphan_path))
+
+        # Pass 2: a stray blob is uploaded again between the reference check and disposal
+        name = file_store.blob_name('ab' * 32, '.png')
+        stray = os.path.join(self.upload_folder, name)
+        os.makedirs(os.path.dirname(stray), exist_ok=True)
+        with open(stray, 'wb') as f:
+            f.write(b'stray')
+        self._age(stray)
+        referenced = upload_gc._referenced
+        def reupload_after_check(upload_folder, batch, url_names):
+            used = referenced(upload_folder, batch, url_names)
+            if any(path == stray for _, path, _ in batch):
+                file_store.acquire('ab' * 32, name, 5)
+                db.session.commit()
+            return used
+        with patch('upload_gc._referenced', side_effect=reupload_after_check):
+            report = upload_gc.collect(self.upload_folder, apply=True)
+        self.assertEqual(report['paths'], 0)
+        self.assertTrue(os.path.exists(stray))
+
+    def test_quarantine(self):
+        upload_gc.collect(self.upload_folder, apply=True, quarantine=True)
+        day = datetime.utcnow().strftime('%Y%m%d')
+        self.assertTrue(os.path.exists(os.path.join(self.upload_folder, upload_gc.QUARANTINE_DIR, day, 'uuid_stray.png')))
+        self.assertEqual(upload_gc.purge_quarantine(self.upload_folder, now=datetime.utcnow() + timedelta(days=10)), 1)
+        self.assertFalse(os.listdir(os.path.join(self.upload_folder, upload_gc.QUARANTINE_DIR)))
+
+if __name__ == '__main__':
+    unittest.main()
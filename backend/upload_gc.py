@@ -0,0 +1,202 @@
+import json
+import os
+import re
+import shutil
+from datetime import datetime, timedelta
+from extensions import db
+from models import (File, FileBlob, FileVariant, ProductImage, User, Category, Setting, Advertisement,
+                    UploadSession)
+import file_store
+import chunked_upload
+
+# Garbage collection for uploads. Two passes, both in batches so neither the
+# upload folder nor the File table is ever held in memory:
+#   1. File rows older than the grace period that nothing points at (product
+#      images, profile photos, file URLs saved in settings or ads) are
+#      deleted and their blob references released.
+#   2. The upload folder is walked with os.scandir; each batch of paths is
+#      checked against every table that names files on disk, and paths no row
+#      mentions are deleted or moved to quarantine.
+# The grace period keeps uploads that are still in flight, or uploaded ahead of
+# the product that will use them, out of both passes. Without apply=True
+# nothing is changed and the report lists what would be removed. Files freed by
+# pass 1 only show up in pass 2 once pass 1 has been applied.
+GRACE_PERIOD = timedelta(hours=24)
+BATCH_SIZE = 500
+QUARANTINE_DIR = 'quarantine'
+QUARANTINE_KEEP = timedelta(days=7)
+REPORT_SAMPLE = 50
+
+FILE_URL = re.compile(r'/api/files/(\d+)/download')
+UPLOAD_URL = re.compile(r'/api/uploads/([^\s"\'?#]+)')
+
+
+def _url_references():
+    """File ids and upload names mentioned in settings and ads. Both tables are small."""
+    texts = [v for (v,) in db.session.query(Setting.value)]
+    for image_url, footer_logo_url in db.session.query(Advertisement.image_url, Advertisement.footer_logo_url):
+        texts.extend((image_url, footer_logo_url))
+    ids, names = set(), set()
+    for text in texts:
+        if text:
+            ids.update(int(i) for i in FILE_URL.findall(text))
+            names.update(UPLOAD_URL.findall(text))
+    return ids, names
+
+
+def _orphan_file_batches(cutoff, url_ids, batch_size):
+    """Yields lists of unreferenced File rows created before cutoff."""
+    last_id = 0
+    while True:
+        batch = File.query.filter(File.id > last_id, File.created_at < cutoff).order_by(File.id).limit(batch_size).all()
+        if not batch:
+            return
+        last_id = batch[-1].id
+        ids = [f.id for f in batch]
+        used = set(url_ids)
+        used.update(i for (i,) in db.session.query(ProductImage.file_id).filter(ProductImage.file_id.in_(ids)))
+        used.update(i for (i,) in db.session.query(User.profile_photo_id).filter(User.profile_photo_id.in_(ids)))
+        orphans = [f for f in batch if f.id not in used]
+        if orphans:
+            yield orphans
+
+
+def _walk(root, skip):
+    """Yields (relative name, path, stat) for every file under root, depth first, via os.scandir."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.relpath(entry.path, root) not in skip:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield os.path.relpath(entry.path, root).replace(os.sep, '/'), entry.path, entry.stat()
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _referenced(upload_folder, batch, url_names):
+    """The subset of a batch of (name, path, stat) that some row points at."""
+    names = [name for name, _, _ in batch]
+    # Rows store paths as os.path.join(UPLOAD_FOLDER, name), so match on that spelling
+    paths = [os.path.join(upload_folder, name.replace('/', os.sep)) for name in names]
+    used = set(url_names) & set(names)
+    used.update(n.replace(os.sep, '/') for (n,) in db.session.query(FileBlob.path).filter(FileBlob.path.in_([n.replace('/', os.sep) for n in names])))
+    used.update(n for (n,) in db.session.query(Category.image).filter(Category.image.in_(names)))
+    for column in (File.filepath, FileVariant.filepath, UploadSession.temp_path):
+        for (p,) in db.session.query(column).filter(column.in_(paths)):
+            used.add(os.path.relpath(p, upload_folder).replace(os.sep, '/'))
+    return used
+
+
+def _revived(upload_folder, path):
+    """True if a freed blob has been uploaded again since, i.e. its FileBlob row is back."""
+    sha256 = file_store.sha_from_name(os.path.relpath(path, upload_folder))
+    return sha256 is not None and db.session.get(FileBlob, sha256) is not None
+
+
+def _dispose(upload_folder, path, quarantine):
+    if quarantine:
+        target = os.path.join(upload_folder, QUARANTINE_DIR, datetime.utcnow().strftime('%Y%m%d'),
+                              os.path.relpath(path, upload_folder))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+    else:
+        os.remove(path)
+
+
+def purge_quarantine(upload_folder, keep=QUARANTINE_KEEP, now=None):
+    """Deletes quarantine days older than `keep`. Returns the number of day folders removed."""
+    root = os.path.join(upload_folder, QUARANTINE_DIR)
+    if not os.path.isdir(root):
+        return 0
+    cutoff = ((now or datetime.utcnow()) - keep).strftime('%Y%m%d')
+    removed = 0
+    for day in os.listdir(root):
+        if day < cutoff:
+            shutil.rmtree(os.path.join(root, day), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def collect(upload_folder, apply=False, quarantine=False, grace=GRACE_PERIOD, batch_size=BATCH_SIZE, now=None):
+    """Runs both passes. Returns a report of what was (or, without apply, would be) removed."""
+    now = now or datetime.utcnow()
+    cutoff = now - grace
+    report = {"applied": apply, "quarantine": quarantine, "file_rows": 0, "paths": 0, "bytes": 0, "sample": []}
+    if apply:
+        chunked_upload.expire_sessions(upload_folder, now=now)
+    url_ids, url_names = _url_references()
+
+    for orphans in _orphan_file_batches(cutoff, url_ids, batch_size):
+        report["file_rows"] += len(orphans)
+        if not apply:
+            continue
+        ids = [f.id for f in orphans]
+        FileVariant.query.filter(FileVariant.file_id.in_(ids)).delete(synchronize_session=False)
+        UploadSession.query.filter(UploadSession.file_id.in_(ids)).update({"file_id": None}, synchronize_session=False)
+        freed = file_store.release([f.sha256 for f in orphans if f.sha256], upload_folder)
+        File.query.filter(File.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        for path in freed:
+            # An upload of the same content between the commit and here finds
+            # the file still on disk and recreates the row instead of rewriting it
+            if os.path.exists(path) and not _revived(upload_folder, path):
+                report["bytes"] += os.path.getsize(path)
+                _dispose(upload_folder, path, quarantine)
+
+    skip = {QUARANTINE_DIR, os.path.join(file_store.BLOB_DIR, 'tmp')}
+    old_enough = ((name, path, st) for name, path, st in _walk(upload_folder, skip)
+                  if datetime.utcfromtimestamp(st.st_mtime) < cutoff)
+    for batch in _chunks(old_enough, batch_size):
+        used = _referenced(upload_folder, batch, url_names)
+        if apply:
+            # Re-check blobs in a fresh transaction, as in pass 1
+            db.session.rollback()
+        for name, path, st in batch:
+            if name in used or apply and _revived(upload_folder, path):
+                continue
+            report["paths"] += 1
+            report["bytes"] += st.st_size
+            if len(report["sample"]) < REPORT_SAMPLE:
+                report["sample"].append(name)
+            if apply:
+                _dispose(upload_folder, path, quarantine)
+    # Temp files from interrupted uploads are never referenced
+    tmp_root = os.path.join(upload_folder, file_store.BLOB_DIR, 'tmp')
+    if apply and os.path.isdir(tmp_root):
+        for name, path, st in _walk(tmp_root, set()):
+            if datetime.utcfromtimestamp(st.st_mtime) < cutoff:
+                os.remove(path)
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description="Find and remove uploads nothing refers to. Dry run unless --apply is given.")
+    parser.add_argument('--apply', action='store_true', help="Delete (or quarantine) the orphans")
+    parser.add_argument('--quarantine', action='store_true', help="Move orphans to uploads/quarantine instead of deleting them")
+    parser.add_argument('--grace-hours', type=float, default=GRACE_PERIOD.total_seconds() / 3600)
+    parser.add_argument('--purge-quarantine-days', type=float, default=None,
+                        help="Also delete quarantined files older than this many days")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        folder = app.config['UPLOAD_FOLDER']
+        result = collect(folder, apply=args.apply, quarantine=args.quarantine, grace=timedelta(hours=args.grace_hours))
+        if args.apply and args.purge_quarantine_days is not None:
+            result["quarantine_days_purged"] = purge_quarantine(folder, keep=timedelta(days=args.purge_quarantine_days))
+        print(json.dumps(result, indent=2))
@@ -60,6 +60,37 @@ export function upload(url, formData, { onUploadProgress, headers = {}, ...opts
   return api.post(url, formData, cfg);
 }
 
+// Resumable upload for large media (e.g. banner videos). Sends the file in
+// chunks to /api/upload/sessions and, after a dropped request, asks the server
+// for its offset and continues from there. Resolves like POST /api/upload.
+export async function uploadResumable(file, { onProgress, retries = 5 } = {}) {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  const sha256 = Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+
+  const { data: session } = await api.post('/api/upload/sessions', { filename: file.name, size: file.size });
+  const chunkSize = Math.min(session.chunk_size, 4 * 1024 * 1024);
+  let offset = session.offset;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const res = await api.put(`/api/upload/sessions/${session.id}`, file.slice(offset, offset + chunkSize), {
+        headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+        timeout: 0,
+      });
+      offset = res.data.offset;
+      failures = 0;
+      onProgress?.(offset / file.size);
+    } catch (err) {
+      if (++failures > retries) throw err;
+      await new Promise((r) => setTimeout(r, 1000 * failures));
+      const res = await api.get(`/api/upload/sessions/${session.id}`);
+      offset = res.data.offset;
+    }
+  }
+  const res = await api.post(`/api/upload/sessions/${session.id}/complete`, { sha256 }, { timeout: 0 });
+  return res;
+}
+
 export function setAuthToken(token) {
   if (token) {
     localStorage.setItem('access_token', token);
@@ -7,6 +7,7 @@ import { getImageUrl } from "../../utils/image";
 
 export default function AdminAds() {
   const [ads, setAds] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [editingAd, setEditingAd] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [formData, setFormData] = useState({
@@ -33,9 +34,10 @@ export default function AdminAds() {
     });
   }, []);
 
-  const loadAds = () => {
-    api.get("/api/admin/ads").then((res) => {
-      setAds(res.data);
+  const loadAds = (cursor = null) => {
+    api.get("/api/admin/ads", { params: cursor ? { cursor } : {} }).then((res) => {
+      setAds(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
     });
   };
 
@@ -198,6 +200,11 @@ export default function AdminAds() {
                 {ads.length === 0 && <tr><td colSpan="9" className="p-8 text-center text-gray-500">No advertisements found.</td></tr>}
                 </tbody>
             </table>
+            {nextCursor && (
+              <div className="p-4 text-center">
+                <button onClick={() => loadAds(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+              </div>
+            )}
           </div>
         </div>
       </div>
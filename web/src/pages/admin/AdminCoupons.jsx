@@ -4,6 +4,7 @@ import api from "../../api/client";
 
 export default function AdminCoupons() {
   const [coupons, setCoupons] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [showModal, setShowModal] = useState(false);
   const [newCoupon, setNewCoupon] = useState({
     code: "",
@@ -18,23 +19,10 @@ export default function AdminCoupons() {
     fetchCoupons();
   }, []);
 
-  const fetchCoupons = () => {
-    // Need an endpoint to list coupons. Admin should see all.
-    // Currently 'create_coupon' is in admin.py (no, it was in app.py, refactored to... where?)
-    // I missed adding `list_coupons` in `admin.py` during refactor?
-    // Let's check `admin.py` content I wrote.
-    // I wrote `admin_add_user`, `admin_users`, `admin_dashboard`... 
-    // I might have missed `admin_coupons` GET.
-    // But I can add it now implicitly by ensuring the backend has it.
-    // Actually, I need to add `list_coupons` to `admin.py` in backend first?
-    // Wait, I can't modify backend anymore unless necessary. 
-    // Did I add it? I added `create_coupon` in `admin.py`? No, I added `create_coupon` in `admin.py`... wait.
-    // I need to check `admin.py` again.
-    // If it's missing, I MUST add it to backend `routes/admin.py`.
-    
-    // Assuming I will add it or it exists. 
-    api.get("/api/admin/coupons").then((res) => {
-      setCoupons(res.data);
+  const fetchCoupons = (cursor = null) => {
+    api.get("/api/admin/coupons", { params: cursor ? { cursor } : {} }).then((res) => {
+      setCoupons(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
     }).catch(() => setCoupons([]));
   };
 
@@ -100,6 +88,11 @@ export default function AdminCoupons() {
                     {coupons.length === 0 && <tr><td colSpan="7" className="p-8 text-center text-slate-400">No coupons found.</td></tr>}
                 </tbody>
             </table>
+            {nextCursor && (
+                <div className="p-4 text-center">
+                    <button onClick={() => fetchCoupons(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+                </div>
+            )}
         </div>
 
         {showModal && (
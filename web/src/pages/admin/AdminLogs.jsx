@@ -1,28 +1,85 @@
-
 import React, { useState, useEffect } from "react";
 import { Helmet } from "react-helmet";
 import api from "../../api/client";
+import { useSocket } from "../../contexts/SocketContext";
+
+const LEVEL_COLORS = {
+  WARNING: "text-yellow-300",
+  ERROR: "text-red-400",
+  CRITICAL: "text-red-500 font-bold"
+};
+const MAX_ENTRIES = 1000; // Followed lines are dropped from the top past this
 
 export default function AdminLogs() {
-  const [logs, setLogs] = useState([]);
+  const [entries, setEntries] = useState([]);
   const [error, setError] = useState(null);
+  const [filters, setFilters] = useState({ level: "", q: "", since: "", limit: 100 });
+  const [following, setFollowing] = useState(false);
+  const socket = useSocket();
+
+  const filterParams = () => {
+    const params = {};
+    Object.keys(filters).forEach(key => {
+        if (filters[key]) params[key] = filters[key];
+    });
+    return params;
+  };
 
   const fetchLogs = () => {
-    api.get("/api/admin/logs")
+    api.get("/api/admin/logs", { params: filterParams() })
       .then((res) => {
-        setLogs(res.data.logs || []);
+        setEntries(res.data.entries || []);
         setError(null);
       })
       .catch((err) => {
         console.error("Failed to fetch logs", err);
-        setError("Failed to load logs");
+        setError(err.response?.data?.description || "Failed to load logs");
       });
   };
 
+  const downloadLogs = async () => {
+    try {
+      const params = filterParams();
+      delete params.limit;
+      const res = await api.get("/api/admin/logs/download", { params, responseType: 'blob' });
+      const url = window.URL.createObjectURL(new Blob([res.data], { type: 'text/plain' }));
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'app-log.txt';
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (err) {
+      alert("Failed to download logs");
+    }
+  };
+
   useEffect(() => {
     fetchLogs();
   }, []);
 
+  // Live tail over Socket.IO while "Follow" is on
+  useEffect(() => {
+    if (!socket || !following) return;
+    const handleLines = (payload) => {
+        setEntries(prev => [...prev, ...payload.entries].slice(-MAX_ENTRIES));
+    };
+    socket.on('log_lines', handleLines);
+    socket.emit('logs:follow', { token: localStorage.getItem("access_token"), level: filters.level, q: filters.q }, (ack) => {
+        if (ack && ack.error) {
+            setError(ack.error);
+            setFollowing(false);
+        }
+    });
+    return () => {
+        socket.emit('logs:unfollow');
+        socket.off('log_lines', handleLines);
+    };
+  }, [socket, following]);
+
+  const handleFilterChange = (e) => {
+    setFilters({ ...filters, [e.target.name]: e.target.value });
+  };
+
   return (
     <>
       <Helmet>
@@ -31,13 +88,37 @@ export default function AdminLogs() {
       <div className="space-y-4">
         <div className="flex justify-between items-center">
             <h1 className="text-2xl font-semibold">System Logs</h1>
-            <button onClick={fetchLogs} className="bg-gray-200 px-3 py-1 rounded text-sm hover:bg-gray-300">Refresh</button>
+            <div className="flex gap-2">
+                <button onClick={() => setFollowing(!following)} disabled={!socket} className={`px-3 py-1 rounded text-sm ${following ? 'bg-green-600 text-white' : 'bg-gray-200 hover:bg-gray-300'}`}>
+                    {following ? 'Following' : 'Follow'}
+                </button>
+                <button onClick={downloadLogs} className="bg-gray-200 px-3 py-1 rounded text-sm hover:bg-gray-300">Download</button>
+                <button onClick={fetchLogs} className="bg-gray-200 px-3 py-1 rounded text-sm hover:bg-gray-300">Refresh</button>
+            </div>
+        </div>
+        <div className="flex flex-wrap gap-2 text-sm">
+            <select name="level" value={filters.level} onChange={handleFilterChange} className="border rounded px-2 py-1">
+                <option value="">All levels</option>
+                <option value="INFO">Info and above</option>
+                <option value="WARNING">Warnings and above</option>
+                <option value="ERROR">Errors and above</option>
+            </select>
+            <input name="q" value={filters.q} onChange={handleFilterChange} placeholder="Contains text..." className="border rounded px-2 py-1" />
+            <input name="since" type="datetime-local" value={filters.since} onChange={handleFilterChange} className="border rounded px-2 py-1" />
+            <select name="limit" value={filters.limit} onChange={handleFilterChange} className="border rounded px-2 py-1">
+                <option value={100}>Last 100</option>
+                <option value={500}>Last 500</option>
+                <option value={1000}>Last 1000</option>
+            </select>
+            <button onClick={fetchLogs} className="bg-slate-900 text-white px-3 py-1 rounded">Apply</button>
         </div>
         <div className="bg-slate-900 text-gray-300 p-4 rounded-xl shadow font-mono text-xs h-96 overflow-y-auto whitespace-pre-wrap">
             {error ? (
                 <div className="text-red-400">{error}</div>
             ) : (
-                logs.length > 0 ? logs.join("") : "No logs available."
+                entries.length > 0 ? entries.map((entry, idx) => (
+                    <div key={idx} className={LEVEL_COLORS[entry.level] || ""}>{entry.text}</div>
+                )) : "No logs available."
             )}
         </div>
       </div>
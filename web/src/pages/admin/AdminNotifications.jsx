@@ -8,34 +8,35 @@ export default function AdminNotifications() {
   const [subject, setSubject] = useState('');
   const [message, setMessage] = useState('');
   const [loading, setLoading] = useState(false);
+  const [job, setJob] = useState(null); // Progress of the last broadcast
   
   // User Search State
-  const [users, setUsers] = useState([]);
   const [filteredUsers, setFilteredUsers] = useState([]);
   const [showDropdown, setShowDropdown] = useState(false);
 
-  useEffect(() => {
-    // Fetch simplified user list for search
-    api.get('/api/admin/users').then(res => {
-        setUsers(res.data);
-    }).catch(console.error);
-  }, []);
-
   const handleSearchUser = (e) => {
       const term = e.target.value;
       setSelectedUser(term);
       if(term.length > 1) {
-          const matches = users.filter(u => 
-              u.name.toLowerCase().includes(term.toLowerCase()) || 
-              u.email.toLowerCase().includes(term.toLowerCase())
-          );
-          setFilteredUsers(matches);
-          setShowDropdown(true);
+          // Searched on the server; the user list is paginated
+          api.get('/api/admin/users', { params: { q: term, limit: 10 } }).then(res => {
+              setFilteredUsers(res.data.items);
+              setShowDropdown(true);
+          }).catch(console.error);
       } else {
           setShowDropdown(false);
       }
   };
 
+  // Poll the fan-out job until it finishes
+  useEffect(() => {
+    if (!job || job.status === 'completed' || job.status === 'failed') return;
+    const timer = setTimeout(() => {
+        api.get(`/api/admin/notifications/jobs/${job.id}`).then(res => setJob(res.data)).catch(console.error);
+    }, 2000);
+    return () => clearTimeout(timer);
+  }, [job]);
+
   const selectUser = (u) => {
       setSelectedUser(`${u.id} - ${u.name} (${u.email})`);
       setShowDropdown(false);
@@ -75,7 +76,7 @@ export default function AdminNotifications() {
         subject,
         message
     }).then(res => {
-        alert(res.data.message);
+        setJob(res.data);
         setSubject('');
         setMessage('');
         setSelectedUser('');
@@ -95,6 +96,18 @@ export default function AdminNotifications() {
             <p className="text-slate-500 text-sm">Send emails and push notifications to your users.</p>
         </div>
 
+        {job && (
+            <div className="bg-white p-4 rounded-xl shadow border border-slate-200 text-sm text-slate-700">
+                <p className="font-medium">
+                    "{job.subject}": {job.status === 'completed' ? 'Sent' : job.status === 'failed' ? 'Failed' : 'Sending'} to {job.saved} of {job.total} recipients
+                </p>
+                <p className="text-slate-500">
+                    Emails sent: {job.emails_sent}, not delivered: {job.emails_failed}. Push sent: {job.pushes_sent}, not delivered: {job.pushes_failed}.
+                </p>
+                {job.error && <p className="text-red-600">{job.error}</p>}
+            </div>
+        )}
+
         <div className="bg-white p-6 rounded-xl shadow border border-slate-200 space-y-6">
             
             {/* Target Selection */}
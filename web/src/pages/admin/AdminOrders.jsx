@@ -4,6 +4,7 @@ import api from "../../api/client";
 
 export default function AdminOrders() {
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [categories, setCategories] = useState([]);
   const [filters, setFilters] = useState({
     sku: "",
@@ -13,13 +14,15 @@ export default function AdminOrders() {
     end_date: ""
   });
 
-  const fetchOrders = () => {
+  const fetchOrders = (cursor = null) => {
     const params = new URLSearchParams();
     Object.keys(filters).forEach(key => {
         if (filters[key]) params.append(key, filters[key]);
     });
+    if (cursor) params.append("cursor", cursor);
     api.get(`/api/admin/orders?${params.toString()}`).then((res) => {
-      setOrders(res.data);
+      setOrders(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
     });
   };
 
@@ -49,7 +52,7 @@ export default function AdminOrders() {
                 <p className="text-textsecondary text-base font-normal">Manage and track customer orders.</p>
             </div>
             <div className="flex gap-2">
-                <button onClick={fetchOrders} className="flex items-center justify-center gap-2 rounded-lg h-10 px-4 bg-sidebarbg text-textsecondary text-sm font-bold border border-primary/20 hover:bg-brandbg/10">
+                <button onClick={() => fetchOrders()} className="flex items-center justify-center gap-2 rounded-lg h-10 px-4 bg-sidebarbg text-textsecondary text-sm font-bold border border-primary/20 hover:bg-brandbg/10">
                     <span className="material-symbols-outlined text-lg">refresh</span>
                     <span>Refresh</span>
                 </button>
@@ -64,7 +67,7 @@ export default function AdminOrders() {
                     <span className="material-symbols-outlined absolute left-3 text-textmuted">search</span>
                     <input 
                         name="sku" 
-                        placeholder="Search by SKU..." 
+                        placeholder="SKU starts with..." 
                         value={filters.sku} 
                         onChange={handleFilterChange} 
                         className="w-full pl-10 pr-4 h-10 rounded-lg border border-primary/20 text-sm focus:outline-none focus:ring-2 focus:ring-primary/50 text-textprimary bg-transparent" 
@@ -91,7 +94,7 @@ export default function AdminOrders() {
                     <span className="material-symbols-outlined absolute right-2 top-2.5 text-textmuted pointer-events-none">expand_more</span>
                 </div>
                 {/* Filter Button */}
-                <button onClick={fetchOrders} className="h-10 px-6 bg-primary hover:bg-primary/90 text-white text-sm font-bold rounded-lg transition-colors">
+                <button onClick={() => fetchOrders()} className="h-10 px-6 bg-primary hover:bg-primary/90 text-white text-sm font-bold rounded-lg transition-colors">
                     Apply Filters
                 </button>
             </div>
@@ -144,10 +147,11 @@ export default function AdminOrders() {
                     </tbody>
                 </table>
             </div>
-            {/* Footer/Pagination Placeholder */}
             <div className="flex items-center justify-between p-4 border-t border-primary/10 bg-brandbg/5">
                 <p className="text-sm text-textsecondary">Showing {orders.length} results</p>
-                {/* Add pagination controls here if backend supports it */}
+                {nextCursor && (
+                    <button onClick={() => fetchOrders(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+                )}
             </div>
         </div>
       </div>
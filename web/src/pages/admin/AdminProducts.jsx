@@ -6,6 +6,7 @@ import { useSocket } from "../../contexts/SocketContext";
 
 export default function AdminProducts() {
   const [products, setProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [categories, setCategories] = useState([]);
   const [sellers, setSellers] = useState([]);
   const [showAddModal, setShowAddModal] = useState(false);
@@ -16,10 +17,10 @@ export default function AdminProducts() {
   const [loading, setLoading] = useState(false);
   const socket = useSocket();
 
-  const fetchProducts = () => {
-    // Fetch ALL products (admin view)
-    api.get("/api/admin/products").then((res) => {
-      setProducts(res.data);
+  const fetchProducts = (cursor = null) => {
+    api.get("/api/admin/products", { params: cursor ? { cursor } : {} }).then((res) => {
+      setProducts(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
     }).catch(err => console.error("Failed to fetch products", err));
   }
 
@@ -30,8 +31,8 @@ export default function AdminProducts() {
   };
 
   const fetchSellers = () => {
-    api.get("/api/admin/sellers").then((res) => {
-      setSellers(res.data);
+    api.get("/api/admin/sellers", { params: { sort: "name", limit: 200 } }).then((res) => {
+      setSellers(res.data.items);
     });
   };
 
@@ -165,6 +166,11 @@ export default function AdminProducts() {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="pt-4 text-center">
+              <button onClick={() => fetchProducts(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+            </div>
+          )}
         </div>
       </div>
 
@@ -21,9 +21,18 @@ export default function AdminSellers() {
   const [loading, setLoading] = useState(false);
 
 
-  const fetchSellers = () => api.get('/api/admin/sellers').then(res => setSellers(res.data)).catch(() => setSellers([]));
+  const [sellersCursor, setSellersCursor] = useState(null);
+  const [withdrawalsCursor, setWithdrawalsCursor] = useState(null);
+
+  const fetchSellers = (cursor = null) => api.get('/api/admin/sellers', { params: cursor ? { cursor } : {} }).then(res => {
+    setSellers(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+    setSellersCursor(res.data.next_cursor);
+  }).catch(() => setSellers([]));
   const fetchRequests = () => api.get('/api/admin/seller-requests').then(res => setRequests(res.data)).catch(() => setRequests([]));
-  const fetchWithdrawals = () => api.get('/api/admin/withdrawals').then(res => setWithdrawals(res.data)).catch(() => setWithdrawals([]));
+  const fetchWithdrawals = (cursor = null) => api.get('/api/admin/withdrawals', { params: cursor ? { cursor } : {} }).then(res => {
+    setWithdrawals(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+    setWithdrawalsCursor(res.data.next_cursor);
+  }).catch(() => setWithdrawals([]));
 
   useEffect(() => {
     fetchSellers();
@@ -157,6 +166,7 @@ export default function AdminSellers() {
               </div>
 
               {activeTab === 'sellers' && (
+                <>
                 <table className="w-full text-sm">
                   <thead>
                     <tr className="text-left bg-gray-50">
@@ -200,6 +210,12 @@ export default function AdminSellers() {
                     ))}
                   </tbody>
                 </table>
+                {sellersCursor && (
+                  <div className="pt-4 text-center">
+                    <button onClick={() => fetchSellers(sellersCursor)} className="text-sm font-medium text-blue-600 hover:underline">Load more</button>
+                  </div>
+                )}
+                </>
               )}
 
               {activeTab === 'requests' && (
@@ -234,6 +250,7 @@ export default function AdminSellers() {
               )}
 
               {activeTab === 'withdrawals' && (
+                <>
                 <table className="w-full text-sm">
                   <thead>
                     <tr className="text-left">
@@ -268,6 +285,12 @@ export default function AdminSellers() {
                     ))}
                   </tbody>
                 </table>
+                {withdrawalsCursor && (
+                  <div className="pt-4 text-center">
+                    <button onClick={() => fetchWithdrawals(withdrawalsCursor)} className="text-sm font-medium text-blue-600 hover:underline">Load more</button>
+                  </div>
+                )}
+                </>
               )}
 
           </div>
@@ -1,7 +1,7 @@
 
 import React, { useState, useEffect } from "react";
 import { Helmet } from "react-helmet";
-import api, { upload } from "../../api/client";
+import api, { upload, uploadResumable } from "../../api/client";
 import { getImageUrl } from "../../utils/image";
 
 export default function AdminSettings() {
@@ -55,9 +55,12 @@ export default function AdminSettings() {
       formData.append('file', file);
       
       try {
-          const res = await api.post('/api/upload', formData, {
-              headers: { 'Content-Type': 'multipart/form-data' }
-          });
+          // Videos are large; send them in resumable chunks
+          const res = file.type.startsWith('video/')
+              ? await uploadResumable(file)
+              : await api.post('/api/upload', formData, {
+                  headers: { 'Content-Type': 'multipart/form-data' }
+              });
           // Store relative URL in state/DB, let frontend resolve it for display
           // Or store full URL? Storing relative is more portable.
           // But UserHome expects full URL or resolves it.
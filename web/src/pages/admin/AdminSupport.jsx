@@ -4,14 +4,20 @@ import api from '../../api/client';
 
 export default function AdminSupport() {
   const [tickets, setTickets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [filter, setFilter] = useState('all');
 
   useEffect(() => {
     fetchTickets();
-  }, []);
+  }, [filter]);
 
-  const fetchTickets = () => {
-    api.get('/api/admin/support').then(res => setTickets(res.data));
+  const fetchTickets = (cursor = null) => {
+    const params = filter === 'all' ? {} : { status: filter };
+    if (cursor) params.cursor = cursor;
+    api.get('/api/admin/support', { params }).then(res => {
+      setTickets(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
+    });
   };
 
   const handleStatusUpdate = (id, newStatus) => {
@@ -94,6 +100,11 @@ export default function AdminSupport() {
                     )}
                 </tbody>
             </table>
+            {nextCursor && (
+                <div className="p-4 text-center">
+                    <button onClick={() => fetchTickets(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+                </div>
+            )}
         </div>
       </div>
     </>
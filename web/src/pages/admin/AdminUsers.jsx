@@ -4,13 +4,15 @@ import api from "../../api/client";
 
 export default function AdminUsers() {
   const [users, setUsers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [showAddModal, setShowAddModal] = useState(false);
   const [newUser, setNewUser] = useState({ name: "", email: "", password: "", role: "user" });
   const [loading, setLoading] = useState(false);
 
-  const fetchUsers = () => {
-    api.get("/api/admin/users").then((res) => {
-      setUsers(res.data);
+  const fetchUsers = (cursor = null) => {
+    api.get("/api/admin/users", { params: cursor ? { cursor } : {} }).then((res) => {
+      setUsers(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
     });
   };
 
@@ -74,6 +76,11 @@ export default function AdminUsers() {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="pt-4 text-center">
+              <button onClick={() => fetchUsers(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+            </div>
+          )}
         </div>
       </div>
 
@@ -4,14 +4,16 @@ import api from "../../api/client";
 
 export default function AdminWithdrawals() {
   const [withdrawals, setWithdrawals] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [processing, setProcessing] = useState({});
   const [showRejectModal, setShowRejectModal] = useState(false);
   const [rejectId, setRejectId] = useState(null);
   const [rejectReason, setRejectReason] = useState('');
 
-  const fetchWithdrawals = () => {
-    api.get("/api/admin/withdrawals").then((res) => {
-      setWithdrawals(res.data);
+  const fetchWithdrawals = (cursor = null) => {
+    api.get("/api/admin/withdrawals", { params: cursor ? { cursor } : {} }).then((res) => {
+      setWithdrawals(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+      setNextCursor(res.data.next_cursor);
     });
   };
 
@@ -129,6 +131,11 @@ export default function AdminWithdrawals() {
                 )}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="p-4 text-center">
+                <button onClick={() => fetchWithdrawals(nextCursor)} className="text-sm font-medium text-primary hover:underline">Load more</button>
+              </div>
+            )}
           </div>
         </div>
 
@@ -8,24 +8,34 @@ export default function SellerOrders() {
   const [editOrder, setEditOrder] = useState(null);
   const [formStatus, setFormStatus] = useState("");
   const [formDeliveryInfo, setFormDeliveryInfo] = useState("");
+  const [filters, setFilters] = useState({ status: '', from: '', to: '', sort_by: 'newest' });
+  const [page, setPage] = useState(1);
+  const [pages, setPages] = useState(1);
 
   const fetchOrders = () => {
-    api.get("/api/seller/orders").then((res) => {
-      setOrders(res.data);
+    const params = { page };
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value) params[key] = value;
+    });
+    api.get("/api/seller/orders", { params }).then((res) => {
+      setOrders(res.data.orders);
+      setPages(res.data.pages || 1);
     });
   };
 
   useEffect(() => {
     fetchOrders();
-  }, []);
+  }, [filters, page]);
+
+  const updateFilter = (key, value) => {
+    setPage(1);
+    setFilters({ ...filters, [key]: value });
+  };
 
   const openEdit = (order) => {
     setEditOrder(order);
     setFormStatus(order.status);
-    // Note: current API for seller orders doesn't return delivery_info in the list, 
-    // but we can default to empty or fetch detail if needed. 
-    // For simplicity, we start empty or use what we have if we expanded the API.
-    setFormDeliveryInfo(""); 
+    setFormDeliveryInfo(order.delivery_info || "");
   };
 
   const handleSave = async () => {
@@ -51,25 +61,47 @@ export default function SellerOrders() {
       </Helmet>
       <div className="space-y-4">
         <h1 className="text-2xl font-semibold">Seller Orders</h1>
+        <div className="bg-white rounded-xl shadow p-4 flex flex-wrap gap-3 text-sm">
+          <select className="border rounded px-2 py-1" value={filters.status} onChange={e => updateFilter('status', e.target.value)}>
+            <option value="">All statuses</option>
+            <option value="pending">Pending</option>
+            <option value="paid">Paid</option>
+            <option value="shipped">Shipped</option>
+            <option value="delivered">Delivered</option>
+            <option value="cancelled">Cancelled</option>
+          </select>
+          <input type="date" className="border rounded px-2 py-1" value={filters.from} onChange={e => updateFilter('from', e.target.value)} />
+          <input type="date" className="border rounded px-2 py-1" value={filters.to} onChange={e => updateFilter('to', e.target.value)} />
+          <select className="border rounded px-2 py-1" value={filters.sort_by} onChange={e => updateFilter('sort_by', e.target.value)}>
+            <option value="newest">Newest first</option>
+            <option value="oldest">Oldest first</option>
+            <option value="total_high_low">Total: high to low</option>
+            <option value="total_low_high">Total: low to high</option>
+          </select>
+        </div>
         <div className="bg-white rounded-xl shadow p-4">
           <table className="w-full text-sm">
             <thead>
               <tr className="text-left">
                 <th className="p-2">Order ID</th>
-                <th className="p-2">Product</th>
-                <th className="p-2">Quantity</th>
+                <th className="p-2">Date</th>
+                <th className="p-2">Items</th>
                 <th className="p-2">Total Price</th>
                 <th className="p-2">Status</th>
                 <th className="p-2">Action</th>
               </tr>
             </thead>
             <tbody>
-              {orders.map((item, idx) => (
-                <tr key={idx} className="border-t">
+              {orders.map((item) => (
+                <tr key={item.order_id} className="border-t align-top">
                   <td className="p-2">#{item.order_id}</td>
-                  <td className="p-2">{item.product_name}</td>
-                  <td className="p-2">{item.quantity}</td>
-                  <td className="p-2">₹{item.price.toFixed(2)}</td>
+                  <td className="p-2">{item.created_at ? new Date(item.created_at).toLocaleDateString() : '-'}</td>
+                  <td className="p-2">
+                    {item.items.map(line => (
+                      <div key={line.product_id}>{line.product_name} × {line.quantity}</div>
+                    ))}
+                  </td>
+                  <td className="p-2">₹{item.total.toFixed(2)}</td>
                   <td className="p-2">
                     <span className={`px-2 py-1 rounded text-xs ${
                         item.status === 'pending' ? 'bg-yellow-100 text-yellow-800' :
@@ -85,8 +117,18 @@ export default function SellerOrders() {
                   </td>
                 </tr>
               ))}
+              {orders.length === 0 && (
+                <tr><td colSpan="6" className="p-4 text-center text-gray-400">No orders found.</td></tr>
+              )}
             </tbody>
           </table>
+          {pages > 1 && (
+            <div className="flex justify-end items-center gap-2 pt-3 text-sm">
+              <button className="px-3 py-1 border rounded disabled:opacity-50" disabled={page <= 1} onClick={() => setPage(page - 1)}>Previous</button>
+              <span>Page {page} of {pages}</span>
+              <button className="px-3 py-1 border rounded disabled:opacity-50" disabled={page >= pages} onClick={() => setPage(page + 1)}>Next</button>
+            </div>
+          )}
         </div>
 
         {editOrder && (
@@ -6,6 +6,7 @@ import { getImageUrl } from "../../utils/image";
 
 export default function SellerProducts() {
   const [products, setProducts] = useState([]);
+  const [importJob, setImportJob] = useState(null);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -18,6 +19,41 @@ export default function SellerProducts() {
     });
   };
 
+  useEffect(() => {
+    if (!importJob || importJob.status === 'completed' || importJob.status === 'failed') return;
+    const timer = setTimeout(() => {
+      api.get(`/api/seller/products/import/${importJob.id}`).then((res) => {
+        setImportJob(res.data);
+        if (res.data.status === 'completed') loadProducts();
+      });
+    }, 2000);
+    return () => clearTimeout(timer);
+  }, [importJob]);
+
+  const handleImport = async (e) => {
+      const file = e.target.files[0];
+      e.target.value = '';
+      if (!file) return;
+      const formData = new FormData();
+      formData.append('file', file);
+      try {
+          const res = await api.post("/api/seller/products/import", formData);
+          setImportJob(res.data);
+      } catch (err) {
+          alert(err.response?.data?.error || "Failed to start import");
+      }
+  };
+
+  const downloadImportErrors = async () => {
+      const res = await api.get(`/api/seller/products/import/${importJob.id}/errors`, { responseType: 'blob' });
+      const url = window.URL.createObjectURL(new Blob([res.data], { type: 'text/csv' }));
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `import_${importJob.id}_errors.csv`;
+      link.click();
+      window.URL.revokeObjectURL(url);
+  };
+
   const handleDelete = async (id) => {
       if(!window.confirm("Are you sure you want to delete this product?")) return;
       try {
@@ -36,10 +72,28 @@ export default function SellerProducts() {
       <div className="space-y-4">
         <div className="flex justify-between items-center">
           <h1 className="text-2xl font-semibold">My Products</h1>
-          <Link to="/seller/products/add" className="bg-slate-900 text-white px-4 py-2 rounded-lg text-sm">
-            Add New Product
-          </Link>
+          <div className="flex gap-2">
+            <label className="border border-slate-300 px-4 py-2 rounded-lg text-sm cursor-pointer hover:bg-gray-50">
+              Bulk Import (CSV/XLSX)
+              <input type="file" accept=".csv,.xlsx" className="hidden" onChange={handleImport} />
+            </label>
+            <Link to="/seller/products/add" className="bg-slate-900 text-white px-4 py-2 rounded-lg text-sm">
+              Add New Product
+            </Link>
+          </div>
         </div>
+        {importJob && (
+          <div className="bg-white rounded-xl shadow p-4 text-sm flex justify-between items-center">
+            <span>
+              Import of {importJob.filename}: <strong>{importJob.status}</strong> · {importJob.total_rows} rows read,
+              {' '}{importJob.created} created, {importJob.updated} updated, {importJob.errors} errors, {importJob.images_saved} images
+              {importJob.error && <span className="text-red-600"> · {importJob.error}</span>}
+            </span>
+            {importJob.has_error_file && importJob.status === 'completed' && (
+              <button onClick={downloadImportErrors} className="text-blue-600 hover:underline">Download error report</button>
+            )}
+          </div>
+        )}
         <div className="bg-white rounded-xl shadow p-4">
           <table className="w-full text-sm">
             <thead>
@@ -10,6 +10,8 @@ export default function SellerWithdrawals() {
   
   const [activeTab, setActiveTab] = useState('requests'); // 'requests' | 'ledger'
   const [transactions, setTransactions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [dateRange, setDateRange] = useState({ from: '', to: '' });
 
   // Bank Details State
   const [bankDetailsConfigured, setBankDetailsConfigured] = useState(false);
@@ -41,12 +43,37 @@ export default function SellerWithdrawals() {
       });
   };
 
-  const fetchTransactions = () => {
-      api.get("/api/seller/transactions").then((res) => {
-          setTransactions(res.data);
+  const rangeParams = () => {
+      const params = {};
+      if (dateRange.from) params.from = dateRange.from;
+      if (dateRange.to) params.to = dateRange.to;
+      return params;
+  };
+
+  const fetchTransactions = (cursor = null) => {
+      const params = rangeParams();
+      if (cursor) params.cursor = cursor;
+      api.get("/api/seller/transactions", { params }).then((res) => {
+          setTransactions(prev => cursor ? [...prev, ...res.data.transactions] : res.data.transactions);
+          setNextCursor(res.data.next_cursor);
       });
   };
 
+  const exportTransactions = async () => {
+      try {
+          const res = await api.get("/api/seller/transactions/export", { params: rangeParams(), responseType: 'blob' });
+          const url = window.URL.createObjectURL(new Blob([res.data], { type: 'text/csv' }));
+          const link = document.createElement('a');
+          link.href = url;
+          link.download = 'transactions.csv';
+          link.click();
+          window.URL.revokeObjectURL(url);
+      } catch (err) {
+          console.error('Failed to export transactions', err);
+          alert('Failed to export transactions');
+      }
+  };
+
   useEffect(() => {
     fetchWithdrawals();
     fetchBankDetails();
@@ -56,7 +83,7 @@ export default function SellerWithdrawals() {
     if (activeTab === 'ledger') {
         fetchTransactions();
     }
-  }, [activeTab]);
+  }, [activeTab, dateRange]);
 
   const handleSaveBankDetails = () => {
       // Validation logic
@@ -344,7 +371,12 @@ export default function SellerWithdrawals() {
             <div className="bg-white rounded-xl shadow overflow-hidden">
                 <div className="p-4 border-b border-gray-100 bg-gray-50 flex justify-between items-center">
                     <h2 className="font-semibold text-slate-700">Transaction Ledger</h2>
-                    <span className="text-xs text-gray-500">Showing recent activity</span>
+                    <div className="flex items-center gap-2 text-xs text-gray-500">
+                        <input type="date" value={dateRange.from} onChange={e => setDateRange({ ...dateRange, from: e.target.value })} className="border rounded px-2 py-1" />
+                        <span>to</span>
+                        <input type="date" value={dateRange.to} onChange={e => setDateRange({ ...dateRange, to: e.target.value })} className="border rounded px-2 py-1" />
+                        <button onClick={exportTransactions} className="px-3 py-1 rounded border border-gray-300 bg-white hover:bg-gray-100 text-slate-700">Export CSV</button>
+                    </div>
                 </div>
                 <div className="overflow-x-auto">
                     <table className="w-full text-sm text-left">
@@ -385,6 +417,11 @@ export default function SellerWithdrawals() {
                         </tbody>
                     </table>
                 </div>
+                {nextCursor && (
+                    <div className="p-4 border-t border-gray-100 text-center">
+                        <button onClick={() => fetchTransactions(nextCursor)} className="text-sm font-medium text-blue-600 hover:underline">Load more</button>
+                    </div>
+                )}
             </div>
         )}
       </div>